@@ -0,0 +1,285 @@
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import contextlib
+import subprocess
+import tracemalloc
+
+from rcon import FakeRconServer, RconClient
+
+ENTRY_POINTS = ("design", "build", "bench", "compiler", "transports", "tools")
+
+def bench_rcon(n_commands: int = 5000, windows=(1, 8, 64), latency: float = 0.0) -> list:
+    """
+    Commands per second through RconClient.pipeline against a local FakeRconServer, for each window size.
+    """
+    results = []
+    cmd = "fill 0 80 0 15 95 15 minecraft:stone replace"
+    for window in windows:
+        with FakeRconServer(password="bench", latency=latency) as server:
+            with RconClient(server.host, server.port, "bench") as client:
+                t = time.perf_counter()
+                for _ in client.pipeline(((i, cmd) for i in range(n_commands)), window=window):
+                    pass
+                elapsed = time.perf_counter() - t
+        results.append({"window": window, "commands": n_commands, "seconds": elapsed, "commands_per_second": n_commands / elapsed})
+        print(f"rcon window={window:<4} {n_commands / elapsed:10.0f} commands/s")
+    return results
+
+def parallel_commands(n_commands: int, span: int = 96, seed: int = 0) -> list:
+    """
+    Synthetic build for the parallel suite: random overlapping fills of a few blocks and modes, with an occasional non-fill command.
+    """
+    import random
+
+    rng = random.Random(seed)
+    cmds = []
+    for _ in range(n_commands):
+        if rng.random() < 0.005:
+            cmds.append("say checkpoint")
+            continue
+        x, y, z = (rng.randint(0, span) for _ in range(3))
+        w, h, d = (rng.randint(0, 8) for _ in range(3))
+        block = rng.choice(["minecraft:stone", "minecraft:glass", "minecraft:air"])
+        mode = rng.choice(["replace", "replace", "keep", "outline", "hollow"])
+        cmds.append(f"fill {x} {y} {z} {x + w} {y + h} {z + d} {block} {mode}")
+    return cmds
+
+def bench_parallel(n_commands: int = 2000, connections=(1, 2, 4, 8, 16), latency: float = 0.002) -> list:
+    """
+    Commands per second through ParallelRconTransport against a local FakeRconServer (latency seconds per command,
+    served concurrently per connection), for each connection count, and whether the world built from the commands
+    in the order the server ran them is the same as from the sequential order.
+    """
+    from voxels import VoxelGrid
+    from transports import ParallelRconTransport
+
+    def world(cmds):
+        grid = VoxelGrid.from_commands(cmds)
+        return grid.lo, [grid.palette[v] for v in grid.cells.ravel()]
+
+    cmds = parallel_commands(n_commands)
+    reference = world(cmds)
+    results = []
+    for n in connections:
+        with FakeRconServer(password="bench", latency=latency) as server:
+            transport = ParallelRconTransport(server.host, server.port, "bench", connections=n)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                t = time.perf_counter()
+                for _ in transport.run((i + 1, "bench", cmd) for i, cmd in enumerate(cmds)):
+                    pass
+                elapsed = time.perf_counter() - t
+            identical = world(server.commands) == reference
+        results.append({"connections": n, "commands": n_commands, "seconds": elapsed, "commands_per_second": n_commands / elapsed, "identical": identical})
+        speedup = results[0]["seconds"] / elapsed
+        print(f"parallel connections={n:<3} {n_commands / elapsed:10.0f} commands/s {speedup:6.2f}x {'same world' if identical else 'WORLD DIFFERS'}")
+    return results
+
+def bench_keyboard(n_commands: int = 200, latency: float = 0.0, min_typing_speed: float = 0.0005, delay: float = 0.0) -> list:
+    """
+    Characters per second achieved by KeyboardTransport with each injection mode, typing into a FakeKeyboard
+    (latency seconds per key) with terminal echo discarded.
+    """
+    from transports import FakeKeyboard, KeyboardTransport
+
+    results = []
+    cmds = [(i + 1, "bench", f"fill {i} 80 0 {i + 15} 95 15 minecraft:stone replace") for i in range(n_commands)]
+    n_chars = sum(len(cmd) for _, _, cmd in cmds)
+    for injection in ("char", "bulk", "paste"):
+        transport = KeyboardTransport(min_typing_speed=min_typing_speed, delay=delay, counter_max=0, injection=injection,
+                                      keyboard=FakeKeyboard(latency), clipboard=lambda text: None)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            t = time.perf_counter()
+            for _ in transport.run(cmds):
+                pass
+            elapsed = time.perf_counter() - t
+        results.append({"injection": injection, "commands": n_commands, "characters": n_chars, "seconds": elapsed, "characters_per_second": n_chars / elapsed})
+        print(f"keyboard injection={injection:<6} {n_chars / elapsed:12.0f} characters/s")
+    return results
+
+def bench_design(plan_steps: int = 8, latency: float = 0.05, concurrency=(0, 2, 8)) -> list:
+    """
+    Wall time of tool call generation for one construction plan with a FakeChatModel (latency seconds per tool call),
+    as a single request (concurrency 0) and split into concurrent per-step requests.
+    """
+    import design
+    from fake_llm import FakeChatModel
+
+    results = []
+    llm = FakeChatModel(latency=latency, plan_steps=plan_steps)
+    plan = llm.invoke("plan").content
+    tool_llm = llm.bind_tools([])
+    for n in concurrency:
+        t = time.perf_counter()
+        if n > 0:
+            outputs = asyncio.run(design.generate_sections(tool_llm, "", plan, concurrency=n))
+        else:
+            outputs = [tool_llm.invoke(plan)]
+        elapsed = time.perf_counter() - t
+        n_calls = sum(len(output.tool_calls) for output in outputs)
+        results.append({"concurrency": n, "plan_steps": plan_steps, "tool_calls": n_calls, "seconds": elapsed})
+        print(f"design concurrency={n:<3} {elapsed:8.2f} s for {n_calls} tool calls")
+    return results
+
+def compiler_cases(scale: int) -> dict:
+    """
+    Synthetic tool calls growing linearly with scale: fills past the 32,768 block limit, axis-aligned and oblique
+    circular beams (filled and hollow) of growing radius and length, steep and shallow planes, and curved shapes.
+    """
+    from tools import BeamSpec, ConeSpec, EllipsoidSpec, FillSpec, PlaneSpec, SphereSpec
+
+    n = 32 * scale
+    common = {"reason": "bench", "explanation": "bench", "block": "minecraft:stone"}
+    return {
+        "fill_overflow": ("FillSpec", FillSpec(start_coordinates=[0, 0, 0], end_coordinates=[2 * n - 1, n - 1, 2 * n - 1], mode="replace", **common)),
+        "fill_outline": ("FillSpec", FillSpec(start_coordinates=[0, 0, 0], end_coordinates=[2 * n - 1, n - 1, 2 * n - 1], mode="outline", **common)),
+        "beam_axis": ("BeamSpec", BeamSpec(start_coordinates=[n, 0, n], end_coordinates=[n, 2 * n, n], shape="circular", direction="Y",
+                                           thickness=2 * scale + 2, fill="filled", mode="replace", **common)),
+        "beam_axis_hollow": ("BeamSpec", BeamSpec(start_coordinates=[n, 0, n], end_coordinates=[n, 2 * n, n], shape="circular", direction="Y",
+                                                  thickness=2 * scale + 2, fill="hollow", mode="replace", **common)),
+        "beam_oblique": ("BeamSpec", BeamSpec(start_coordinates=[0, 0, 0], end_coordinates=[2 * n, n, n + n // 2], shape="circular", direction="X",
+                                              thickness=2 * scale + 2, fill="filled", mode="replace", **common)),
+        "beam_oblique_hollow": ("BeamSpec", BeamSpec(start_coordinates=[0, 0, 0], end_coordinates=[2 * n, n, n + n // 2], shape="circular", direction="X",
+                                                     thickness=2 * scale + 2, fill="hollow", mode="replace", **common)),
+        "plane_steep": ("PlaneSpec", PlaneSpec(start_coordinates=[0, 0, 0], end_coordinates=[n // 4, 2 * n, n], perpendicular_to="XY", mode="replace", **common)),
+        "plane_shallow": ("PlaneSpec", PlaneSpec(start_coordinates=[0, 0, 0], end_coordinates=[2 * n, n // 4, n], perpendicular_to="XY", mode="replace", **common)),
+        "sphere": ("SphereSpec", SphereSpec(center_coordinates=[n, n, n], radius=n // 2, fill="filled", mode="replace", **common)),
+        "dome_hollow": ("SphereSpec", SphereSpec(center_coordinates=[n, 0, n], radius=n // 2, part="upper", fill="hollow", mode="replace", **common)),
+        "ellipsoid_hull": ("EllipsoidSpec", EllipsoidSpec(center_coordinates=[n, n, n], radii=[n, n // 4, n // 2], part="lower", fill="hollow", mode="replace", **common)),
+        "cone": ("ConeSpec", ConeSpec(base_coordinates=[n, 0, n], radius=n // 4, height=n, direction="Y", fill="filled", mode="replace", **common)),
+    }
+
+def bench_compiler(max_scale: int = 4, repeat: int = 5) -> list:
+    """
+    Compile time (best of `repeat`), peak traced memory, command count and typed characters of each synthetic tool call
+    in compiler_cases, at scales 1, 2, 4, ... up to max_scale.
+    """
+    from compiler import map_tools_to_wrappers
+
+    results = []
+    scale = 1
+    while scale <= max_scale:
+        for case, (tool_name, spec) in compiler_cases(scale).items():
+            wrapper = map_tools_to_wrappers[tool_name]
+            seconds = float("inf")
+            for _ in range(repeat):
+                t = time.perf_counter()
+                cmds = wrapper(spec, origin=[0, 0, 0])
+                seconds = min(seconds, time.perf_counter() - t)
+            tracemalloc.start()
+            wrapper(spec, origin=[0, 0, 0])
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            n_chars = sum(len(cmd) for cmd in cmds)
+            results.append({"case": case, "scale": scale, "seconds": seconds, "peak_bytes": peak, "commands": len(cmds), "characters": n_chars})
+            print(f"compiler {case:<20} scale={scale:<3} {seconds * 1000:9.1f} ms {peak / 2**20:8.1f} MB peak {len(cmds):8d} commands {n_chars:10d} characters")
+        scale *= 2
+    return results
+
+NOISE_FLOOR = {"seconds": 0.005, "peak_bytes": 1 << 20} # absolute differences below these are timer and allocator noise
+
+def compare_results(results: list, baseline: list, keys=("case", "scale"), tolerance: float = 0.25) -> list:
+    """
+    Regressions of results against a baseline run of the same suite: any increase in commands or characters,
+    or seconds and peak memory more than `tolerance` (and the noise floor) above the baseline.
+    """
+    previous = {tuple(r[k] for k in keys): r for r in baseline}
+    regressions = []
+    for r in results:
+        before = previous.get(tuple(r[k] for k in keys))
+        if before is None:
+            continue
+        for metric, allowed in (("commands", 0.0), ("characters", 0.0), ("seconds", tolerance), ("peak_bytes", tolerance)):
+            if metric in r and metric in before and r[metric] > before[metric] * (1 + allowed) + NOISE_FLOOR.get(metric, 0):
+                regressions.append({**{k: r[k] for k in keys}, "metric": metric, "before": before[metric], "after": r[metric]})
+    return regressions
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_importtime(stderr: str) -> list:
+    """
+    (module, self us, cumulative us) rows from the output of python -X importtime.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def bench_imports(modules=ENTRY_POINTS, repeat: int = 5, top: int = 5) -> list:
+    """
+    Time to import each entry point in a fresh interpreter, from python -X importtime (best of `repeat` runs),
+    with the `top` most expensive modules it pulls in.
+    """
+    results = []
+    root = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        best = None
+        for _ in range(repeat):
+            p = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=root, capture_output=True, text=True)
+            if p.returncode != 0:
+                best = {"module": module, "error": p.stderr.strip().splitlines()[-1]}
+                break
+            rows = parse_importtime(p.stderr)
+            total = next(cumulative for name, _, cumulative in reversed(rows) if name == module)
+            if best is None or total < best["seconds"] * 1e6:
+                heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+                best = {"module": module, "seconds": total / 1e6, "modules": len(rows),
+                        "heaviest": [{"module": name, "seconds": self_us / 1e6} for name, self_us, _ in heaviest]}
+        results.append(best)
+        if "error" in best:
+            print(f"import {module:<12} failed: {best['error']}")
+        else:
+            print(f"import {module:<12} {best['seconds'] * 1000:8.1f} ms, {best['modules']} modules "
+                  f"(heaviest: {', '.join(row['module'] for row in best['heaviest'][:3])})")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vibecraft benchmarks.")
+    parser.add_argument("suite", choices=["rcon", "parallel", "keyboard", "design", "imports", "compiler"], help="Benchmark to run.")
+    parser.add_argument("--n", type=int, default=None, help="Number of commands, or largest scale for the compiler suite (default depends on the suite).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server time per command, fake keyboard time per key, or fake LLM time per tool call (seconds).")
+    parser.add_argument("--out", type=str, default=None, help="Optional path to save results as JSON.")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Results JSON of an earlier run of the same suite: report regressions against it and exit with status 1 if there are any.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="With --compare, allowed relative increase in time and memory.")
+
+    args = parser.parse_args()
+
+    if args.suite == "rcon":
+        results = bench_rcon(n_commands=args.n or 5000, latency=args.latency)
+    elif args.suite == "parallel":
+        results = bench_parallel(n_commands=args.n or 2000, latency=args.latency or 0.002)
+    elif args.suite == "keyboard":
+        results = bench_keyboard(n_commands=args.n or 200, latency=args.latency)
+    elif args.suite == "design":
+        results = bench_design(plan_steps=args.n or 8, latency=args.latency or 0.05)
+    elif args.suite == "imports":
+        results = bench_imports()
+    elif args.suite == "compiler":
+        results = bench_compiler(max_scale=args.n or 4)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"suite": args.suite, "revision": git_revision(), "results": results}, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        keys = {"compiler": ("case", "scale"), "rcon": ("window",), "parallel": ("connections",), "keyboard": ("injection",), "design": ("concurrency",), "imports": ("module",)}[args.suite]
+        regressions = compare_results(results, baseline["results"], keys=keys, tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {' '.join(str(r[k]) for k in keys)} {r['metric']}: {r['before']} -> {r['after']}")
+        print(f"{len(regressions)} regression(s) against {args.compare} (revision {baseline.get('revision')})")
+        sys.exit(1 if regressions else 0)
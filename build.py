@@ -1,535 +1,434 @@
-import time
+import os
 import sys
-import random
 import json
+import math
+import queue
 import argparse
+import itertools
+import threading
 
-from pynput.keyboard import Controller
+from typing import Iterable, Iterator, Optional, Tuple
 
 from tools import *
-
-def fill(spec: FillSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+from compiler import *
+from transports import *
+from cache import DEFAULT_CACHE_DIR
+from voxels import AIR, is_air, tile_groups
+from journal import Journal, command_digest
+from instrumentation import make_recorder
+from sections import SectionStore
+from scheduler import CHUNK_LOADING, schedule_commands
+from export import MAX_COMMAND_CHAIN_LENGTH, function_name, write_datapack, write_schematic, write_structure
+
+def format_duration(seconds: float) -> str:
+    m, s = divmod(int(round(seconds)), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
+
+def flag_reason(tool_name: str, spec: BaseModel) -> str:
     """
-    Wrapper for FillSpec.
-    Converts origin + translated coordinates + block states into a proper MC /fill command
+    Explains why a tool call compiles to many commands.
     """
-
-    # offset coordinates to MC coordinate system
-    x1 = spec.start_coordinates[0] + origin[0]
-    y1 = spec.start_coordinates[1] + origin[1]
-    z1 = spec.start_coordinates[2] + origin[2]
-    x2 = spec.end_coordinates[0] + origin[0]
-    y2 = spec.end_coordinates[1] + origin[1]
-    z2 = spec.end_coordinates[2] + origin[2]
-
-    block_str = spec.block
-
-    # in case of wrong block_states format
-    if spec.block_states:
-        bs = spec.block_states
-        if isinstance(bs, str):
-            bs = bs.strip().strip("[]")
-            parts = [p.strip() for p in bs.split(",") if p.strip()]
-            bs_dict = {}
-            for p in parts:
-                if "=" in p:
-                    k, v = p.split("=", 1)
-                    bs_dict[k.strip()] = v.strip()
-            bs = bs_dict
-
-        if isinstance(bs, dict) and bs:
-            block_str += "[" + ",".join(f"{k}={v}" for k, v in bs.items()) + "]"
-
-    # --- HANDLE /fill OVERFLOW (BETA; COMPLETELY VIBE CODED) ---
-    dx = abs(x2 - x1) + 1
-    dy = abs(y2 - y1) + 1
-    dz = abs(z2 - z1) + 1
-    volume = dx * dy * dz
-
-    if volume > 32768:
-        cmds = []
-        # Split along the longest axis into sub-regions under 32768 blocks
-        max_blocks = 32768
-        # determine step size along longest dimension
-        if dx >= dy and dx >= dz:
-            step = max(1, max_blocks // (dy * dz))
-            for xs in range(min(x1, x2), max(x1, x2) + 1, step):
-                xe = min(xs + step - 1, max(x1, x2))
-                cmds.append(f"fill {xs} {y1} {z1} {xe} {y2} {z2} {block_str} {spec.mode}")
-        elif dy >= dx and dy >= dz:
-            step = max(1, max_blocks // (dx * dz))
-            for ys in range(min(y1, y2), max(y1, y2) + 1, step):
-                ye = min(ys + step - 1, max(y1, y2))
-                cmds.append(f"fill {x1} {ys} {z1} {x2} {ye} {z2} {block_str} {spec.mode}")
-        else:
-            step = max(1, max_blocks // (dx * dy))
-            for zs in range(min(z1, z2), max(z1, z2) + 1, step):
-                ze = min(zs + step - 1, max(z1, z2))
-                cmds.append(f"fill {x1} {y1} {zs} {x2} {y2} {ze} {block_str} {spec.mode}")
-        return cmds
-    # --- END HANDLE /fill OVERFLOW ---
-
-    cmd = f"fill {x1} {y1} {z1} {x2} {y2} {z2} {block_str} {spec.mode}"
-    return [cmd]
-
-def beam(spec: BeamSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
-    """
-    Builds a beam (square or circular cross-section) between two 3D points.
-    Optimized for axis-aligned beams using bulk /fill operations.
-    """
-
-    cmds = []
-
-    x1, y1, z1 = spec.start_coordinates
-    x2, y2, z2 = spec.end_coordinates
-    dx, dy, dz = x2 - x1, y2 - y1, z2 - z1
-
-    abs_diffs = [abs(dx), abs(dy), abs(dz)]
-
-    best_axis = 1
-
-    if hasattr(spec, "direction"):
-        if spec.direction == "XY" or spec.direction == "Z":
-            best_axis = 2
-        elif spec.direction == "YZ" or spec.direction == "X":
-            best_axis = 0
-        else:  # "XZ"
-            best_axis = 1
-    else:
-        best_axis = abs_diffs.index(max(abs_diffs))
-        if dx == 0 and dy == 0 and dz == 0: # special case: 1-block-thick with no direction specified should default to horizontal where it is most commonly used
-            best_axis = 1
-
-    def fill_cmd(xa, ya, za, xb, yb, zb, block, mode, reason, explanation):
-        return fill(
-            FillSpec(
-                reason=reason,
-                start_coordinates=[xa, ya, za],
-                end_coordinates=[xb, yb, zb],
-                block=block,
-                block_states=spec.block_states,
-                mode=mode,
-                explanation=explanation,
-            ),
-            origin=origin,
-        )
-
-    # ---- OPTIMIZATION: Axis-aligned beam ----
-    if (
-        (x1 == x2 and y1 == y2) or
-        (x1 == x2 and z1 == z2) or
-        (y1 == y2 and z1 == z2)
-    ):
-        # Determine the constant axes and the axis of alignment
-        if best_axis == 0:
-            axis = "x"
-        elif best_axis == 1:
-            axis = "y"
-        else:
-            axis = "z"
-
-        # Define the full bounding cuboid
-        if axis == "x":
-            xa, xb = sorted([x1, x2])
-            cmds += fill_cmd(
-                xa - 0, y1 - spec.thickness, z1 - spec.thickness,
-                xb + 0, y1 + spec.thickness, z1 + spec.thickness,
-                spec.block, spec.mode, spec.reason, spec.explanation
-            )
+    if tool_name == "BeamSpec":
+        x1, y1, z1 = spec.start_coordinates
+        x2, y2, z2 = spec.end_coordinates
+        if [x1 == x2, y1 == y2, z1 == z2].count(True) < 2:
             if spec.shape == "circular":
-                r = spec.thickness
-                for y in range(-r, r + 1):
-                    # find outermost z values within circle
-                    z_min, z_max = None, None
-                    for z in range(-r, r + 1):
-                        if y * y + z * z <= r * r:
-                            if z_min is None:
-                                z_min = z
-                            z_max = z
-                    if z_min is not None:
-                        # clear outside both sides
-                        if z_min > -r:
-                            cmds += fill_cmd(
-                                xa, y1 + y, z1 - r,
-                                xb, y1 + y, z1 + z_min - 1,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        if z_max < r:
-                            cmds += fill_cmd(
-                                xa, y1 + y, z1 + z_max + 1,
-                                xb, y1 + y, z1 + r,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        # hollowing
-                        if spec.fill == "hollow":
-                            z_min_h, z_max_h = None, None
-                            for z in range(-r, r + 1):
-                                if y * y + z * z < (r - 1) * (r - 1):
-                                    if z_min_h is None:
-                                        z_min_h = z
-                                    z_max_h = z
-                            if z_min_h is not None:
-                                cmds += fill_cmd(
-                                    xa, y1 + y, z1 + z_min_h,
-                                    xb, y1 + y, z1 + z_max_h,
-                                    "minecraft:air", "replace",
-                                    "hollowing circle",
-                                    spec.explanation + ": trim inside incircle",
-                                )
-
-        elif axis == "y":
-            ya, yb = sorted([y1, y2])
-            cmds += fill_cmd(
-                x1 - spec.thickness, ya - 0, z1 - spec.thickness,
-                x1 + spec.thickness, yb + 0, z1 + spec.thickness,
-                spec.block, spec.mode, spec.reason, spec.explanation
-            )
-            if spec.shape == "circular":
-                r = spec.thickness
-                for x in range(-r, r + 1):
-                    z_min, z_max = None, None
-                    for z in range(-r, r + 1):
-                        if x * x + z * z <= r * r:
-                            if z_min is None:
-                                z_min = z
-                            z_max = z
-                    if z_min is not None:
-                        if z_min > -r:
-                            cmds += fill_cmd(
-                                x1 + x, ya, z1 - r,
-                                x1 + x, yb, z1 + z_min - 1,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        if z_max < r:
-                            cmds += fill_cmd(
-                                x1 + x, ya, z1 + z_max + 1,
-                                x1 + x, yb, z1 + r,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        if spec.fill == "hollow":
-                            z_min_h, z_max_h = None, None
-                            for z in range(-r, r + 1):
-                                if x * x + z * z < (r - 1) * (r - 1):
-                                    if z_min_h is None:
-                                        z_min_h = z
-                                    z_max_h = z
-                            if z_min_h is not None:
-                                cmds += fill_cmd(
-                                    x1 + x, ya, z1 + z_min_h,
-                                    x1 + x, yb, z1 + z_max_h,
-                                    "minecraft:air", "replace",
-                                    "hollowing circle",
-                                    spec.explanation + ": trim inside incircle",
-                                )
-
-        else:  # z-axis alignment
-            za, zb = sorted([z1, z2])
-            cmds += fill_cmd(
-                x1 - spec.thickness, y1 - spec.thickness, za - 0,
-                x1 + spec.thickness, y1 + spec.thickness, zb + 0,
-                spec.block, spec.mode, spec.reason, spec.explanation
-            )
-            if spec.shape == "circular":
-                r = spec.thickness
-                for x in range(-r, r + 1):
-                    y_min, y_max = None, None
-                    for y in range(-r, r + 1):
-                        if x * x + y * y <= r * r:
-                            if y_min is None:
-                                y_min = y
-                            y_max = y
-                    if y_min is not None:
-                        if y_min > -r:
-                            cmds += fill_cmd(
-                                x1 + x, y1 - r, za,
-                                x1 + x, y1 + y_min - 1, zb,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        if y_max < r:
-                            cmds += fill_cmd(
-                                x1 + x, y1 + y_max + 1, za,
-                                x1 + x, y1 + r, zb,
-                                "minecraft:air", "replace",
-                                "clearing circular corners",
-                                spec.explanation + ": trim outside incircle",
-                            )
-                        if spec.fill == "hollow":
-                            y_min_h, y_max_h = None, None
-                            for y in range(-r, r + 1):
-                                if x * x + y * y < (r - 1) * (r - 1):
-                                    if y_min_h is None:
-                                        y_min_h = y
-                                    y_max_h = y
-                            if y_min_h is not None:
-                                cmds += fill_cmd(
-                                    x1 + x, y1 + y_min_h, za,
-                                    x1 + x, y1 + y_max_h, zb,
-                                    "minecraft:air", "replace",
-                                    "hollowing circle",
-                                    spec.explanation + ": trim inside incircle",
-                                )
-        return cmds
-
-
-    # ---- GENERAL CASE: Arbitrary orientation ----
-    # fallback to layer-by-layer construction along best axis
-    length = abs_diffs[best_axis]
-    for i in range(length + 1):
-        t = i / max(length, 1)
-        cx = round(x1 + t * dx)
-        cy = round(y1 + t * dy)
-        cz = round(z1 + t * dz)
-
-        # Build full filled square cross-section first
-        cmds += fill_cmd(
-            cx - spec.thickness,
-            cy - spec.thickness,
-            cz - spec.thickness,
-            cx + spec.thickness,
-            cy + spec.thickness,
-            cz + spec.thickness,
-            spec.block,
-            spec.mode,
-            spec.reason,
-            spec.explanation,
-        )
-
-        # Trim to circle, if necessary
+                return "oblique circular beam, one fill per row of the disc at every staircase step of its swept volume"
+            return "oblique beam, one fill per staircase step of its swept volume"
         if spec.shape == "circular":
-            r = spec.thickness
-            if best_axis == 0:  # x-axis
-                for y in range(-r, r + 1):
-                    for z in range(-r, r + 1):
-                        if y * y + z * z > r * r:
-                            cmds += fill_cmd(
-                                cx, cy + y, cz + z,
-                                cx, cy + y, cz + z,
-                                "minecraft:air", "replace",
-                                "clearing circular edges",
-                                spec.explanation+": "+"trim outside incircle",
-                            )
-            elif best_axis == 1:  # y-axis
-                for x in range(-r, r + 1):
-                    for z in range(-r, r + 1):
-                        if x * x + z * z > r * r:
-                            cmds += fill_cmd(
-                                cx + x, cy, cz + z,
-                                cx + x, cy, cz + z,
-                                "minecraft:air", "replace",
-                                "clearing circular edges",
-                                spec.explanation+": "+"trim outside incircle",
-                            )
-            else:  # z-axis
-                for x in range(-r, r + 1):
-                    for y in range(-r, r + 1):
-                        if x * x + y * y > r * r:
-                            cmds += fill_cmd(
-                                cx + x, cy + y, cz,
-                                cx + x, cy + y, cz,
-                                "minecraft:air", "replace",
-                                "clearing circular edges",
-                                spec.explanation+": "+"trim outside incircle",
-                            )
-
-    return cmds
-
-def plane(spec: PlaneSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+            return "circular beam, air trims for every row of the cross-section"
+    if tool_name == "PlaneSpec":
+        return "inclined plane, one fill per staircase step of its slope"
+    if tool_name == "FillSpec":
+        return "fill over 32768 blocks, split into tiles"
+    if tool_name in ("SphereSpec", "EllipsoidSpec", "ConeSpec"):
+        return "large curved shape, one fill per row or slab of its voxels"
+    return "many commands"
+
+def cost_report(specs: List[Tuple[str, BaseModel]], origin: List[int] = [0, -60, 0], compile: bool = False, prune: bool = False,
+                transport: Optional[KeyboardTransport] = None, flag_threshold: int = 100, short: bool = False, relative: bool = False) -> dict:
     """
-    Builds a 1-block-thick inclined plane between two 3D points.
-    The plane is perpendicular to one of XY, YZ, or XZ coordinate planes.
-    Returns a list of /fill commands using the safer fill() wrapper.
+    Compiles the blueprint without entering anything and returns its typing cost:
+    totals for the commands that would be entered, and a per-tool-call and per-explanation breakdown
+    of the independently translated tool calls, with tool calls of at least flag_threshold commands flagged.
+    With short (or relative), commands are counted as short_command spells them, along with the characters saved.
     """
-
-    cmds = []
-
-    x1, y1, z1 = spec.start_coordinates
-    x2, y2, z2 = spec.end_coordinates
-    perp = spec.perpendicular_to.upper()
-
-    def fill_cmd(a, b, c, d, e, f, block, mode, reason, explanation):
-        return fill(
-            FillSpec(
-                reason=reason,
-                start_coordinates=[a, b, c],
-                end_coordinates=[d, e, f],
-                block=block,
-                block_states=spec.block_states,
-                mode=mode,
-                explanation=explanation,
-            ),
-            origin=origin,
-        )
-
-    # === Case 1: Plane perpendicular to XY (vertical sheet along Z) ===
-    if perp == "XY":
-        zmin, zmax = sorted([z1, z2])
-        # The plane’s shape in XY-space:
-        dx, dy = x2 - x1, y2 - y1
-        abs_dx, abs_dy = abs(dx), abs(dy)
-        best_axis = "x" if abs_dx >= abs_dy else "y"
-
-        # Iterate along best axis, fill lines along the other
-        steps = abs_dx if best_axis == "x" else abs_dy
-        for i in range(steps + 1):
-            t = i / max(steps, 1)
-            xi = round(x1 + t * dx)
-            yi = round(y1 + t * dy)
-            # Fill line along the other axis
-            if best_axis == "x":
-                # interpolate y and fill a line parallel to y at current x
-                cmds += fill_cmd(
-                    xi, yi, zmin,
-                    xi, yi, zmax,
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
-            else:
-                # interpolate x and fill a line parallel to x at current y
-                cmds += fill_cmd(
-                    xi, yi, zmin,
-                    xi, yi, zmax,
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
-
-    # === Case 2: Plane perpendicular to YZ (vertical sheet along X) ===
-    elif perp == "YZ":
-        xmin, xmax = sorted([x1, x2])
-        dy, dz = y2 - y1, z2 - z1
-        abs_dy, abs_dz = abs(dy), abs(dz)
-        best_axis = "y" if abs_dy >= abs_dz else "z"
-        steps = abs_dy if best_axis == "y" else abs_dz
-        for i in range(steps + 1):
-            t = i / max(steps, 1)
-            yi = round(y1 + t * dy)
-            zi = round(z1 + t * dz)
-            if best_axis == "y":
-                cmds += fill_cmd(
-                    xmin, yi, zi,
-                    xmax, yi, zi,
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
-            else:
-                cmds += fill_cmd(
-                    xmin, yi, zi,
-                    xmax, yi, zi,
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
-
-    # === Case 3: Plane perpendicular to XZ (horizontal or sloped sheet along Y) ===
-    elif perp == "XZ":
-        ymin, ymax = sorted([y1, y2])
-        dx, dz = x2 - x1, z2 - z1
-        abs_dx, abs_dz = abs(dx), abs(dz)
-        best_axis = "x" if abs_dx >= abs_dz else "z"
-        steps = abs_dx if best_axis == "x" else abs_dz
-        for i in range(steps + 1):
-            t = i / max(steps, 1)
-            xi = round(x1 + t * dx)
-            zi = round(z1 + t * dz)
-            if best_axis == "x":
-                cmds += fill_cmd(
-                    xi, ymin, min(z1, z2),
-                    xi, ymax, max(z1, z2),
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
-            else:
-                cmds += fill_cmd(
-                    min(x1, x2), ymin, zi,
-                    max(x1, x2), ymax, zi,
-                    spec.block, spec.mode, spec.reason, spec.explanation
-                )
+    transport = transport or KeyboardTransport()
+    spell = lambda cmds: [short_command(cmd, origin if relative else None) for cmd in cmds] if short or relative else cmds
+
+    calls, all_cmds = [], []
+    for index, (tool_name, spec) in enumerate(specs):
+        cmds = map_tools_to_wrappers[tool_name](spec, origin=origin)
+        all_cmds += cmds
+        cmds = spell(cmds)
+        calls.append({
+            "index": index,
+            "tool": tool_name,
+            "explanation": spec.explanation,
+            "commands": len(cmds),
+            "characters": sum(len(c) for c in cmds),
+            "seconds": transport.estimate_seconds(cmds)[1] - transport.counter_max,
+            "flag": flag_reason(tool_name, spec) if len(cmds) >= flag_threshold else None,
+        })
+
+    explanations = {}
+    for call in calls:
+        e = explanations.setdefault(call["explanation"], {"explanation": call["explanation"], "tool_calls": 0, "commands": 0, "characters": 0, "seconds": 0.0})
+        e["tool_calls"] += 1
+        for k in ("commands", "characters", "seconds"):
+            e[k] += call[k]
+
+    if compile:
+        all_cmds = [cmd for _, cmd in compile_commands(specs, origin=origin)]
+    elif prune:
+        all_cmds = [cmd for cmd in prune_occluded(all_cmds) if cmd is not None]
+    full_characters = sum(len(c) for c in all_cmds)
+    all_cmds = spell(all_cmds)
+    if relative:
+        all_cmds.insert(0, f"tp @s {origin[0]} {origin[1]} {origin[2]}")
+    best, expected, worst = transport.estimate_seconds(all_cmds)
+
+    return {
+        "compiled": compile,
+        "pruned": prune and not compile,
+        "commands": len(all_cmds),
+        "characters": sum(len(c) for c in all_cmds),
+        "characters_saved": full_characters - sum(len(c) for c in all_cmds),
+        "seconds": {"best": best, "expected": expected, "worst": worst},
+        "tool_calls": calls,
+        "explanations": sorted(explanations.values(), key=lambda e: -e["characters"]),
+        "flagged": [call for call in calls if call["flag"]],
+    }
+
+def diff_report(old_filename: str, new_filename: str, origin: List[int] = [0, -60, 0], transport: Optional[KeyboardTransport] = None,
+                cache_dir: Optional[str] = None) -> dict:
+    """
+    Typing cost of the commands turning the result of one blueprint into another's, next to that of building the new one from scratch.
+    """
+    transport = transport or KeyboardTransport()
+    diff = [cmd for _, _, cmd in compile_diff(old_filename, new_filename, cache_dir=cache_dir).commands(origin)]
+    full = [cmd for _, _, cmd in compile_blueprint(new_filename, cache_dir=cache_dir).commands(origin)]
+    return {
+        "commands": len(diff),
+        "characters": sum(len(c) for c in diff),
+        "seconds": transport.estimate_seconds(diff)[1],
+        "full_commands": len(full),
+        "full_characters": sum(len(c) for c in full),
+        "full_seconds": transport.estimate_seconds(full)[1],
+    }
+
+def print_cost_report(report: dict, top: int = 10):
+    seconds = report["seconds"]
+    print(f"Commands: {report['commands']:,}" + (" (compiled)" if report["compiled"] else " (pruned)" if report["pruned"] else ""))
+    print(f"Characters to type: {report['characters']:,}")
+    if report["characters_saved"]:
+        full = report["characters"] + report["characters_saved"]
+        print(f"Characters saved by shortening: {report['characters_saved']:,} of {full:,} ({100 * report['characters_saved'] / full:.1f}%)")
+    print(f"Estimated typing time: {format_duration(seconds['expected'])} (between {format_duration(seconds['best'])} and {format_duration(seconds['worst'])}, excluding keystroke overhead)")
+
+    total = max(1, sum(call["characters"] for call in report["tool_calls"]))
+    print(f"\nTop {top} explanations by characters:")
+    for e in report["explanations"][:top]:
+        print(f"  {e['explanation']!r}: {e['tool_calls']} tool call(s), {e['commands']:,} commands, {e['characters']:,} characters ({100 * e['characters'] / total:.1f}%), ~{format_duration(e['seconds'])}")
+
+    print(f"\nTop {top} tool calls by characters:")
+    for call in sorted(report["tool_calls"], key=lambda c: -c["characters"])[:top]:
+        print(f"  #{call['index']} {call['tool']} {call['explanation']!r}: {call['commands']:,} commands, {call['characters']:,} characters ({100 * call['characters'] / total:.1f}%), ~{format_duration(call['seconds'])}")
+
+    if report["flagged"]:
+        print(f"\nFlagged {len(report['flagged'])} tool call(s):")
+        for call in report["flagged"]:
+            print(f"  #{call['index']} {call['tool']} {call['explanation']!r}: {call['commands']:,} commands - {call['flag']}")
+
+def analysis_report(specs: List[Tuple[str, BaseModel]], origin: List[int] = [0, -60, 0], memmap_dir: Optional[str] = None) -> dict:
+    """
+    Evaluates every tool call, in order, into a SectionStore and reports on the result without compiling or entering anything:
+    its bounding box (air excluded) and block counts, the tool calls placing blocks below the origin in any coordinate
+    (blueprint coordinates must be non-negative; air trims do not count), and the overflow hotspots: tool calls whose fills tile
+    a box over MAX_FILL_VOLUME, i.e. that fill() or greedy_boxes split into tiles, or that Minecraft would reject, the largest first.
+    """
+    negative, overflows = [], []
+    with SectionStore(memmap_dir) as store:
+        for index, (tool_name, spec) in enumerate(specs):
+            fills = [f for f in map(Fill.parse, map_tools_to_wrappers[tool_name](spec, origin=origin)) if f is not None]
+            if not fills:
+                continue
+            below = sum(f.volume - math.prod(max(0, h - max(l, o) + 1) for l, h, o in zip(f[:3], f[3:6], origin)) for f in fills if not is_air(f.block))
+            if below:
+                negative.append({"index": index, "tool": tool_name, "explanation": spec.explanation, "blocks": int(below)})
+
+            box, tiles = max(tile_groups(fills), key=lambda group: group[0].volume)
+            if tool_name == "FillSpec": # an outline over the limit is filled as its shell, which is no single box
+                corners = [sorted(c + o for c in pair) for pair, o in zip(zip(spec.start_coordinates, spec.end_coordinates), origin)]
+                box, tiles = Fill(*(lo for lo, _ in corners), *(hi for _, hi in corners), fills[0].block, spec.mode), len(fills)
+            if box.volume > MAX_FILL_VOLUME:
+                overflows.append({"index": index, "tool": tool_name, "explanation": spec.explanation, "volume": box.volume,
+                                  "lo": list(box[:3]), "hi": list(box[3:6]), "commands": len(fills), "split": tiles > 1})
+            for f in fills:
+                store.apply(f)
+
+        counts = store.counts()
+        bounds = store.bounds()
+        return {
+            "tool_calls": len(specs),
+            "bounds": None if bounds is None else {"lo": list(bounds[0]), "hi": list(bounds[1]), "size": [h - l + 1 for l, h in zip(*bounds)]},
+            "blocks": sum(n for block, n in counts.items() if block != AIR),
+            "block_counts": dict(sorted(counts.items(), key=lambda item: -item[1])),
+            "sections": len(store.sections),
+            "store_bytes": store.nbytes,
+            "negative": negative,
+            "overflows": sorted(overflows, key=lambda o: -o["volume"]),
+        }
+
+def print_analysis_report(report: dict, top: int = 10):
+    bounds = report["bounds"]
+    print(f"Tool calls: {report['tool_calls']:,}")
+    if bounds is None:
+        print("Bounding box: empty")
     else:
-        raise ValueError(f"Invalid 'perpendicular_to' value: {perp}")
-
-    return cmds
+        print(f"Bounding box: {tuple(bounds['lo'])} to {tuple(bounds['hi'])}, {' x '.join(str(d) for d in bounds['size'])}")
+    print(f"Blocks: {report['blocks']:,} in {report['sections']:,} sections, stored in {report['store_bytes'] / 2**20:.1f} MiB")
 
+    print(f"\nTop {top} blocks by count:")
+    for block, n in list(report["block_counts"].items())[:top]:
+        print(f"  {block}: {n:,}")
 
+    if report["negative"]:
+        print(f"\n{len(report['negative'])} tool call(s) place blocks below the origin:")
+        for call in report["negative"][:top]:
+            print(f"  #{call['index']} {call['tool']} {call['explanation']!r}: {call['blocks']:,} blocks")
 
+    if report["overflows"]:
+        print(f"\n{len(report['overflows'])} tool call(s) exceed the {MAX_FILL_VOLUME:,} block fill limit:")
+        for call in report["overflows"][:top]:
+            how = f"split into {call['commands']:,} fills" if call["split"] else "rejected by Minecraft"
+            print(f"  #{call['index']} {call['tool']} {call['explanation']!r}: {call['volume']:,} blocks from {tuple(call['lo'])} to {tuple(call['hi'])}, {how}")
 
-map_tools_to_wrappers = {
-    "FillSpec": fill,
-    "BeamSpec": beam,
-    "PlaneSpec": plane
-}
-
-def enter_commands(filename, min_typing_speed=0.001, delay=0.2, counter_max=10, origin=[0, -60, 0], start_index=0):
+def enter_commands(filename, min_typing_speed=0.001, delay=0.2, counter_max=10, origin=[0, -60, 0], start_index=0, compile=False, transport=None, prune=False, cache_dir=None, journal_path=None, resume=False, recorder=None, schedule=False, region_size=4, chunk_loading="forceload", short=False, relative=False, diff_from=None):
     '''
-    To enter commands into the Minecraft console
+    To enter commands into the Minecraft console (or send them through another transport)
     '''
     
-    print("Please make Minecraft the active window, with the console active and blank.")
-    for i in range(counter_max):
-        print(f"Countdown: {counter_max-i} s", end=" \r")
-        time.sleep(1)
-
-    keyboard = Controller()
-
-    # read commands from JSON
-    with open(filename, "r") as file:
-        data = json.load(file)
-        tool_calls = data.get("tool_calls", [])
-
+    # read commands from JSON (or the compile cache), or only those turning the result of diff_from into this blueprint's
+    if diff_from:
+        compiled = compile_diff(diff_from, filename, cache_dir=cache_dir)
+    else:
+        compiled = compile_blueprint(filename, compile=compile, prune=prune, cache_dir=cache_dir)
+    total = len(compiled)
+    commands_from = lambda start: compiled.commands(origin, start=start)
+
+    # reorder chunk region by chunk region, keeping the terrain loaded (deterministic, so indices stay valid for resuming)
+    if schedule and chunk_loading == "tp" and isinstance(transport, (RconTransport, ParallelRconTransport)):
+        raise ValueError("Teleporting to load chunks needs a player, and RCON commands have none; use chunk_loading='forceload'.")
+    if schedule:
+        scheduled = schedule_commands(((label, cmd) for _, label, cmd in compiled.commands(origin)), region_size=region_size, chunk_loading=chunk_loading)
+        total = len(scheduled)
+        commands_from = lambda start: ((i, label, cmd) for i, (label, cmd) in enumerate(scheduled[start:], start + 1))
+
+    # spell every command as briefly as possible, with coordinates relative to the origin after teleporting there
+    if relative and schedule and chunk_loading == "tp":
+        raise ValueError("Relative coordinates need the player to stay at the origin, which --chunk_loading tp does not.")
+    if short or relative:
+        relative_to, full_commands_from = (origin if relative else None), commands_from
+        commands_from = lambda start: ((i, label, short_command(cmd, relative_to)) for i, label, cmd in full_commands_from(start))
+
+    # skip straight to the first command that is not confirmed yet
+    start = max(start_index - 1, 0)
+    journal = Journal(journal_path) if journal_path else None
+    if journal and resume:
+        last = journal.last()
+        if last is not None:
+            index, digest = last
+            confirmed = next(commands_from(index - 1), None)
+            if confirmed is None or command_digest(confirmed[2]) != digest:
+                raise ValueError(f"Journal {journal_path} does not match this blueprint, origin and options; cannot resume.")
+            start = index
+            print(f"Resuming after command {index} of {total}.")
+    elif journal:
+        journal.reset()
+
+    commands = commands_from(start)
+    if relative: # repeated on every run, resumed or not, so it is not journaled
+        commands = itertools.chain([(0, "teleport to origin (relative coordinates)", f"tp @s {origin[0]} {origin[1]} {origin[2]}")], commands)
+
+    if transport is None:
+        transport = KeyboardTransport(min_typing_speed=min_typing_speed, delay=delay, counter_max=counter_max)
+
+    entered = recorder.run(transport, commands) if recorder else transport.run(commands)
+    if journal is None:
+        for _ in entered:
+            pass
+        return
+    with journal:
+        for i, cmd, _ in entered:
+            if i:
+                journal.append(i, cmd)
+
+def enter_stream(specs: Iterable[Tuple[str, BaseModel]], transport, origin: List[int] = [0, -60, 0], queue_size: int = 1024, recorder=None) -> int:
+    """
+    Enters the commands of tool calls while they are still being produced (e.g. streamed from an LLM):
+    a background thread translates each (tool name, spec) through map_tools_to_wrappers into a bounded queue
+    drained by the transport, and blocks whenever the transport falls queue_size commands behind.
+    Returns the number of commands entered.
+    """
+    done = object()
+    pending = queue.Queue(maxsize=queue_size)
+
+    def produce():
+        try:
+            for label, cmd in generate_commands(specs, origin=origin):
+                pending.put((label, cmd))
+        except BaseException as e:
+            pending.put(e)
+            return
+        pending.put(done)
+
+    def consume() -> Iterator[Tuple[int, str, str]]:
         i = 0
-        for tool_call in tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            spec = eval(tool_name)(**tool_args)
-            cmds = map_tools_to_wrappers[tool_name](spec, origin=origin)
-            
-            for cmd in cmds:
-                i += 1
-                if i<start_index:
-                    print()
-                    continue
-                print(f"[{i}] {spec.explanation} ({tool_name}): ", end="", flush=True)
-
-                keyboard.press('/')
-                time.sleep(min_typing_speed*(1+random.random()))
-                keyboard.release('/')
-
-                # type command
-                for char in cmd:
-                    keyboard.type(char)
-                    print(char, end="", flush=True)
-                    time.sleep(min_typing_speed*(1+random.random())) # just in case there is some kind of captcha
-                
-                # enter
-                print()
-                keyboard.type('\n')
-                time.sleep(min_typing_speed*(1+random.random()))
-
-                time.sleep(delay*(1+random.random()))
-
-                # open chat
-                keyboard.press('t')
-                time.sleep(min_typing_speed*(1+random.random()))
-                keyboard.release('t')
-
-                time.sleep(delay*(1+random.random()))
+        while True:
+            item = pending.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            i += 1
+            yield i, *item
+
+    threading.Thread(target=produce, daemon=True).start()
+    n = 0
+    for _ in (recorder.run(transport, consume()) if recorder else transport.run(consume())):
+        n += 1
+    return n
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Load JSON blueprint and create+enter commands into Minecraft console.")
-    parser.add_argument("--blueprint_path", required=True, help="Path to the JSON blueprint.")
+    parser.add_argument("--blueprint_path", default=None, help="Path to the JSON blueprint.")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), default=None,
+                        help="Instead of a whole blueprint, enter only the commands turning the built result of blueprint OLD into that of NEW: merged cuboids of the changed cells, air where cells were removed.")
     parser.add_argument("--origin", nargs=3, type=int, required=True, metavar=("X", "Y", "Z"),
                         help="Origin coordinates (3 space-separated integers) where the construction should start.")
-    parser.add_argument("--min_typing_speed", type=float, default=0.0005,
-                        help="Minimum typing speed (seconds per character).")
-    parser.add_argument("--delay", type=float, default=0.1,
-                        help="Delay between commands (seconds).")
-    parser.add_argument("--counter_max", type=int, default=20,
-                        help="Number of seconds to count down before starting, to allow for switching to Minecraft window.")
     parser.add_argument("--start_index", type=int, default=0,
                         help="Specify command index to resume a cancelled run. Command index is not necessarily the index of the tool call in the JSON.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run after the last command recorded in the progress journal.")
+    parser.add_argument("--journal_path", type=str, default=None,
+                        help="Progress journal of submitted commands (default: <blueprint_path>.journal).")
+    parser.add_argument("--compile", action="store_true",
+                        help="Rasterize the whole blueprint and enter a minimal set of merged /fill cuboids for the final result, instead of translating each tool call independently.")
+
+    parser.add_argument("--prune", action="store_true",
+                        help="Drop or shrink commands whose effect is entirely overwritten by later commands (keeps blueprint order and the final result).")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR,
+                        help="Directory caching compiled blueprints, keyed by blueprint contents and compiler version.")
+    parser.add_argument("--no_cache", action="store_true", help="Always recompile the blueprint.")
+    parser.add_argument("--emit", nargs=2, metavar=("FORMAT", "PATH"), default=None,
+                        help="Export instead of typing. Formats: 'datapack' (PATH is the world folder; run the build with a single /function call), 'structure' (gzipped .nbt structure template) or 'schem' (Sponge schematic v2).")
+    parser.add_argument("--commands_per_tick", type=int, default=MAX_COMMAND_CHAIN_LENGTH - 1,
+                        help="Maximum number of commands per datapack function, each run on its own tick (keep below the maxCommandChainLength gamerule).")
+
+    add_transport_arguments(parser)
+
+    parser.add_argument("--schedule", action="store_true",
+                        help="Reorder commands chunk region by chunk region (keeping overlapping commands in order) and keep the terrain they touch loaded.")
+    parser.add_argument("--region_size", type=int, default=4,
+                        help="With --schedule, side of the square chunk regions commands are grouped by, in chunks.")
+    parser.add_argument("--chunk_loading", choices=CHUNK_LOADING, default="forceload",
+                        help="With --schedule, how terrain is loaded: /forceload only the chunks of the current region, /tp the player above it (keyboard transport only), or nothing.")
+
+    parser.add_argument("--short", action="store_true",
+                        help="Type the shortest equivalent text of each command: no minecraft: namespace, no default replace mode.")
+    parser.add_argument("--relative", action="store_true",
+                        help="Like --short, with coordinates relative to the origin after a /tp there (keyboard transport only; stay put, e.g. flying in creative).")
+
+    parser.add_argument("--metrics_path", type=str, default=None,
+                        help="Append structured per-command, per-tool-call and throughput metrics to this JSON Lines file.")
+    parser.add_argument("--trace_path", type=str, default=None,
+                        help="Write a Chrome trace of the run (open in chrome://tracing or ui.perfetto.dev).")
+    parser.add_argument("--throughput_interval", type=float, default=10.0,
+                        help="With --metrics_path or --trace_path, seconds between throughput samples.")
+
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Compile the blueprint and report command count, characters and estimated typing time without entering anything.")
+    parser.add_argument("--report_path", type=str, default=None,
+                        help="With --dry-run or --analyze, also save the full report as JSON.")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Evaluate the blueprint into a compressed voxel store and report its bounding box, block counts, blocks below the origin and fills over the block limit, without entering anything.")
+    parser.add_argument("--memmap_dir", type=str, default=None,
+                        help="With --analyze, keep the voxel store's packed sections in a memory-mapped temporary file in this directory instead of in memory.")
 
     args = parser.parse_args()
-
-    enter_commands(filename=args.blueprint_path, min_typing_speed=args.min_typing_speed, delay=args.delay, counter_max=args.counter_max, origin=args.origin, start_index=args.start_index)
\ No newline at end of file
+    cache_dir = None if args.no_cache else args.cache_dir
+    diff_from = None
+    if args.diff:
+        diff_from, args.blueprint_path = args.diff
+    elif not args.blueprint_path:
+        parser.error("--blueprint_path is required (or --diff OLD NEW)")
+
+    if args.analyze:
+        report = analysis_report(load_specs(args.blueprint_path), origin=args.origin, memmap_dir=args.memmap_dir)
+        print_analysis_report(report)
+        if args.report_path:
+            with open(args.report_path, "w") as f:
+                json.dump(report, f, indent=4)
+        sys.exit(0)
+
+    if args.dry_run and diff_from:
+        keyboard_transport = KeyboardTransport(min_typing_speed=args.min_typing_speed, delay=args.delay, counter_max=args.counter_max, injection=args.injection)
+        report = diff_report(diff_from, args.blueprint_path, origin=args.origin, transport=keyboard_transport, cache_dir=cache_dir)
+        print(f"Commands: {report['commands']:,} (diff), instead of {report['full_commands']:,} for the whole blueprint")
+        print(f"Characters to type: {report['characters']:,}, instead of {report['full_characters']:,}")
+        print(f"Estimated typing time: {format_duration(report['seconds'])}, instead of {format_duration(report['full_seconds'])}")
+        if args.report_path:
+            with open(args.report_path, "w") as f:
+                json.dump(report, f, indent=4)
+        sys.exit(0)
+
+    if args.dry_run:
+        keyboard_transport = KeyboardTransport(min_typing_speed=args.min_typing_speed, delay=args.delay, counter_max=args.counter_max, injection=args.injection)
+        report = cost_report(load_specs(args.blueprint_path), origin=args.origin, compile=args.compile, prune=args.prune, transport=keyboard_transport,
+                             short=args.short, relative=args.relative)
+        print_cost_report(report)
+        if args.report_path:
+            with open(args.report_path, "w") as f:
+                json.dump(report, f, indent=4)
+        sys.exit(0)
+
+    if args.emit:
+        fmt, path = args.emit
+        if diff_from and fmt != "datapack":
+            parser.error("--diff can only be exported as a datapack")
+        if diff_from:
+            compiled = compile_diff(diff_from, args.blueprint_path, cache_dir=cache_dir)
+        else:
+            compiled = compile_blueprint(args.blueprint_path, compile=args.compile, prune=args.prune, cache_dir=cache_dir)
+        commands = (cmd for _, _, cmd in compiled.commands(args.origin))
+        if fmt == "datapack":
+            name = function_name(args.blueprint_path)
+            paths = write_datapack(commands, path, name, commands_per_tick=args.commands_per_tick)
+            print(f"Wrote {len(paths) - 1} function(s) to {os.path.dirname(paths[0])}. In Minecraft, run /reload then /function vibecraft:{name}")
+        elif fmt in ("structure", "schem"):
+            grid = rasterize(load_specs(args.blueprint_path), origin=args.origin)
+            if fmt == "structure":
+                write_structure(grid, path)
+                print(f"Wrote {path}. Place it with its minimum corner at {' '.join(map(str, grid.lo))}, e.g. /place template <id> {' '.join(map(str, grid.lo))}")
+            else:
+                write_schematic(grid, path)
+                print(f"Wrote {path} (offset {' '.join(map(str, grid.lo))}).")
+        else:
+            parser.error(f"unknown --emit format: {fmt}")
+        sys.exit(0)
+
+    if args.schedule and args.chunk_loading == "tp" and args.transport != "keyboard":
+        parser.error("--chunk_loading tp needs the keyboard transport: RCON commands have no player to teleport, use --chunk_loading forceload.")
+    if args.relative and args.transport != "keyboard":
+        parser.error("--relative needs the keyboard transport: RCON commands run at the server's position, not the player's.")
+    transport = make_transport(args)
+    recorder = make_recorder(args.metrics_path, args.trace_path, throughput_interval=args.throughput_interval)
+
+    try:
+        enter_commands(filename=args.blueprint_path, min_typing_speed=args.min_typing_speed, delay=args.delay, counter_max=args.counter_max, origin=args.origin, start_index=args.start_index, compile=args.compile, transport=transport, prune=args.prune, cache_dir=cache_dir, journal_path=args.journal_path or args.blueprint_path + (".diff.journal" if diff_from else ".journal"), resume=args.resume, recorder=recorder,
+                       schedule=args.schedule, region_size=args.region_size, chunk_loading=args.chunk_loading, short=args.short, relative=args.relative, diff_from=diff_from)
+    finally:
+        if recorder:
+            recorder.close()
@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from voxels import Fill
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vibecraft")
+
+def blueprint_key(filename: str, compiler_version: int, **options) -> str:
+    """
+    Content address of a compilation: hash of the blueprint bytes, the compiler version and the compile options.
+    """
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    h.update(json.dumps({"compiler_version": compiler_version, **options}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class CompiledBlueprint:
+    """
+    Compiled /fill commands in origin-independent form: an (N, 6) array of corners relative to origin (0, 0, 0)
+    plus per-command indices into block, mode and label palettes.
+    """
+
+    def __init__(self, boxes: np.ndarray, blocks: np.ndarray, modes: np.ndarray, labels: np.ndarray,
+                 block_names: List[str], mode_names: List[str], label_names: List[str]):
+        self.boxes = boxes
+        self.blocks = blocks
+        self.modes = modes
+        self.labels = labels
+        self.block_names = block_names
+        self.mode_names = mode_names
+        self.label_names = label_names
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    @classmethod
+    def from_commands(cls, commands: Iterable[Tuple[str, str]]) -> "CompiledBlueprint":
+        """
+        Packs (label, command) pairs, compiled at origin (0, 0, 0), into arrays.
+        """
+        palettes = ({}, {}, {})
+        boxes, indices = [], []
+        for label, cmd in commands:
+            f = Fill.parse(cmd)
+            if f is None:
+                raise ValueError(f"Only plain /fill commands can be compiled, got: {cmd}")
+            boxes.append(f[:6])
+            indices.append([p.setdefault(name, len(p)) for p, name in zip(palettes, (f.block, f.mode, label))])
+        boxes = np.array(boxes, dtype=np.int32).reshape(-1, 6)
+        indices = np.array(indices, dtype=np.int32).reshape(-1, 3)
+        return cls(boxes, indices[:, 0].copy(), indices[:, 1].astype(np.uint8), indices[:, 2].copy(), *(list(p) for p in palettes))
+
+    def save(self, cache_dir: str, key: str):
+        """
+        Writes the arrays to <cache_dir>/<key>/, atomically.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        final = os.path.join(cache_dir, key)
+        tmp = f"{final}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in ("boxes", "blocks", "modes", "labels"):
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"blocks": self.block_names, "modes": self.mode_names, "labels": self.label_names}, f)
+        try:
+            os.replace(tmp, final)
+        except OSError: # another process cached the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def load(cls, cache_dir: str, key: str) -> Optional["CompiledBlueprint"]:
+        """
+        Memory-maps a cached compilation, or returns None on a cache miss.
+        """
+        path = os.path.join(cache_dir, key)
+        try:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                meta = json.load(f)
+            arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ("boxes", "blocks", "modes", "labels")]
+        except (OSError, ValueError):
+            return None
+        return cls(*arrays, meta["blocks"], meta["modes"], meta["labels"])
+
+    def commands(self, origin: List[int], start: int = 0, chunk: int = 4096) -> Iterator[Tuple[int, str, str]]:
+        """
+        Yields (index, label, command) from 0-based position start on, with 1-based indices,
+        translating each chunk of boxes to origin at once. Earlier commands are never read.
+        """
+        offset = np.array(list(origin) * 2, dtype=np.int64)
+        for s in range(start, len(self), chunk):
+            boxes = (self.boxes[s:s + chunk] + offset).tolist()
+            rows = zip(boxes, self.blocks[s:s + chunk].tolist(), self.modes[s:s + chunk].tolist(), self.labels[s:s + chunk].tolist())
+            for j, ((x1, y1, z1, x2, y2, z2), block, mode, label) in enumerate(rows):
+                yield s + j + 1, self.label_names[label], f"fill {x1} {y1} {z1} {x2} {y2} {z2} {self.block_names[block]} {self.mode_names[mode]}"
@@ -0,0 +1,595 @@
+import json
+import functools
+
+import numpy as np
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+from tools import *
+from voxels import MAX_FILL_VOLUME, Fill, VoxelGrid, diff_cuboids, greedy_boxes, prune_occluded, shell_slabs, tile_box
+from cache import CompiledBlueprint, blueprint_key
+from kernels import cone_mask, cross_section, disc_spans, ellipsoid_mask, shell
+
+COMPILER_VERSION = 4 # bump whenever the wrappers' output changes, to invalidate cached compilations
+DEFAULT_NAMESPACE = "minecraft:"
+
+def fill(spec: FillSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Wrapper for FillSpec.
+    Converts origin + translated coordinates + block states into a proper MC /fill command
+    """
+
+    # offset coordinates to MC coordinate system
+    x1 = spec.start_coordinates[0] + origin[0]
+    y1 = spec.start_coordinates[1] + origin[1]
+    z1 = spec.start_coordinates[2] + origin[2]
+    x2 = spec.end_coordinates[0] + origin[0]
+    y2 = spec.end_coordinates[1] + origin[1]
+    z2 = spec.end_coordinates[2] + origin[2]
+
+    block_str = spec.block
+
+    # in case of wrong block_states format
+    if spec.block_states:
+        bs = spec.block_states
+        if isinstance(bs, str):
+            bs = bs.strip().strip("[]")
+            parts = [p.strip() for p in bs.split(",") if p.strip()]
+            bs_dict = {}
+            for p in parts:
+                if "=" in p:
+                    k, v = p.split("=", 1)
+                    bs_dict[k.strip()] = v.strip()
+            bs = bs_dict
+
+        if isinstance(bs, dict) and bs:
+            block_str += "[" + ",".join(f"{k}={v}" for k, v in bs.items()) + "]"
+
+    # split fills over Minecraft's block limit into the fewest tiles under it
+    lo = (min(x1, x2), min(y1, y2), min(z1, z2))
+    hi = (max(x1, x2), max(y1, y2), max(z1, z2))
+    volume = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+    if volume > MAX_FILL_VOLUME:
+        parts = [(block_str, spec.mode, (*lo, *hi))]
+        if spec.mode in ("outline", "hollow"): # the limit counts the whole region, so fill just the shell, which both replace entirely
+            parts = [(block_str, "replace", box) for box in shell_slabs(lo, hi)]
+            if spec.mode == "hollow" and all(b - a >= 2 for a, b in zip(lo, hi)): # and hollow replaces the inside with air
+                parts.append(("minecraft:air", "replace", (lo[0] + 1, lo[1] + 1, lo[2] + 1, hi[0] - 1, hi[1] - 1, hi[2] - 1)))
+        return [f"fill {xa} {ya} {za} {xb} {yb} {zb} {block} {mode}"
+                for block, mode, box in parts for xa, ya, za, xb, yb, zb in tile_box(box[:3], box[3:])]
+
+    cmd = f"fill {x1} {y1} {z1} {x2} {y2} {z2} {block_str} {spec.mode}"
+    return [cmd]
+
+def beam(spec: BeamSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Builds a beam (square or circular cross-section) between two 3D points.
+    Optimized for axis-aligned beams using bulk /fill operations.
+    """
+
+    cmds = []
+
+    x1, y1, z1 = spec.start_coordinates
+    x2, y2, z2 = spec.end_coordinates
+    dx, dy, dz = x2 - x1, y2 - y1, z2 - z1
+
+    abs_diffs = [abs(dx), abs(dy), abs(dz)]
+
+    best_axis = 1
+
+    if hasattr(spec, "direction"):
+        if spec.direction == "XY" or spec.direction == "Z":
+            best_axis = 2
+        elif spec.direction == "YZ" or spec.direction == "X":
+            best_axis = 0
+        else:  # "XZ"
+            best_axis = 1
+    else:
+        best_axis = abs_diffs.index(max(abs_diffs))
+        if dx == 0 and dy == 0 and dz == 0: # special case: 1-block-thick with no direction specified should default to horizontal where it is most commonly used
+            best_axis = 1
+
+    def fill_cmd(xa, ya, za, xb, yb, zb, block, mode, reason, explanation):
+        return fill(
+            FillSpec(
+                reason=reason,
+                start_coordinates=[xa, ya, za],
+                end_coordinates=[xb, yb, zb],
+                block=block,
+                block_states=spec.block_states,
+                mode=mode,
+                explanation=explanation,
+            ),
+            origin=origin,
+        )
+
+    # ---- OPTIMIZATION: Axis-aligned beam ----
+    if (
+        (x1 == x2 and y1 == y2) or
+        (x1 == x2 and z1 == z2) or
+        (y1 == y2 and z1 == z2)
+    ):
+        # Determine the constant axes and the axis of alignment
+        if best_axis == 0:
+            axis = "x"
+        elif best_axis == 1:
+            axis = "y"
+        else:
+            axis = "z"
+
+        # Define the full bounding cuboid
+        if axis == "x":
+            xa, xb = sorted([x1, x2])
+            cmds += fill_cmd(
+                xa - 0, y1 - spec.thickness, z1 - spec.thickness,
+                xb + 0, y1 + spec.thickness, z1 + spec.thickness,
+                spec.block, spec.mode, spec.reason, spec.explanation
+            )
+            if spec.shape == "circular":
+                r = spec.thickness
+                for y, (z_min, z_max), inner in disc_spans(r):
+                    # clear outside both sides
+                    if z_min > -r:
+                        cmds += fill_cmd(
+                            xa, y1 + y, z1 - r,
+                            xb, y1 + y, z1 + z_min - 1,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    if z_max < r:
+                        cmds += fill_cmd(
+                            xa, y1 + y, z1 + z_max + 1,
+                            xb, y1 + y, z1 + r,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    # hollowing
+                    if spec.fill == "hollow" and inner is not None:
+                        z_min_h, z_max_h = inner
+                        cmds += fill_cmd(
+                            xa, y1 + y, z1 + z_min_h,
+                            xb, y1 + y, z1 + z_max_h,
+                            "minecraft:air", "replace",
+                            "hollowing circle",
+                            spec.explanation + ": trim inside incircle",
+                        )
+
+        elif axis == "y":
+            ya, yb = sorted([y1, y2])
+            cmds += fill_cmd(
+                x1 - spec.thickness, ya - 0, z1 - spec.thickness,
+                x1 + spec.thickness, yb + 0, z1 + spec.thickness,
+                spec.block, spec.mode, spec.reason, spec.explanation
+            )
+            if spec.shape == "circular":
+                r = spec.thickness
+                for x, (z_min, z_max), inner in disc_spans(r):
+                    if z_min > -r:
+                        cmds += fill_cmd(
+                            x1 + x, ya, z1 - r,
+                            x1 + x, yb, z1 + z_min - 1,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    if z_max < r:
+                        cmds += fill_cmd(
+                            x1 + x, ya, z1 + z_max + 1,
+                            x1 + x, yb, z1 + r,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    if spec.fill == "hollow" and inner is not None:
+                        z_min_h, z_max_h = inner
+                        cmds += fill_cmd(
+                            x1 + x, ya, z1 + z_min_h,
+                            x1 + x, yb, z1 + z_max_h,
+                            "minecraft:air", "replace",
+                            "hollowing circle",
+                            spec.explanation + ": trim inside incircle",
+                        )
+
+        else:  # z-axis alignment
+            za, zb = sorted([z1, z2])
+            cmds += fill_cmd(
+                x1 - spec.thickness, y1 - spec.thickness, za - 0,
+                x1 + spec.thickness, y1 + spec.thickness, zb + 0,
+                spec.block, spec.mode, spec.reason, spec.explanation
+            )
+            if spec.shape == "circular":
+                r = spec.thickness
+                for x, (y_min, y_max), inner in disc_spans(r):
+                    if y_min > -r:
+                        cmds += fill_cmd(
+                            x1 + x, y1 - r, za,
+                            x1 + x, y1 + y_min - 1, zb,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    if y_max < r:
+                        cmds += fill_cmd(
+                            x1 + x, y1 + y_max + 1, za,
+                            x1 + x, y1 + r, zb,
+                            "minecraft:air", "replace",
+                            "clearing circular corners",
+                            spec.explanation + ": trim outside incircle",
+                        )
+                    if spec.fill == "hollow" and inner is not None:
+                        y_min_h, y_max_h = inner
+                        cmds += fill_cmd(
+                            x1 + x, y1 + y_min_h, za,
+                            x1 + x, y1 + y_max_h, zb,
+                            "minecraft:air", "replace",
+                            "hollowing circle",
+                            spec.explanation + ": trim inside incircle",
+                        )
+        return cmds
+
+
+    # ---- GENERAL CASE: Arbitrary orientation ----
+    # rasterize the exact swept volume once: one cross-section (in the direction plane) per step along the
+    # dominant axis, so consecutive sections always touch, then emit it as maximal row/slab spans
+    r = spec.thickness
+    length = max(abs_diffs)
+    centers = []
+    for i in range(length + 1):
+        t = i / max(length, 1)
+        centers.append((round(x1 + t * dx), round(y1 + t * dy), round(z1 + t * dz)))
+
+    lo = [min(c[a] for c in centers) - (0 if a == best_axis else r) for a in range(3)]
+    hi = [max(c[a] for c in centers) + (0 if a == best_axis else r) for a in range(3)]
+    solid = np.zeros([b - a + 1 for a, b in zip(lo, hi)], dtype=bool)
+    section = cross_section(r, spec.shape, spec.fill == "hollow")
+    for c in centers:
+        idx = [slice(c[a] - lo[a] - r, c[a] - lo[a] + r + 1) for a in range(3)]
+        idx[best_axis] = c[best_axis] - lo[best_axis]
+        solid[tuple(idx)] |= section
+
+    mode = spec.mode
+    if mode == "outline": # only the outer shell of the swept solid
+        solid = shell(solid)
+        mode = "replace"
+
+    for xa, ya, za, xb, yb, zb in greedy_boxes(solid):
+        cmds += fill_cmd(
+            xa + lo[0], ya + lo[1], za + lo[2],
+            xb + lo[0], yb + lo[1], zb + lo[2],
+            spec.block, mode, spec.reason, spec.explanation,
+        )
+
+    return cmds
+
+def merge_runs(boxes: List[Tuple[int, int, int, int, int, int]], keep_thin: bool = False) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    Merges consecutive cuboids (x1, y1, z1, x2, y2, z2) that are identical in two axes and adjacent in the third.
+    With keep_thin (for outline fills), a merge is only made if the result is still 1 block thick in some axis,
+    so that its outline covers every block.
+    """
+    merged = []
+    for box in boxes:
+        lo = [min(box[a], box[a + 3]) for a in range(3)]
+        hi = [max(box[a], box[a + 3]) for a in range(3)]
+        if merged:
+            plo, phi = merged[-1]
+            differ = [a for a in range(3) if (plo[a], phi[a]) != (lo[a], hi[a])]
+            if len(differ) == 1:
+                a = differ[0]
+                if phi[a] + 1 == lo[a] or hi[a] + 1 == plo[a]:
+                    nlo, nhi = list(plo), list(phi)
+                    nlo[a], nhi[a] = min(plo[a], lo[a]), max(phi[a], hi[a])
+                    if not keep_thin or any(nlo[b] == nhi[b] for b in range(3)):
+                        merged[-1] = (nlo, nhi)
+                        continue
+        merged.append((lo, hi))
+    return [(*lo, *hi) for lo, hi in merged]
+
+def plane(spec: PlaneSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Builds a 1-block-thick inclined plane between two 3D points.
+    The plane is perpendicular to one of XY, YZ, or XZ coordinate planes.
+    Returns a list of /fill commands using the safer fill() wrapper.
+    """
+
+    cmds = []
+    boxes = [] # one cuboid per step, merged into maximal runs at the end
+
+    x1, y1, z1 = spec.start_coordinates
+    x2, y2, z2 = spec.end_coordinates
+    perp = spec.perpendicular_to.upper()
+
+    def fill_cmd(a, b, c, d, e, f, block, mode, reason, explanation):
+        return fill(
+            FillSpec(
+                reason=reason,
+                start_coordinates=[a, b, c],
+                end_coordinates=[d, e, f],
+                block=block,
+                block_states=spec.block_states,
+                mode=mode,
+                explanation=explanation,
+            ),
+            origin=origin,
+        )
+
+    # === Case 1: Plane perpendicular to XY (vertical sheet along Z) ===
+    if perp == "XY":
+        zmin, zmax = sorted([z1, z2])
+        # The plane’s shape in XY-space:
+        dx, dy = x2 - x1, y2 - y1
+        abs_dx, abs_dy = abs(dx), abs(dy)
+        best_axis = "x" if abs_dx >= abs_dy else "y"
+
+        # Iterate along best axis, fill lines along the other
+        steps = abs_dx if best_axis == "x" else abs_dy
+        for i in range(steps + 1):
+            t = i / max(steps, 1)
+            xi = round(x1 + t * dx)
+            yi = round(y1 + t * dy)
+            # Fill line along the other axis
+            if best_axis == "x":
+                # interpolate y and fill a line parallel to y at current x
+                boxes.append((
+                    xi, yi, zmin,
+                    xi, yi, zmax,
+                ))
+            else:
+                # interpolate x and fill a line parallel to x at current y
+                boxes.append((
+                    xi, yi, zmin,
+                    xi, yi, zmax,
+                ))
+
+    # === Case 2: Plane perpendicular to YZ (vertical sheet along X) ===
+    elif perp == "YZ":
+        xmin, xmax = sorted([x1, x2])
+        dy, dz = y2 - y1, z2 - z1
+        abs_dy, abs_dz = abs(dy), abs(dz)
+        best_axis = "y" if abs_dy >= abs_dz else "z"
+        steps = abs_dy if best_axis == "y" else abs_dz
+        for i in range(steps + 1):
+            t = i / max(steps, 1)
+            yi = round(y1 + t * dy)
+            zi = round(z1 + t * dz)
+            if best_axis == "y":
+                boxes.append((
+                    xmin, yi, zi,
+                    xmax, yi, zi,
+                ))
+            else:
+                boxes.append((
+                    xmin, yi, zi,
+                    xmax, yi, zi,
+                ))
+
+    # === Case 3: Plane perpendicular to XZ (horizontal or sloped sheet along Y) ===
+    elif perp == "XZ":
+        ymin, ymax = sorted([y1, y2])
+        dx, dz = x2 - x1, z2 - z1
+        abs_dx, abs_dz = abs(dx), abs(dz)
+        best_axis = "x" if abs_dx >= abs_dz else "z"
+        steps = abs_dx if best_axis == "x" else abs_dz
+        for i in range(steps + 1):
+            t = i / max(steps, 1)
+            xi = round(x1 + t * dx)
+            zi = round(z1 + t * dz)
+            if best_axis == "x":
+                boxes.append((
+                    xi, ymin, min(z1, z2),
+                    xi, ymax, max(z1, z2),
+                ))
+            else:
+                boxes.append((
+                    min(x1, x2), ymin, zi,
+                    max(x1, x2), ymax, zi,
+                ))
+    else:
+        raise ValueError(f"Invalid 'perpendicular_to' value: {perp}")
+
+    # consecutive steps sharing the interpolated coordinate become one wider fill
+    for box in merge_runs(boxes, keep_thin=spec.mode == "outline"):
+        cmds += fill_cmd(*box, spec.block, spec.mode, spec.reason, spec.explanation)
+
+    return cmds
+
+
+
+
+def mask_fills(mask: np.ndarray, lo: List[int], spec: BaseModel, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Fills of the spec's block and mode covering a 3D mask whose first cell is at lo,
+    as greedy-meshed row/slab cuboids.
+    """
+    cmds = []
+    for xa, ya, za, xb, yb, zb in greedy_boxes(mask):
+        cmds += fill(
+            FillSpec(
+                reason=spec.reason,
+                start_coordinates=[xa + lo[0], ya + lo[1], za + lo[2]],
+                end_coordinates=[xb + lo[0], yb + lo[1], zb + lo[2]],
+                block=spec.block,
+                block_states=spec.block_states,
+                mode=spec.mode,
+                explanation=spec.explanation,
+            ),
+            origin=origin,
+        )
+    return cmds
+
+def sphere(spec: SphereSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Wrapper for SphereSpec: a sphere, dome or bowl from the cached ellipsoid kernel.
+    """
+    r = max(spec.radius, 0)
+    mask = ellipsoid_mask(r, r, r, spec.fill == "hollow", spec.part)
+    return mask_fills(mask, [c - r for c in spec.center_coordinates], spec, origin=origin)
+
+def ellipsoid(spec: EllipsoidSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Wrapper for EllipsoidSpec, from the cached ellipsoid kernel.
+    """
+    rx, ry, rz = (max(r, 0) for r in spec.radii)
+    mask = ellipsoid_mask(rx, ry, rz, spec.fill == "hollow", spec.part)
+    return mask_fills(mask, [c - r for c, r in zip(spec.center_coordinates, (rx, ry, rz))], spec, origin=origin)
+
+def cone(spec: ConeSpec, origin: List[int] = [0, -60, 0]) -> List[str]:
+    """
+    Wrapper for ConeSpec: the cached upright cone kernel, turned to point along the spec's axis.
+    """
+    r, height = max(spec.radius, 0), abs(spec.height)
+    axis = "XYZ".index(spec.direction)
+    mask = np.moveaxis(cone_mask(r, height, spec.fill == "hollow"), 1, axis)
+    if spec.height < 0:
+        mask = np.flip(mask, axis=axis)
+    lo = [c - r for c in spec.base_coordinates]
+    lo[axis] = spec.base_coordinates[axis] - (height if spec.height < 0 else 0)
+    return mask_fills(mask, lo, spec, origin=origin)
+
+
+
+
+map_tools_to_wrappers = {
+    "FillSpec": fill,
+    "BeamSpec": beam,
+    "PlaneSpec": plane,
+    "SphereSpec": sphere,
+    "EllipsoidSpec": ellipsoid,
+    "ConeSpec": cone,
+}
+
+map_tools_to_specs = {
+    "FillSpec": FillSpec,
+    "BeamSpec": BeamSpec,
+    "PlaneSpec": PlaneSpec,
+    "SphereSpec": SphereSpec,
+    "EllipsoidSpec": EllipsoidSpec,
+    "ConeSpec": ConeSpec,
+}
+
+def load_specs(filename: str) -> List[Tuple[str, BaseModel]]:
+    """
+    Reads a blueprint JSON and validates its tool calls into (tool name, spec) pairs.
+    """
+    with open(filename, "r") as file:
+        data = json.load(file)
+    return [(tool_call["name"], map_tools_to_specs[tool_call["name"]](**tool_call["args"])) for tool_call in data.get("tool_calls", [])]
+
+def generate_commands(specs: List[Tuple[str, BaseModel]], origin: List[int] = [0, -60, 0]) -> Iterator[Tuple[str, str]]:
+    """
+    Translates every tool call independently, yielding (label, command) pairs in blueprint order.
+    """
+    for tool_name, spec in specs:
+        for cmd in map_tools_to_wrappers[tool_name](spec, origin=origin):
+            yield f"{spec.explanation} ({tool_name})", cmd
+
+def rasterize(specs: List[Tuple[str, BaseModel]], origin: List[int] = [0, -60, 0]) -> VoxelGrid:
+    """
+    Evaluates every tool call, in order, into a single voxel grid of the final result.
+    """
+    return VoxelGrid.from_commands(cmd for _, cmd in generate_commands(specs, origin=origin))
+
+def compile_commands(specs: List[Tuple[str, BaseModel]], origin: List[int] = [0, -60, 0]) -> List[Tuple[str, str]]:
+    """
+    Rasterizes the whole blueprint into one voxel grid (later calls overwrite earlier ones, trims are applied)
+    and returns a greedy-meshed cuboid cover of the final result, in overwrite order, as (label, command) pairs.
+    Falls back to the pruned tool call commands when they are fewer, e.g. for blueprints that are few large fills already.
+    """
+    commands = list(generate_commands(specs, origin=origin))
+    grid = VoxelGrid.from_commands(cmd for _, cmd in commands)
+    compiled = [(f"{fill.block} (compiled)", fill.command()) for fill in grid.cuboids()]
+    pruned = prune_commands(commands)
+    return compiled if len(compiled) < len(pruned) else pruned
+
+def prune_commands(commands: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Drops or shrinks (label, command) pairs whose effect is entirely overwritten by later commands.
+    """
+    commands = list(commands)
+    pruned = prune_occluded([cmd for _, cmd in commands])
+    return [(label, cmd) for (label, _), cmd in zip(commands, pruned) if cmd is not None]
+
+def load_commands(filename: str, origin: List[int] = [0, -60, 0], compile: bool = False, prune: bool = False) -> Iterable[Tuple[str, str]]:
+    """
+    Reads a blueprint JSON and returns its (label, command) pairs, optionally through the voxel compile stage
+    or the dead-command elimination pass (compiling already falls back to the pruned commands when they are fewer).
+    """
+    specs = load_specs(filename)
+    if compile:
+        return compile_commands(specs, origin=origin)
+    commands = generate_commands(specs, origin=origin)
+    if prune:
+        return prune_commands(commands)
+    return commands
+
+def compile_blueprint(filename: str, compile: bool = False, prune: bool = False, cache_dir: Optional[str] = None) -> CompiledBlueprint:
+    """
+    Compiles a blueprint into origin-independent commands (see load_commands for the options).
+    With cache_dir, the result is stored under a hash of the blueprint contents, COMPILER_VERSION and the options,
+    so later runs, at any origin or start index, memory-map it instead of recompiling.
+    """
+    if cache_dir:
+        key = blueprint_key(filename, COMPILER_VERSION, compile=compile, prune=prune)
+        cached = CompiledBlueprint.load(cache_dir, key)
+        if cached is not None:
+            return cached
+    compiled = CompiledBlueprint.from_commands(load_commands(filename, origin=[0, 0, 0], compile=compile, prune=prune))
+    if cache_dir:
+        compiled.save(cache_dir, key)
+    return compiled
+
+def diff_commands(old_filename: str, new_filename: str, origin: List[int] = [0, -60, 0]) -> List[Tuple[str, str]]:
+    """
+    Rasterizes both blueprints and returns the (label, command) pairs turning the old result into the new one:
+    merged cuboids of every changed cell's new block, and air where cells were removed.
+    """
+    old = rasterize(load_specs(old_filename), origin=origin)
+    new = rasterize(load_specs(new_filename), origin=origin)
+    return [(f"{fill.block} (diff)", fill.command()) for fill in diff_cuboids(old, new)]
+
+def compile_diff(old_filename: str, new_filename: str, cache_dir: Optional[str] = None) -> CompiledBlueprint:
+    """
+    diff_commands in origin-independent form, cached like compile_blueprint under the contents of both blueprints.
+    """
+    if cache_dir:
+        key = blueprint_key(new_filename, COMPILER_VERSION, diff_from=blueprint_key(old_filename, COMPILER_VERSION))
+        cached = CompiledBlueprint.load(cache_dir, key)
+        if cached is not None:
+            return cached
+    compiled = CompiledBlueprint.from_commands(diff_commands(old_filename, new_filename, origin=[0, 0, 0]))
+    if cache_dir:
+        compiled.save(cache_dir, key)
+    return compiled
+
+@functools.lru_cache(maxsize=None)
+def short_block(block: str) -> str:
+    """
+    Shortest spelling of a block: without the default namespace, and its block states without whitespace (or "[]" if empty).
+    Cached, so each distinct block of a blueprint is canonicalized once.
+    """
+    name, bracket, rest = block.strip().partition("[")
+    name = name.strip()
+    if name.startswith(DEFAULT_NAMESPACE):
+        name = name[len(DEFAULT_NAMESPACE):]
+    if not bracket:
+        return name
+    states, _, tail = rest.partition("]")
+    states = ",".join("=".join(p.strip() for p in state.split("=", 1)) for state in states.split(",") if state.strip())
+    return name + (f"[{states}]" if states else "") + tail.strip()
+
+def short_command(cmd: str, relative_to: Optional[List[int]] = None) -> str:
+    """
+    Shortest text of a command placing the same blocks: a /fill without the default namespace or "replace" mode,
+    with coordinates relative (~) to relative_to if given (where the player must stand, e.g. after a /tp).
+    Other commands are returned unchanged.
+    """
+    f = Fill.parse(cmd)
+    if f is None:
+        return cmd
+    coords = f[:6]
+    if relative_to is not None:
+        coords = [f"~{c - r}" if c != r else "~" for c, r in zip(coords, list(relative_to) * 2)]
+    mode = "" if f.mode == "replace" else f" {f.mode}"
+    return f"fill {' '.join(map(str, coords))} {short_block(f.block)}{mode}"
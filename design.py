@@ -1,18 +1,197 @@
 import os
+import sys
 import time
+import random
 import json
+import asyncio
 import argparse
+import functools
+import threading
 
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
-from build import *
+from plan import split_plan
+from tools import FillSpec, BeamSpec, PlaneSpec, SphereSpec, EllipsoidSpec, ConeSpec
+from transports import add_transport_arguments, make_transport
+from llm_cache import DEFAULT_LLM_CACHE_DIR, DEFAULT_LLM_CACHE_SIZE, ResponseCache, response_key
 
+if TYPE_CHECKING: # langchain_core takes a few hundred ms to import, so it is only imported once a request is made
+    from langchain_core.messages import AIMessage, BaseMessage
 
-def engineer_prompt(user_prompt: str, model: str = "gemini-2.5-flash", model_provider: str = "google_genai") -> str:
-    llm = init_chat_model(model=model, model_provider=model_provider)
+TOOLS = [FillSpec, BeamSpec, PlaneSpec, SphereSpec, EllipsoidSpec, ConeSpec]
 
-    system_prompt = """
+@functools.lru_cache(maxsize=None)
+def init_model(model: str, model_provider: str):
+    """
+    init_chat_model, shared by every request in the process for the same model and provider,
+    plus an offline fake for tests and benchmarks: --provider fake --model fake[:<seconds per tool call>[:<failure rate>]].
+    """
+    if model_provider == "fake":
+        from fake_llm import FakeChatModel
+        _, latency, failure_rate = (model.split(":") + ["", ""])[:3]
+        return FakeChatModel(latency=float(latency or 0), failure_rate=float(failure_rate or 0))
+    from langchain.chat_models import init_chat_model
+    return init_chat_model(model=model, model_provider=model_provider)
+
+def invoke(llm, messages: List["BaseMessage"], cache: Optional[ResponseCache] = None, **key) -> "AIMessage":
+    """
+    llm.invoke(messages), answered from `cache` when an identical request (messages plus `key`: model, provider, tools...) was made before.
+    """
+    if cache is None:
+        return llm.invoke(messages)
+    k = response_key(messages, **key)
+    output = cache.get(k)
+    if output is None:
+        output = llm.invoke(messages)
+        cache.put(k, output)
+    return output
+
+async def ainvoke(llm, messages: List["BaseMessage"], cache: Optional[ResponseCache] = None, rate_limiter=None,
+                  retries: int = 0, backoff: float = 1.0, **key) -> "AIMessage":
+    """
+    Async invoke(). Requests that miss the cache wait for `rate_limiter` (a LangChain rate limiter), and failed requests are retried
+    up to `retries` times after backoff * 2**attempt seconds (with jitter).
+    """
+    if cache is not None:
+        k = response_key(messages, **key)
+        output = cache.get(k)
+        if output is not None:
+            return output
+
+    for attempt in range(retries + 1):
+        if rate_limiter is not None:
+            await rate_limiter.aacquire()
+        try:
+            output = await llm.ainvoke(messages)
+            break
+        except Exception as e:
+            if attempt == retries:
+                raise
+            pause = backoff * 2 ** attempt * (1 + random.random())
+            print(f"Request failed ({e}), retrying in {pause:.1f} s")
+            await asyncio.sleep(pause)
+
+    if cache is not None:
+        cache.put(k, output)
+    return output
+
+def parse_tool_call_chunk(chunk: dict) -> dict:
+    """
+    A complete tool call from its gathered chunk; raises ValueError (json.JSONDecodeError) if its arguments are malformed.
+    """
+    return {"name": chunk["name"], "args": json.loads(chunk["args"] or "{}"), "id": chunk["id"], "type": "tool_call"}
+
+class ToolCallStream:
+    """
+    Iterates over the tool calls of the response to messages as soon as each one is complete (once the model starts
+    the next one, or the stream ends) rather than after the whole response, as unparsed chunks (see parse_tool_call_chunk)
+    so that a malformed one can be skipped by the caller.
+    The full response is then available as `message` and, like invoke's, stored in `cache`.
+    """
+
+    def __init__(self, llm, messages: List["BaseMessage"], cache: Optional[ResponseCache] = None, **key):
+        self.llm = llm
+        self.messages = messages
+        self.cache = cache
+        self.key = key
+        self.message = None
+
+    def __iter__(self) -> Iterator[dict]:
+        from langchain_core.messages import AIMessage
+
+        if self.cache is not None:
+            k = response_key(self.messages, **self.key)
+            cached = self.cache.get(k)
+            if cached is not None:
+                for tool_call in cached.tool_calls:
+                    yield {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"]}
+                self.message = cached
+                return
+
+        gathered = None
+        emitted = 0
+        for chunk in self.llm.stream(self.messages):
+            gathered = chunk if gathered is None else gathered + chunk
+            while emitted < len(gathered.tool_call_chunks) - 1:
+                yield gathered.tool_call_chunks[emitted]
+                emitted += 1
+        if gathered is None:
+            self.message = AIMessage(content="")
+            return
+        yield from gathered.tool_call_chunks[emitted:]
+
+        self.message = AIMessage(content=gathered.content, tool_calls=gathered.tool_calls)
+        if self.cache is not None:
+            self.cache.put(k, self.message)
+
+def stream_build(llm, messages: List["BaseMessage"], refined_prompt: str, blueprint_path: str, transport, origin: List[int] = [0, -60, 0],
+                 queue_size: int = 1024, cache: Optional[ResponseCache] = None, **key) -> int:
+    """
+    Streams the response to messages, validating each tool call against its spec as soon as it is complete
+    and entering its commands through enter_stream, so building starts while the model is still generating.
+    Validated tool calls are appended to the blueprint JSON as they arrive, so the build can be reproduced with build.py;
+    malformed or invalid ones are reported and skipped. The JSON is completed even if the build fails midway.
+    Returns the number of commands entered.
+    """
+    from build import enter_stream
+
+    stream = ToolCallStream(llm, messages, cache, **key)
+    tools = {tool.__name__: tool for tool in TOOLS}
+
+    with open(blueprint_path, "x") as f:
+        f.write('{\n    "refined_prompt": ' + json.dumps(refined_prompt) + ',\n    "tool_calls": [')
+
+        def specs():
+            n = 0
+            for chunk in stream:
+                try:
+                    tool_call = parse_tool_call_chunk(chunk)
+                    spec = tools[tool_call["name"]](**tool_call["args"])
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"Skipping invalid {chunk['name']} tool call: {e}")
+                    continue
+                with written: # enter_stream translates on a thread of its own, which may outlive a failed build
+                    if closing:
+                        return
+                    f.write(("," if n else "") + "\n        " + json.dumps(tool_call))
+                    f.flush()
+                n += 1
+                yield tool_call["name"], spec
+
+        written, closing = threading.Lock(), False
+        try:
+            return enter_stream(specs(), transport, origin=origin, queue_size=queue_size)
+        finally:
+            with written:
+                closing = True
+                response_text = stream.message.content.strip() if stream.message is not None else ""
+                f.write('\n    ],\n    "response_text": ' + json.dumps(response_text) + "\n}\n")
+
+async def generate_sections(llm, system_prompt: str, user_prompt: str, concurrency: int = 4, cache: Optional[ResponseCache] = None, **key) -> list:
+    """
+    Generates tool calls for each step of the construction plan concurrently (at most `concurrency` requests
+    in flight), each request seeing the whole plan but building only its own step. Returns the responses in plan order.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    _, steps = split_plan(user_prompt)
+    if len(steps) < 2:
+        return [await ainvoke(llm, [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)], cache, **key)]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def section(k: int, step: str):
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"{user_prompt}\n\nBuild only step {k} of the plan above: {step}\n"
+                                 "The other steps are built separately, in order, in the same coordinate system, so keep to the plan's dimensions and positions."),
+        ]
+        async with semaphore:
+            return await ainvoke(llm, messages, cache, **key)
+
+    return await asyncio.gather(*(section(k, step) for k, step in enumerate(steps, 1)))
+
+PROMPT_ENGINEER_SYSTEM_PROMPT = """
     You are a professional prompt engineer specializing in guiding AI-powered Minecraft builders.
     Your goal is to take a vague user request for a build and rewrite it into an explicit, precise, and implementable prompt.
 
@@ -25,6 +204,9 @@ def engineer_prompt(user_prompt: str, model: str = "gemini-2.5-flash", model_pro
     - `FillSpec`: The most versatile tool, creates or replace cuboid regions with blocks or air.
     - `BeamSpec`: Efficiently create hollow or filled beams, cylinders and square prisms from the start to end point.
     - `PlaneSpec`: Efficiently create planes, possibly tilted.
+    - `SphereSpec`: Efficiently create spheres, domes and bowls, solid or hollow.
+    - `EllipsoidSpec`: Efficiently create stretched spheres and their halves, e.g. hulls, canopies and rounded roofs.
+    - `ConeSpec`: Efficiently create cones, e.g. spires, round tower roofs and trees.
     
     Pay careful consideration to order, for example, avoid failures like:
     - performing shaping operations before adding **all** relevant parts (e.g., add the deck of a ship before shaping the hull, or it would hang over)
@@ -33,22 +215,7 @@ def engineer_prompt(user_prompt: str, model: str = "gemini-2.5-flash", model_pro
     Your output must consist strictly of only the construction plan, no commentary or markdown cells.
     """
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ]
-
-    print("Refining prompt... (please wait)", end=" ", flush=True)
-    refined = f"[{user_prompt}]\n"+llm.invoke(messages).content.strip()
-    print("(done)")
-    return refined
-
-
-def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_provider: str = "google_genai", blueprint_path: str = None):
-    llm = init_chat_model(model=model, model_provider=model_provider)
-    llm = llm.bind_tools([FillSpec, BeamSpec, PlaneSpec], tool_choice="any")
-
-    system_prompt = """
+BUILDER_SYSTEM_PROMPT = """
     You are an expert Minecraft builder assisting an architect in visualizing design ideas by constructing prototypes in Creative Mode.
     Your goal is to use the available tool calls to *physically construct* the structure described by the user — not to describe it in text. Each tool call corresponds to a Minecraft command execution.
     
@@ -61,6 +228,9 @@ def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_pr
     - `FillSpec`: The most versatile tool, creates or replace cuboid regions with blocks or air.
     - `BeamSpec`: Efficiently create hollow or filled beams, cylinders and square prisms from the start to end point.
     - `PlaneSpec`: Efficiently create planes, possibly tilted.
+    - `SphereSpec`: Efficiently create spheres, domes and bowls, solid or hollow.
+    - `EllipsoidSpec`: Efficiently create stretched spheres and their halves, e.g. hulls, canopies and rounded roofs.
+    - `ConeSpec`: Efficiently create cones, e.g. spires, round tower roofs and trees.
     
     **For every tool call:**
     - Specify exact coordinates and block types.
@@ -70,13 +240,56 @@ def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_pr
     **Construction guidelines:**
     - (0, 0, 0) must be a corner of the construction.
     - Ensure symmetry, realism, and playability (e.g., hollow interiors, accessible doors).
-    - When building natural or artistic shapes (like trees, fountains, or hills), approximate using rectangular or stacked sections.
+    - When building curved shapes (like domes, hulls, spires or tree crowns), use a single sphere, ellipsoid or cone call instead of stacked sections.
+    - When building other natural or artistic shapes (like fountains or hills), approximate using rectangular or stacked sections.
     
     The user's prompt will describe what to build. Your entire output should consist solely of the appropriate tool calls required to construct it. No response is required; you must actually call the tools, not just specify the tools to be called.
     """
 
+def toolcall_key(model: str, model_provider: str) -> dict:
+    """
+    Cache key fields of a tool call request: model, provider and the schemas of the bound tools.
+    """
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return dict(model=model, model_provider=model_provider, tools=[convert_to_openai_tool(tool) for tool in TOOLS], tool_choice="any")
+
+def make_blueprint(refined_prompt: str, outputs: List["AIMessage"]) -> dict:
+    """
+    Blueprint JSON contents from the responses of one or more tool call requests, in order.
+    """
+    return {
+        "refined_prompt": refined_prompt,
+        "response_text": "\n".join(output.content.strip() for output in outputs if output.content.strip()),
+        "tool_calls": [tool_call for output in outputs for tool_call in output.tool_calls]
+    }
+
+def engineer_prompt(user_prompt: str, model: str = "gemini-2.5-flash", model_provider: str = "google_genai", cache: Optional[ResponseCache] = None) -> str:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    llm = init_model(model=model, model_provider=model_provider)
+
     messages = [
-        SystemMessage(content=system_prompt),
+        SystemMessage(content=PROMPT_ENGINEER_SYSTEM_PROMPT),
+        HumanMessage(content=user_prompt)
+    ]
+
+    print("Refining prompt... (please wait)", end=" ", flush=True)
+    output = invoke(llm, messages, cache, model=model, model_provider=model_provider)
+    refined = f"[{user_prompt}]\n"+output.content.strip()
+    print("(done)")
+    return refined
+
+
+def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_provider: str = "google_genai", blueprint_path: str = None, parallel_sections: int = 0,
+                     cache: Optional[ResponseCache] = None, transport=None, origin: List[int] = [0, -60, 0], queue_size: int = 1024):
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    llm = init_model(model=model, model_provider=model_provider)
+    llm = llm.bind_tools(TOOLS, tool_choice="any")
+    key = toolcall_key(model, model_provider)
+
+    messages = [
+        SystemMessage(content=BUILDER_SYSTEM_PROMPT),
         HumanMessage(content=user_prompt)
     ]
 
@@ -84,17 +297,19 @@ def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_pr
     if blueprint_path is None:
         blueprint_path = f"blueprint_{int(time.time())}.json"
 
+    if transport is not None:
+        print("Creating blueprint and building as it streams in...")
+        n_commands = stream_build(llm, messages, user_prompt, blueprint_path, transport, origin=origin, queue_size=queue_size, cache=cache, **key)
+        print(f"Entered {n_commands} commands. Blueprint saved to {blueprint_path}!")
+        return
+
     print("Creating blueprint... (please wait)", end=" ", flush=True)
-    output = llm.invoke(messages)
+    if parallel_sections > 0:
+        outputs = asyncio.run(generate_sections(llm, BUILDER_SYSTEM_PROMPT, user_prompt, concurrency=parallel_sections, cache=cache, **key))
+    else:
+        outputs = [invoke(llm, messages, cache, **key)]
     print("(done)")
-    response = output.content.strip()
-    tool_calls = output.tool_calls
-
-    blueprint_data = {
-        "refined_prompt": user_prompt,
-        "response_text": response,
-        "tool_calls": tool_calls
-    }
+    blueprint_data = make_blueprint(user_prompt, outputs)
 
     with open(blueprint_path, "x") as f:
         json.dump(blueprint_data, f, indent=4)
@@ -102,6 +317,124 @@ def create_toolcalls(user_prompt: str, model: str = "gemini-2.5-flash", model_pr
     print(f"Blueprint saved to {blueprint_path}!")
 
 
+def blueprint_path(out_dir: str, name: str) -> str:
+    """
+    <out_dir>/<name>.json; raises ValueError if the job name is not a plain file stem, e.g. "../x" or an absolute path
+    that would write outside out_dir.
+    """
+    if not isinstance(name, str) or name in ("", ".", "..") or os.path.basename(name) != name or (os.altsep and os.altsep in name):
+        raise ValueError(f"Invalid job name {name!r}: must be a file name without directories")
+    return os.path.join(out_dir, f"{name}.json")
+
+async def design_blueprint(job: dict, out_dir: str, parallel_sections: int = 0, cache: Optional[ResponseCache] = None, **options) -> dict:
+    """
+    Refines one batch job's prompt and generates its blueprint, written atomically to <out_dir>/<name>.json.
+    options (rate_limiter, retries, backoff) apply to every request. Returns the job's report entry.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    model, model_provider = job["model"], job["provider"]
+    path = blueprint_path(out_dir, job["name"])
+    t = time.perf_counter()
+
+    messages = [SystemMessage(content=PROMPT_ENGINEER_SYSTEM_PROMPT), HumanMessage(content=job["prompt"])]
+    output = await ainvoke(init_model(model, model_provider), messages, cache, model=model, model_provider=model_provider, **options)
+    refined = f"[{job['prompt']}]\n"+output.content.strip()
+
+    llm = init_model(model, model_provider).bind_tools(TOOLS, tool_choice="any")
+    key = toolcall_key(model, model_provider)
+    if parallel_sections > 0:
+        outputs = await generate_sections(llm, BUILDER_SYSTEM_PROMPT, refined, concurrency=parallel_sections, cache=cache, **key, **options)
+    else:
+        messages = [SystemMessage(content=BUILDER_SYSTEM_PROMPT), HumanMessage(content=refined)]
+        outputs = [await ainvoke(llm, messages, cache, **key, **options)]
+    blueprint_data = make_blueprint(refined, outputs)
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(blueprint_data, f, indent=4)
+    os.replace(tmp, path)
+
+    return {"name": job["name"], "status": "ok", "path": path, "seconds": time.perf_counter() - t, "tool_calls": len(blueprint_data["tool_calls"])}
+
+def load_jobs(filename: str, model: str, model_provider: str) -> List[dict]:
+    """
+    Reads a batch file with one JSON prompt per line: either a string, or an object with a "prompt"
+    and optional "name" (output file stem, default prompt_<line number>), "model" and "provider".
+    """
+    jobs = []
+    with open(filename, "r") as f:
+        for k, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if isinstance(job, str):
+                job = {"prompt": job}
+            job.setdefault("name", f"prompt_{k:04d}")
+            job.setdefault("model", model)
+            job.setdefault("provider", model_provider)
+            try:
+                blueprint_path("", job["name"])
+            except ValueError as e:
+                raise ValueError(f"{filename}:{k}: {e}") from None
+            jobs.append(job)
+    return jobs
+
+async def design_batch(jobs: List[dict], out_dir: str, max_in_flight: int = 4, requests_per_second: Optional[float] = None,
+                       retries: int = 3, backoff: float = 1.0, parallel_sections: int = 0, cache: Optional[ResponseCache] = None) -> dict:
+    """
+    Generates the blueprints of many jobs concurrently, at most max_in_flight jobs at a time, each provider's
+    requests limited to requests_per_second. Blueprints that already exist in out_dir are skipped and a failed job
+    does not stop the others. Returns a report with per-job latency and overall throughput.
+    Raises ValueError before starting if a job name is not a plain file stem.
+    """
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+
+    paths = {job["name"]: blueprint_path(out_dir, job["name"]) for job in jobs}
+    os.makedirs(out_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    rate_limiters = {}
+
+    async def run(job: dict) -> dict:
+        if os.path.exists(paths[job["name"]]):
+            return {"name": job["name"], "status": "skipped"}
+        if requests_per_second and job["provider"] not in rate_limiters:
+            rate_limiters[job["provider"]] = InMemoryRateLimiter(requests_per_second=requests_per_second, check_every_n_seconds=0.05)
+        async with semaphore:
+            try:
+                entry = await design_blueprint(job, out_dir, parallel_sections=parallel_sections, cache=cache,
+                                               rate_limiter=rate_limiters.get(job["provider"]), retries=retries, backoff=backoff)
+            except Exception as e:
+                entry = {"name": job["name"], "status": "failed", "error": repr(e)}
+        print(f"[{entry['status']}] {job['name']}" + (f" in {entry['seconds']:.1f} s" if "seconds" in entry else f": {entry.get('error', '')}"), flush=True)
+        return entry
+
+    t = time.perf_counter()
+    entries = await asyncio.gather(*(run(job) for job in jobs))
+    elapsed = time.perf_counter() - t
+
+    latencies = sorted(entry["seconds"] for entry in entries if entry["status"] == "ok")
+    percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+    return {
+        "jobs": entries,
+        "seconds": elapsed,
+        "ok": len(latencies),
+        "skipped": sum(entry["status"] == "skipped" for entry in entries),
+        "failed": sum(entry["status"] == "failed" for entry in entries),
+        "blueprints_per_minute": 60 * len(latencies) / elapsed if elapsed > 0 else None,
+        "latency_p50": percentile(0.5),
+        "latency_p90": percentile(0.9),
+        "latency_max": latencies[-1] if latencies else None,
+    }
+
+def print_batch_report(report: dict):
+    print(f"\n{report['ok']} blueprint(s) in {report['seconds']:.1f} s "
+          f"({report['skipped']} skipped, {report['failed']} failed)")
+    if report["ok"]:
+        print(f"Throughput: {report['blueprints_per_minute']:.1f} blueprints/min")
+        print(f"Latency per prompt: p50 {report['latency_p50']:.1f} s, p90 {report['latency_p90']:.1f} s, max {report['latency_max']:.1f} s")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI-powered Minecraft structure builder")
     parser.add_argument("--prompt", type=str, default="Realistic model of RMS Titanic", help="Your natural-language build description.")
@@ -109,7 +442,45 @@ if __name__ == "__main__":
     parser.add_argument("--provider", type=str, default="google_genai", help="Model provider (API must be configured), for list see https://api.python.langchain.com/en/latest/chat_models/langchain.chat_models.base.init_chat_model.html")
     parser.add_argument("--blueprint_path", type=str, default=None, help="Path to save the generated blueprint JSON.")
 
+    parser.add_argument("--parallel_sections", type=int, default=0,
+                        help="Generate the tool calls of each construction plan step concurrently, with at most this many requests in flight (0: one request for the whole plan).")
+
+    parser.add_argument("--llm_cache_dir", type=str, default=DEFAULT_LLM_CACHE_DIR, help="Directory of the LLM response cache.")
+    parser.add_argument("--llm_cache_size", type=int, default=DEFAULT_LLM_CACHE_SIZE >> 20, help="Maximum size of the LLM response cache in MB; least recently used responses are evicted beyond it.")
+    parser.add_argument("--no_cache", "--no-cache", action="store_true", help="Always query the LLM, neither reading nor writing the response cache.")
+
+    parser.add_argument("--batch", type=str, default=None,
+                        help="Generate a blueprint for every prompt in this JSONL file (a string or {\"prompt\", \"name\", \"model\", \"provider\"} per line) instead of --prompt.")
+    parser.add_argument("--out_dir", type=str, default="blueprints", help="With --batch, directory the blueprints (and batch_report.json) are written to.")
+    parser.add_argument("--max_in_flight", type=int, default=4, help="With --batch, maximum number of prompts being generated at once.")
+    parser.add_argument("--requests_per_second", type=float, default=None, help="With --batch, maximum LLM requests per second to each provider.")
+    parser.add_argument("--retries", type=int, default=3, help="With --batch, number of times a failed LLM request is retried, with exponential backoff.")
+
+    parser.add_argument("--build", action="store_true",
+                        help="Build while the blueprint is being generated: stream the tool calls and enter each one's commands as soon as it is complete (uses the build.py transport options below).")
+    parser.add_argument("--origin", nargs=3, type=int, default=None, metavar=("X", "Y", "Z"),
+                        help="With --build, origin coordinates where the construction should start.")
+    parser.add_argument("--queue_size", type=int, default=1024,
+                        help="With --build, maximum number of commands waiting for the transport before generation is paused.")
+    add_transport_arguments(parser)
+
     args = parser.parse_args()
+    if args.build and args.origin is None:
+        parser.error("--build requires --origin")
+    if args.build and args.parallel_sections:
+        parser.error("--build streams a single response and cannot be combined with --parallel_sections")
+
+    cache = None if args.no_cache else ResponseCache(args.llm_cache_dir, max_bytes=args.llm_cache_size << 20)
+
+    if args.batch:
+        jobs = load_jobs(args.batch, model=args.model, model_provider=args.provider)
+        report = asyncio.run(design_batch(jobs, args.out_dir, max_in_flight=args.max_in_flight, requests_per_second=args.requests_per_second,
+                                          retries=args.retries, parallel_sections=args.parallel_sections, cache=cache))
+        print_batch_report(report)
+        with open(os.path.join(args.out_dir, "batch_report.json"), "w") as f:
+            json.dump(report, f, indent=4)
+        sys.exit(1 if report["failed"] else 0)
 
-    refined_prompt = engineer_prompt(args.prompt, model=args.model, model_provider=args.provider)
-    create_toolcalls(refined_prompt, model=args.model, model_provider=args.provider, blueprint_path=args.blueprint_path)
\ No newline at end of file
+    refined_prompt = engineer_prompt(args.prompt, model=args.model, model_provider=args.provider, cache=cache)
+    create_toolcalls(refined_prompt, model=args.model, model_provider=args.provider, blueprint_path=args.blueprint_path, parallel_sections=args.parallel_sections,
+                     cache=cache, transport=make_transport(args) if args.build else None, origin=args.origin, queue_size=args.queue_size)
\ No newline at end of file
@@ -0,0 +1,201 @@
+import os
+import re
+import gzip
+import json
+import shutil
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple
+
+from nbt import NBTWriter, TAG_COMPOUND, TAG_INT, TAG_LIST
+from voxels import AIR, VoxelGrid
+
+MAX_COMMAND_CHAIN_LENGTH = 65536 # Minecraft's default maxCommandChainLength gamerule
+NAMESPACE = "vibecraft"
+DATA_VERSION = 3953 # Minecraft 1.21
+COMPRESS_LEVEL = 1 # block records are highly repetitive, higher levels are much slower for almost no gain
+
+def function_name(blueprint_path: str) -> str:
+    """
+    Derives a valid function path component from a blueprint filename, e.g. "My Titanic.json" -> "my_titanic".
+    """
+    stem = os.path.splitext(os.path.basename(blueprint_path))[0].lower()
+    return re.sub(r"[^a-z0-9_.-]+", "_", stem).strip("_") or "build"
+
+def write_datapack(commands: Iterable[str], world_dir: str, name: str, commands_per_tick: int = MAX_COMMAND_CHAIN_LENGTH - 1, pack_format: int = 48) -> List[str]:
+    """
+    Writes commands into a datapack under <world_dir>/datapacks/vibecraft.
+    Commands are split into part functions of at most commands_per_tick commands, each scheduled on its own tick
+    so no single command chain exceeds maxCommandChainLength, and one entry function vibecraft:<name> schedules them all.
+    Returns the paths of the written .mcfunction files, entry function first.
+    """
+    pack_dir = os.path.join(world_dir, "datapacks", NAMESPACE)
+    # pack format 45 (1.21) renamed the "functions" folder to "function"
+    function_dir = os.path.join(pack_dir, "data", NAMESPACE, "function" if pack_format >= 45 else "functions")
+    parts_dir = os.path.join(function_dir, name)
+
+    os.makedirs(pack_dir, exist_ok=True)
+    with open(os.path.join(pack_dir, "pack.mcmeta"), "w") as f:
+        json.dump({"pack": {"pack_format": pack_format, "description": "Vibecraft builds"}}, f, indent=4)
+
+    # remove stale parts from a previous export of the same build
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+
+    paths = []
+    part, n_parts = [], 0
+
+    def flush():
+        nonlocal part, n_parts
+        path = os.path.join(parts_dir, f"part_{n_parts:04d}.mcfunction")
+        with open(path, "w") as f:
+            f.write("\n".join(part) + "\n")
+        paths.append(path)
+        part, n_parts = [], n_parts + 1
+
+    for cmd in commands:
+        part.append(cmd.lstrip("/"))
+        if len(part) >= commands_per_tick:
+            flush()
+    if part:
+        flush()
+
+    entry = os.path.join(function_dir, f"{name}.mcfunction")
+    with open(entry, "w") as f:
+        f.write(f"# Generated by vibecraft: {n_parts} part(s), one per tick\n")
+        for i in range(n_parts):
+            f.write(f"schedule function {NAMESPACE}:{name}/part_{i:04d} {i + 1}t\n")
+
+    return [entry] + paths
+
+
+# fixed-size NBT encoding of one structure block entry: {pos: [x, y, z], state: s}
+_BLOCK_RECORD = np.dtype([
+    ("pos_tag", "u1"), ("pos_name_len", ">u2"), ("pos_name", "S3"), ("pos_type", "u1"), ("pos_len", ">i4"),
+    ("x", ">i4"), ("y", ">i4"), ("z", ">i4"),
+    ("state_tag", "u1"), ("state_name_len", ">u2"), ("state_name", "S5"), ("state", ">i4"),
+    ("end", "u1"),
+])
+
+def split_block_state(block: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Splits e.g. "oak_log[axis=y]" into ("minecraft:oak_log", {"axis": "y"}).
+    """
+    name, _, states = block.partition("[")
+    name = name.strip()
+    if ":" not in name:
+        name = "minecraft:" + name
+    props = {}
+    for p in states.rstrip("]").split(","):
+        if "=" in p:
+            k, v = p.split("=", 1)
+            props[k.strip()] = v.strip()
+    return name, props
+
+def _varint_lengths(values: np.ndarray) -> np.ndarray:
+    return 1 + (values >= 1 << 7) + (values >= 1 << 14)
+
+def _varints(values: np.ndarray) -> bytes:
+    """
+    Encodes non-negative integers (< 2**21) as consecutive LEB128 varints.
+    """
+    values = values.astype(np.int64)
+    cont = np.stack([values >= 1 << 7, values >= 1 << 14], axis=1)
+    out = np.stack([
+        (values & 0x7F) | (cont[:, 0] << 7),
+        ((values >> 7) & 0x7F) | (cont[:, 1] << 7),
+        values >> 14,
+    ], axis=1).astype(np.uint8)
+    keep = np.concatenate([np.ones((len(values), 1), dtype=bool), cont], axis=1)
+    return out[keep].tobytes()
+
+def write_structure(grid: VoxelGrid, path: str, data_version: int = DATA_VERSION, include_air: bool = False, slab: int = 16):
+    """
+    Writes the voxel result as a gzip-compressed structure template (.nbt) for structure blocks or /place template.
+    Untouched cells (and air, unless include_air) are left out so they act as structure void.
+    Blocks are streamed one slab of x-layers at a time as packed NumPy records, never one Python object per block.
+    """
+    lut = np.full(len(grid.palette), -1, dtype=np.int64)
+    palette = []
+    for v, block in enumerate(grid.palette):
+        if block is None or (block == AIR and not include_air):
+            continue
+        lut[v] = len(palette)
+        palette.append(block)
+    counts = grid.counts()
+    n_blocks = int(counts[lut >= 0].sum())
+
+    with gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as f:
+        w = NBTWriter(f)
+        w.begin_compound("")
+        w.int("DataVersion", data_version)
+        w.int_list("size", list(grid.cells.shape))
+
+        w.begin_list("palette", TAG_COMPOUND, len(palette))
+        for block in palette:
+            name, props = split_block_state(block)
+            w.string("Name", name)
+            if props:
+                w.begin_compound("Properties")
+                for k, v in props.items():
+                    w.string(k, v)
+                w.end_compound()
+            w.end_compound()
+
+        w.begin_list("blocks", TAG_COMPOUND, n_blocks)
+        for x0 in range(0, grid.cells.shape[0], slab):
+            states = lut[grid.cells[x0:x0 + slab]]
+            xs, ys, zs = np.nonzero(states >= 0)
+            rec = np.zeros(len(xs), dtype=_BLOCK_RECORD)
+            rec["pos_tag"], rec["pos_name_len"], rec["pos_name"], rec["pos_type"], rec["pos_len"] = TAG_LIST, 3, b"pos", TAG_INT, 3
+            rec["state_tag"], rec["state_name_len"], rec["state_name"] = TAG_INT, 5, b"state"
+            rec["x"], rec["y"], rec["z"] = xs + x0, ys, zs
+            rec["state"] = states[xs, ys, zs]
+            w.raw(rec.tobytes())
+
+        w.begin_list("entities", TAG_COMPOUND, 0)
+        w.end_compound()
+
+def write_schematic(grid: VoxelGrid, path: str, data_version: int = DATA_VERSION):
+    """
+    Writes the voxel result as a Sponge schematic (version 2, .schem) with a varint-packed BlockData array.
+    Untouched cells become air. The Offset is the grid's minimum corner, so pasting at the world origin restores the placement.
+    Block data is streamed one y-layer at a time.
+    """
+    width, height, length = grid.cells.shape
+    if max(width, height, length) > 32767:
+        raise ValueError(f"Build too large for a schematic: {grid.cells.shape}")
+
+    palette = {AIR: 0}
+    lut = np.zeros(len(grid.palette), dtype=np.int64)
+    for v, block in enumerate(grid.palette):
+        if block is not None:
+            name, props = split_block_state(block)
+            state = name + ("[" + ",".join(f"{k}={v}" for k, v in props.items()) + "]" if props else "")
+            lut[v] = palette.setdefault(state, len(palette))
+    counts = grid.counts()
+    n_bytes = int((counts * _varint_lengths(lut)).sum())
+
+    with gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as f:
+        w = NBTWriter(f)
+        w.begin_compound("Schematic")
+        w.int("Version", 2)
+        w.int("DataVersion", data_version)
+        w.short("Width", width)
+        w.short("Height", height)
+        w.short("Length", length)
+        w.int_array("Offset", list(grid.lo))
+        w.int("PaletteMax", len(palette))
+        w.begin_compound("Palette")
+        for state, index in palette.items():
+            w.int(state, index)
+        w.end_compound()
+
+        # index = x + z * Width + y * Width * Length
+        w.begin_byte_array("BlockData", n_bytes)
+        for y in range(height):
+            w.raw(_varints(lut[grid.cells[:, y, :]].T.ravel()))
+
+        w.begin_list("BlockEntities", TAG_COMPOUND, 0)
+        w.end_compound()
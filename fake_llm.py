@@ -0,0 +1,94 @@
+import json
+import time
+import random
+import asyncio
+import hashlib
+
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from plan import STEP_PATTERN
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for a LangChain chat model, for tests and latency benchmarks (--provider fake).
+    Without tools bound it answers with a numbered construction plan; with tools bound it returns calls_per_step
+    deterministic FillSpec tool calls per plan step in the prompt (1 if the prompt asks for a single step).
+    Each response takes latency seconds per tool call (or per plan step), like token generation would, plus up to
+    jitter seconds drawn at random, so that concurrent requests finish out of order;
+    streamed responses deliver each tool call's arguments in two chunks as it is generated.
+    A fraction failure_rate of requests fails with a RuntimeError, to exercise retries,
+    and the first malformed_calls streamed tool calls have their arguments cut off, like a truncated response.
+    """
+
+    latency: float = 0.0
+    calls_per_step: int = 3
+    plan_steps: int = 8
+    tools_bound: bool = False
+    failure_rate: float = 0.0
+    jitter: float = 0.0
+    malformed_calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self.model_copy(update={"tools_bound": True})
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        if random.random() < self.failure_rate:
+            raise RuntimeError("fake provider error")
+        prompt = messages[-1].content
+        if not self.tools_bound:
+            plan = "\n".join(f"{k}. Build part {k} of the structure with FillSpec." for k in range(1, self.plan_steps + 1))
+            return AIMessage(content=plan)
+
+        steps = 1 if "build only step" in prompt.lower() else max(1, len(STEP_PATTERN.findall(prompt)))
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        tool_calls = []
+        for k in range(steps * self.calls_per_step):
+            x, y, z = (seed >> (8 * k)) % 50, (seed >> (8 * k + 3)) % 20, (seed >> (8 * k + 5)) % 50
+            tool_calls.append({
+                "name": "FillSpec",
+                "args": {
+                    "reason": "fake", "start_coordinates": [x, y, z], "end_coordinates": [x + 3, y + 2, z + 3],
+                    "block": "minecraft:stone", "mode": "replace", "explanation": f"fake part {k}",
+                },
+                "id": f"call_{seed % 10**8}_{k}",
+                "type": "tool_call",
+            })
+        return AIMessage(content="", tool_calls=tool_calls)
+
+    def _delay(self, message: AIMessage) -> float:
+        return self.latency * max(1, len(message.tool_calls) or self.plan_steps) + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages)
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages)
+        await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        if not message.tool_calls:
+            time.sleep(self._delay(message))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=message.content))
+            return
+        for index, tool_call in enumerate(message.tool_calls):
+            time.sleep(self.latency)
+            args = json.dumps(tool_call["args"])
+            if index < self.malformed_calls:
+                args = args[:len(args) // 2]
+            half = len(args) // 2
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tool_call["name"], "args": args[:half], "id": tool_call["id"], "index": index, "type": "tool_call_chunk"}]))
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": None, "args": args[half:], "id": None, "index": index, "type": "tool_call_chunk"}]))
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+class JsonlSink:
+    """
+    Writes every event as one JSON line, flushed as it is written so a crashed run keeps its log.
+    """
+
+    def __init__(self, path: str):
+        self.f = open(path, "a")
+
+    def emit(self, event: dict):
+        self.f.write(json.dumps(event) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ChromeTraceSink:
+    """
+    Writes events in the Chrome trace event format, viewable in chrome://tracing or https://ui.perfetto.dev:
+    commands and tool calls as duration slices on two tracks, throughput as counters.
+    The JSON array is left open until close(), which the format allows, so a crashed run still loads.
+    """
+
+    PID = 1
+    TRACKS = {"command": 1, "tool_call": 2}
+
+    def __init__(self, path: str):
+        self.f = open(path, "w")
+        self.f.write("[\n")
+        self.f.write(json.dumps({"ph": "M", "pid": self.PID, "name": "process_name", "args": {"name": "vibecraft build"}}))
+        for name, tid in self.TRACKS.items():
+            self.f.write(",\n" + json.dumps({"ph": "M", "pid": self.PID, "tid": tid, "name": "thread_name", "args": {"name": name}}))
+
+    def emit(self, event: dict):
+        kind = event["event"]
+        if kind in self.TRACKS:
+            args = {k: v for k, v in event.items() if k not in ("event", "label", "start", "seconds")}
+            trace_event = {"ph": "X", "pid": self.PID, "tid": self.TRACKS[kind], "name": event["label"],
+                           "ts": event["start"] * 1e6, "dur": event["seconds"] * 1e6, "args": args}
+        elif kind == "throughput":
+            trace_event = {"ph": "C", "pid": self.PID, "name": "throughput", "ts": (event["start"] + event["seconds"]) * 1e6,
+                           "args": {"commands_per_minute": event["commands_per_minute"], "characters_per_second": event["characters_per_second"]}}
+        else:
+            trace_event = {"ph": "i", "s": "g", "pid": self.PID, "name": kind, "ts": event.get("start", 0.0) * 1e6, "args": event}
+        self.f.write(",\n" + json.dumps(trace_event))
+        self.f.flush()
+
+    def close(self):
+        self.f.write("\n]\n")
+        self.f.close()
+
+
+class CallbackSink:
+    """
+    Adapts a plain function taking each event dict, e.g. to forward metrics to a monitoring system.
+    """
+
+    def __init__(self, callback: Callable[[dict], Any]):
+        self.callback = callback
+
+    def emit(self, event: dict):
+        self.callback(event)
+
+    def close(self):
+        pass
+
+
+class Recorder:
+    """
+    Structured instrumentation of a build run, sent to pluggable sinks (anything with emit(event) and close(),
+    or a plain function). Events are dicts with an "event" kind and times in seconds since the run started:
+
+    - command: index, label, characters, wall time, and the part of it the transport spent in deliberate sleeps
+      (the rest is typing or waiting for the server), plus the server's response if any;
+    - tool_call: the same totals for each run of consecutive commands sharing a label, i.e. one tool call;
+    - throughput: commands per minute and characters per second over every throughput_interval seconds;
+    - run_start / run_end, the latter with totals for the whole run.
+    """
+
+    def __init__(self, sinks: Iterable[Any] = (), throughput_interval: float = 10.0):
+        self.sinks = []
+        for sink in sinks:
+            self.add_sink(sink)
+        self.throughput_interval = throughput_interval
+        self.t0 = None
+
+    def add_sink(self, sink: Any):
+        self.sinks.append(CallbackSink(sink) if callable(sink) and not hasattr(sink, "emit") else sink)
+
+    def emit(self, event: dict):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def run(self, transport, commands: Iterable[Tuple[int, str, str]]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        transport.run(commands), recording every command the transport confirms. Transports that keep a running total
+        of their deliberate sleeps in `slept` (KeyboardTransport) get the time split into sleeping and typing.
+        """
+        self.t0 = time.perf_counter()
+        self.emit({"event": "run_start", "start": 0.0, "time": time.time(), "transport": type(transport).__name__, "pid": os.getpid()})
+
+        labels = {}
+
+        def tap():
+            for i, label, cmd in commands:
+                labels[i] = label
+                yield i, label, cmd
+
+        totals = {"commands": 0, "characters": 0, "sleeping_seconds": 0.0}
+        group = None # current tool call
+        window = {"start": 0.0, "commands": 0, "characters": 0}
+        last, slept = 0.0, getattr(transport, "slept", 0.0)
+
+        def close_group():
+            if group is not None:
+                self.emit({"event": "tool_call", **group, "seconds": last - group["start"]})
+
+        try:
+            for i, cmd, response in transport.run(tap()):
+                now, now_slept = self._now(), getattr(transport, "slept", 0.0)
+                label = labels.pop(i)
+                sleeping = now_slept - slept
+                event = {"event": "command", "index": i, "label": label, "characters": len(cmd), "start": last, "seconds": now - last,
+                         "sleeping_seconds": sleeping, "typing_seconds": max(now - last - sleeping, 0.0)}
+                if response:
+                    event["response"] = response
+                self.emit(event)
+
+                if group is None or group["label"] != label:
+                    close_group()
+                    group = {"label": label, "first_index": i, "commands": 0, "characters": 0, "sleeping_seconds": 0.0, "start": last}
+                for counts in (group, totals, window):
+                    counts["commands"] += 1
+                    counts["characters"] += len(cmd)
+                group["sleeping_seconds"] += sleeping
+                totals["sleeping_seconds"] += sleeping
+
+                last, slept = now, now_slept
+                if now - window["start"] >= self.throughput_interval:
+                    seconds = now - window["start"]
+                    self.emit({"event": "throughput", "start": window["start"], "seconds": seconds, "commands": window["commands"], "characters": window["characters"],
+                               "commands_per_minute": 60 * window["commands"] / seconds, "characters_per_second": window["characters"] / seconds})
+                    window = {"start": now, "commands": 0, "characters": 0}
+
+                yield i, cmd, response
+        finally:
+            close_group()
+            seconds = self._now()
+            self.emit({"event": "run_end", "start": seconds, "seconds": seconds, **totals,
+                       "commands_per_minute": 60 * totals["commands"] / seconds if seconds > 0 else None,
+                       "characters_per_second": totals["characters"] / seconds if seconds > 0 else None})
+
+def make_recorder(metrics_path: Optional[str] = None, trace_path: Optional[str] = None, throughput_interval: float = 10.0,
+                  sinks: Iterable[Any] = ()) -> Optional[Recorder]:
+    """
+    Recorder writing JSON Lines to metrics_path and/or a Chrome trace to trace_path, plus any extra sinks;
+    None if there is nothing to record to.
+    """
+    sinks = list(sinks)
+    if metrics_path:
+        sinks.append(JsonlSink(metrics_path))
+    if trace_path:
+        sinks.append(ChromeTraceSink(trace_path))
+    return Recorder(sinks, throughput_interval=throughput_interval) if sinks else None
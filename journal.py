@@ -0,0 +1,77 @@
+import os
+import time
+import hashlib
+
+from typing import Optional, Tuple
+
+RECORD_SIZE = 30 # "<12-digit index> <16 hex digest>\n"
+SYNC_EVERY = 64 # records between fsyncs
+SYNC_INTERVAL = 1.0 # seconds between fsyncs
+
+def command_digest(cmd: str) -> str:
+    return hashlib.sha1(cmd.encode("utf-8")).hexdigest()[:16]
+
+class Journal:
+    """
+    Append-only progress log of submitted commands, one fixed-width record per command.
+    Fixed-width records let the last confirmed command be read with a single seek, however long the build.
+    Every record is flushed to the OS as it is written, so it survives the process crashing, but only fsync'd
+    every sync_every records or sync_interval seconds (and on exit): an OS crash or power loss can lose the
+    last few, which --resume then enters again.
+    """
+
+    def __init__(self, path: str, sync_every: int = SYNC_EVERY, sync_interval: float = SYNC_INTERVAL):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.f = None
+        self.unsynced = 0
+        self.synced_at = 0.0
+
+    def __enter__(self):
+        self.f = open(self.path, "ab")
+        size = self.f.seek(0, os.SEEK_END)
+        if size % RECORD_SIZE: # drop a record torn by a crash, so appends stay aligned
+            self.f.truncate(size - size % RECORD_SIZE)
+        self.unsynced, self.synced_at = 0, time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        if self.unsynced:
+            self.sync()
+        self.f.close()
+        self.f = None
+
+    def last(self) -> Optional[Tuple[int, str]]:
+        """
+        (index, digest) of the last complete record, ignoring a torn final write, or None if there is none.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                end = size - size % RECORD_SIZE
+                if end == 0:
+                    return None
+                f.seek(end - RECORD_SIZE)
+                index, digest = f.read(RECORD_SIZE).decode("ascii").split()
+                return int(index), digest
+        except FileNotFoundError:
+            return None
+
+    def reset(self):
+        """
+        Starts a fresh journal, for a run that is not resuming.
+        """
+        with open(self.path, "wb"):
+            pass
+
+    def append(self, index: int, cmd: str):
+        self.f.write(f"{index:012d} {command_digest(cmd)}\n".encode("ascii"))
+        self.f.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every or time.monotonic() - self.synced_at >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self.f.fileno())
+        self.unsynced, self.synced_at = 0, time.monotonic()
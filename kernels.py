@@ -0,0 +1,87 @@
+import functools
+
+import numpy as np
+
+from typing import Optional, Tuple
+
+KERNEL_CACHE_SIZE = 256 # distinct shapes kept per kernel
+
+def _frozen(mask: np.ndarray) -> np.ndarray:
+    mask.flags.writeable = False # shared between callers through the caches
+    return mask
+
+@functools.lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def cross_section(r: int, shape: str, hollow: bool = False) -> np.ndarray:
+    """
+    (2r+1) x (2r+1) mask of a beam's cross-section, as used by the axis-aligned circular trims:
+    a disc keeps u^2+v^2 <= r^2 and its hollow version removes u^2+v^2 < (r-1)^2; a hollow square keeps a 1-block rim.
+    """
+    u, v = np.ogrid[-r:r + 1, -r:r + 1]
+    if shape == "circular":
+        mask = u * u + v * v <= r * r
+        if hollow:
+            mask &= ~(u * u + v * v < (r - 1) * (r - 1))
+    else:
+        mask = np.ones((2 * r + 1, 2 * r + 1), dtype=bool)
+        if hollow:
+            mask &= np.maximum(abs(u), abs(v)) >= r
+    return _frozen(mask)
+
+def _row_spans(mask: np.ndarray, r: int) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """
+    (first, last) offset of the True cells of each row of a (2r+1)-wide mask, None for empty rows.
+    """
+    any_ = mask.any(axis=1)
+    first = mask.argmax(axis=1) - r
+    last = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1) - r
+    return tuple((int(a), int(b)) if ok else None for ok, a, b in zip(any_, first, last))
+
+@functools.lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def disc_spans(r: int) -> Tuple[Tuple[int, Tuple[int, int], Optional[Tuple[int, int]]], ...]:
+    """
+    Spans of a disc of radius r, row by row: (u, (first, last) offset with u^2+v^2 <= r^2,
+    (first, last) offset with u^2+v^2 < (r-1)^2 or None), for u from -r to r.
+    """
+    u, v = np.ogrid[-r:r + 1, -r:r + 1]
+    outer = _row_spans(u * u + v * v <= r * r, r)
+    inner = _row_spans(u * u + v * v < (r - 1) * (r - 1), r)
+    return tuple((k - r, o, i) for k, (o, i) in enumerate(zip(outer, inner)))
+
+def shell(mask: np.ndarray) -> np.ndarray:
+    """
+    Cells of a 3D mask with at least one of their 6 neighbours outside it.
+    """
+    padded = np.pad(mask, 1)
+    interior = mask.copy()
+    for a in range(3):
+        for shift in (-1, 1):
+            interior &= np.roll(padded, shift, axis=a)[1:-1, 1:-1, 1:-1]
+    return mask & ~interior
+
+@functools.lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def ellipsoid_mask(rx: int, ry: int, rz: int, hollow: bool = False, part: str = "full") -> np.ndarray:
+    """
+    (2rx+1, 2ry+1, 2rz+1) mask of the ellipsoid (u/rx)^2 + (v/ry)^2 + (w/rz)^2 <= 1 around the center cell
+    (a zero radius gives a 1-block-thick disc), only its upper (v >= 0) or lower (v <= 0) half with part,
+    and only its 1-block-thick surface if hollow (a hollow half is open at the cut, like a dome).
+    """
+    u, v, w = np.ogrid[-rx:rx + 1, -ry:ry + 1, -rz:rz + 1]
+    mask = (u / max(rx, 0.5)) ** 2 + (v / max(ry, 0.5)) ** 2 + (w / max(rz, 0.5)) ** 2 <= 1 + 1e-9
+    if hollow:
+        mask = shell(mask)
+    if part == "upper":
+        mask &= v >= 0
+    elif part == "lower":
+        mask &= v <= 0
+    return _frozen(mask)
+
+@functools.lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def cone_mask(r: int, height: int, hollow: bool = False) -> np.ndarray:
+    """
+    (2r+1, height+1, 2r+1) mask of an upright cone: the layer at height k is the disc u^2+w^2 <= (r (height-k) / height)^2,
+    from the base (radius r) up to the tip (a single block), and only its 1-block-thick surface if hollow.
+    """
+    u, k, w = np.ogrid[-r:r + 1, 0:height + 1, -r:r + 1]
+    radius = r * (height - k) / height if height else np.full(k.shape, float(r)) # a flat cone is just its base
+    mask = u * u + w * w <= radius * radius + 1e-9
+    return _frozen(shell(mask) if hollow else mask)
@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+
+from typing import TYPE_CHECKING, Any, List, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.messages import AIMessage, BaseMessage
+
+DEFAULT_LLM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vibecraft", "llm")
+DEFAULT_LLM_CACHE_SIZE = 256 << 20 # bytes
+
+def response_key(messages: List["BaseMessage"], model: str, model_provider: str, tools: Optional[list] = None, **options) -> str:
+    """
+    Content address of an LLM request: hash of the messages (system prompt included), model, provider,
+    the JSON schemas of the bound tools and any other request options.
+    """
+    request = {
+        "messages": [[message.type, message.content] for message in messages],
+        "model": model,
+        "model_provider": model_provider,
+        "tools": tools or [],
+        **options,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent LLM response cache, one JSON file per response in `cache_dir`.
+    Hits refresh the file's mtime; when the cache grows beyond `max_bytes` the least recently used responses are evicted.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_LLM_CACHE_DIR, max_bytes: int = DEFAULT_LLM_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size = None # bytes on disk, scanned on the first write
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional["AIMessage"]:
+        from langchain_core.messages import AIMessage
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return AIMessage(content=data["content"], tool_calls=data["tool_calls"])
+
+    def put(self, key: str, message: "AIMessage"):
+        """
+        Stores a response atomically, then evicts the least recently used responses if over budget.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump({"content": message.content, "tool_calls": message.tool_calls}, f)
+        size = os.path.getsize(tmp)
+        try:
+            size -= os.path.getsize(path)
+        except OSError:
+            pass
+        os.replace(tmp, path)
+
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self._entries())
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Any]:
+        try:
+            return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def evict(self):
+        """
+        Removes least recently used responses until the cache fits in max_bytes.
+        """
+        entries = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._entries()))
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
@@ -0,0 +1,101 @@
+import gzip
+import struct
+
+import numpy as np
+
+from typing import Any, BinaryIO, Dict, Tuple
+
+# NBT tag ids
+TAG_END, TAG_BYTE, TAG_SHORT, TAG_INT, TAG_LONG, TAG_FLOAT, TAG_DOUBLE = 0, 1, 2, 3, 4, 5, 6
+TAG_BYTE_ARRAY, TAG_STRING, TAG_LIST, TAG_COMPOUND, TAG_INT_ARRAY, TAG_LONG_ARRAY = 7, 8, 9, 10, 11, 12
+
+def _name(name: str) -> bytes:
+    data = name.encode("utf-8")
+    return struct.pack(">H", len(data)) + data
+
+class NBTWriter:
+    """
+    Minimal streaming writer for (big-endian, Java Edition) NBT.
+    Compounds and lists are opened and closed explicitly so large payloads can be written piece by piece.
+    """
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+
+    def tag(self, tag_type: int, name: str):
+        self.f.write(bytes([tag_type]) + _name(name))
+
+    def begin_compound(self, name: str = ""):
+        self.tag(TAG_COMPOUND, name)
+
+    def end_compound(self):
+        self.f.write(bytes([TAG_END]))
+
+    def begin_list(self, name: str, element_type: int, length: int):
+        self.tag(TAG_LIST, name)
+        self.f.write(struct.pack(">bi", element_type, length))
+
+    def begin_byte_array(self, name: str, length: int):
+        self.tag(TAG_BYTE_ARRAY, name)
+        self.f.write(struct.pack(">i", length))
+
+    def short(self, name: str, value: int):
+        self.tag(TAG_SHORT, name)
+        self.f.write(struct.pack(">h", value))
+
+    def int(self, name: str, value: int):
+        self.tag(TAG_INT, name)
+        self.f.write(struct.pack(">i", value))
+
+    def string(self, name: str, value: str):
+        self.tag(TAG_STRING, name)
+        self.f.write(_name(value))
+
+    def int_array(self, name: str, values):
+        self.tag(TAG_INT_ARRAY, name)
+        self.f.write(struct.pack(f">i{len(values)}i", len(values), *values))
+
+    def int_list(self, name: str, values):
+        self.begin_list(name, TAG_INT, len(values))
+        self.f.write(struct.pack(f">{len(values)}i", *values))
+
+    def raw(self, data: bytes):
+        self.f.write(data)
+
+
+_SCALARS = {TAG_BYTE: ">b", TAG_SHORT: ">h", TAG_INT: ">i", TAG_LONG: ">q", TAG_FLOAT: ">f", TAG_DOUBLE: ">d"}
+_ARRAYS = {TAG_BYTE_ARRAY: ">i1", TAG_INT_ARRAY: ">i4", TAG_LONG_ARRAY: ">i8"}
+
+def _read(f: BinaryIO, fmt: str):
+    return struct.unpack(fmt, f.read(struct.calcsize(fmt)))[0]
+
+def _read_payload(f: BinaryIO, tag_type: int) -> Any:
+    if tag_type in _SCALARS:
+        return _read(f, _SCALARS[tag_type])
+    if tag_type in _ARRAYS:
+        n = _read(f, ">i")
+        dtype = np.dtype(_ARRAYS[tag_type])
+        return np.frombuffer(f.read(n * dtype.itemsize), dtype=dtype)
+    if tag_type == TAG_STRING:
+        return f.read(_read(f, ">H")).decode("utf-8")
+    if tag_type == TAG_LIST:
+        element_type, n = _read(f, ">b"), _read(f, ">i")
+        return [_read_payload(f, element_type) for _ in range(n)]
+    if tag_type == TAG_COMPOUND:
+        out = {}
+        while True:
+            child = _read(f, ">b")
+            if child == TAG_END:
+                return out
+            name = f.read(_read(f, ">H")).decode("utf-8")
+            out[name] = _read_payload(f, child)
+    raise ValueError(f"Unknown NBT tag type: {tag_type}")
+
+def load(path: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Reads a gzip-compressed NBT file into (root name, nested dicts/lists/NumPy arrays).
+    """
+    with gzip.open(path, "rb") as f:
+        tag_type = _read(f, ">b")
+        name = f.read(_read(f, ">H")).decode("utf-8")
+        return name, _read_payload(f, tag_type)
@@ -0,0 +1,15 @@
+import re
+
+from typing import List, Tuple
+
+STEP_PATTERN = re.compile(r"^\s*(?:step\s*)?\d+\s*[.):]", re.IGNORECASE | re.MULTILINE)
+
+def split_plan(refined_prompt: str) -> Tuple[str, List[str]]:
+    """
+    Splits a refined prompt into its preamble and its numbered construction plan steps.
+    """
+    starts = [m.start() for m in STEP_PATTERN.finditer(refined_prompt)]
+    if not starts:
+        return refined_prompt, []
+    ends = starts[1:] + [len(refined_prompt)]
+    return refined_prompt[:starts[0]], [refined_prompt[a:b].strip() for a, b in zip(starts, ends)]
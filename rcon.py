@@ -0,0 +1,243 @@
+import time
+import socket
+import struct
+import threading
+import socketserver
+
+from collections import OrderedDict, deque
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Source RCON packet types
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# responses meaning the command did nothing but would succeed if sent again later
+RETRYABLE_RESPONSES = ("That position is not loaded",)
+# responses meaning the command failed and changed nothing ("No blocks were filled" is a fill that was already in place)
+ERROR_RESPONSES = RETRYABLE_RESPONSES + (
+    "Too many blocks in the specified area",
+    "Unknown or incomplete command",
+    "Incorrect argument for command",
+    "Unknown block type",
+    "Invalid",
+    "Expected",
+)
+
+class RconError(Exception):
+    pass
+
+class RconCommandError(RconError):
+    """
+    A command the server answered with an error (after any retries), so it must not be recorded as done.
+    """
+
+    def __init__(self, key: Any, cmd: str, response: str):
+        super().__init__(f"Command {key} failed: {cmd} -> {response}")
+        self.key = key
+        self.cmd = cmd
+        self.response = response
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("RCON connection closed")
+        data += chunk
+    return data
+
+def read_packet(sock: socket.socket) -> Tuple[int, int, str]:
+    (length,) = struct.unpack("<i", _recv_exact(sock, 4))
+    payload = _recv_exact(sock, length)
+    request_id, packet_type = struct.unpack("<ii", payload[:8])
+    return request_id, packet_type, payload[8:-2].decode("utf-8", errors="replace")
+
+
+class RconClient:
+    """
+    Source RCON client keeping one persistent, authenticated socket.
+    Commands are pipelined with up to `window` requests in flight and matched to responses by request id.
+    Note that vanilla servers close the connection if several packets arrive in a single read, so window > 1
+    is only safe with servers or proxies that parse the stream properly.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 25575, password: str = "", timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.sock = None
+        self._request_id = 0
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_id(self) -> int:
+        self._request_id = self._request_id % 0x7FFFFFFF + 1
+        return self._request_id
+
+    def connect(self):
+        self.close()
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        auth_id = self._next_id()
+        self.sock.sendall(encode_packet(auth_id, SERVERDATA_AUTH, self.password))
+        while True:
+            request_id, packet_type, _ = read_packet(self.sock)
+            if packet_type == SERVERDATA_AUTH_RESPONSE:
+                break
+        if request_id == -1:
+            self.close()
+            raise RconError("RCON authentication failed")
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def command(self, cmd: str) -> str:
+        for _, _, response in self.pipeline([(None, cmd)]):
+            return response
+
+    def pipeline(self, commands: Iterable[Tuple[Any, str]], window: int = 1, retries: int = 3, backoff: float = 0.5,
+                 retry_on: Tuple[str, ...] = RETRYABLE_RESPONSES, fail_on: Tuple[str, ...] = ERROR_RESPONSES) -> Iterator[Tuple[Any, str, str]]:
+        """
+        Sends (key, command) pairs and yields (key, command, response) as responses come back.
+        On a dropped connection every unanswered command is resent, in order, after reconnecting with a halved window;
+        commands answered with a retryable response are resent up to `retries` times.
+        A command still answered with an error response (fail_on) is never yielded: RconCommandError is raised instead.
+        """
+        pending = iter(commands)
+        exhausted = False
+        inflight = OrderedDict() # request id -> (key, cmd, attempts)
+        requeued = deque()
+
+        while True:
+            try:
+                while len(inflight) < window:
+                    if requeued:
+                        key, cmd, attempts = requeued.popleft()
+                    elif not exhausted:
+                        try:
+                            key, cmd = next(pending)
+                            attempts = 0
+                        except StopIteration:
+                            exhausted = True
+                            break
+                    else:
+                        break
+                    request_id = self._next_id()
+                    inflight[request_id] = (key, cmd, attempts)
+                    self.sock.sendall(encode_packet(request_id, SERVERDATA_EXECCOMMAND, cmd.lstrip("/")))
+                if not inflight:
+                    return
+                request_id, _, response = read_packet(self.sock)
+            except OSError as e:
+                retry = list(inflight.values())
+                inflight.clear()
+                attempts = max(a for _, _, a in retry) if retry else 0
+                if attempts >= retries:
+                    raise RconError(f"RCON connection lost {attempts + 1} times, giving up") from e
+                requeued.extendleft(reversed([(key, cmd, a + 1) for key, cmd, a in retry]))
+                window = max(1, window // 2) # back off towards stop-and-wait, e.g. on a vanilla server
+                time.sleep(backoff * 2 ** attempts)
+                self.connect()
+                continue
+
+            if request_id not in inflight: # continuation of a fragmented response
+                continue
+            key, cmd, attempts = inflight.pop(request_id)
+            if response.startswith(retry_on) and attempts < retries:
+                time.sleep(backoff * 2 ** attempts)
+                requeued.append((key, cmd, attempts + 1))
+                continue
+            if response.startswith(fail_on):
+                raise RconCommandError(key, cmd, response)
+            yield key, cmd, response
+
+
+class FakeRconServer:
+    """
+    Local stand-in for a Minecraft server's RCON endpoint, for tests and throughput benchmarks.
+    Every command is recorded in `commands` and answered with handler(command) after `latency` seconds.
+    With vanilla_framing, a read containing more than one packet drops the connection, like vanilla Minecraft.
+    """
+
+    def __init__(self, password: str = "", handler: Optional[Callable[[str], str]] = None, latency: float = 0.0,
+                 vanilla_framing: bool = False, host: str = "127.0.0.1", port: int = 0):
+        self.password = password
+        self.handler = handler or (lambda cmd: "")
+        self.latency = latency
+        self.vanilla_framing = vanilla_framing
+        self.commands: List[str] = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._serve(self.request)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.allow_reuse_address = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _serve(self, sock: socket.socket):
+        authenticated = False
+        buf = b""
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            if self.vanilla_framing and not buf and len(data) >= 4 and struct.unpack("<i", data[:4])[0] != len(data) - 4:
+                return
+            buf += data
+            while len(buf) >= 4 and len(buf) >= 4 + struct.unpack("<i", buf[:4])[0]:
+                length = struct.unpack("<i", buf[:4])[0]
+                request_id, packet_type = struct.unpack("<ii", buf[4:12])
+                body = buf[12:4 + length - 2].decode("utf-8")
+                buf = buf[4 + length:]
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = body == self.password
+                    sock.sendall(encode_packet(request_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE, ""))
+                elif not authenticated:
+                    return
+                else:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    with self._lock:
+                        self.commands.append(body)
+                        response = self.handler(body)
+                    sock.sendall(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, response))
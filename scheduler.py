@@ -0,0 +1,208 @@
+import heapq
+
+import numpy as np
+
+from collections import defaultdict
+from typing import Iterable, List, Set, Tuple
+
+from voxels import Fill, greedy_boxes
+
+CHUNK_SIZE = 16
+MAX_FORCELOAD_CHUNKS = 256 # per /forceload add
+MAX_LOADED_CHUNKS = 64 # forceloaded chunks kept around for nearby regions before the least recently used are released
+CHUNK_LOADING = ("forceload", "tp", "none")
+OVERWRITING_MODES = ("replace", "destroy", "hollow") # fill modes setting every block of the box
+
+def chunks_of(fill: Fill) -> List[Tuple[int, int]]:
+    """
+    (chunk x, chunk z) of every chunk the fill touches.
+    """
+    return [(cx, cz) for cx in range(fill.x1 // CHUNK_SIZE, fill.x2 // CHUNK_SIZE + 1)
+                     for cz in range(fill.z1 // CHUNK_SIZE, fill.z2 // CHUNK_SIZE + 1)]
+
+def sections_of(fill: Fill) -> List[Tuple[int, int, int]]:
+    """
+    (section x, y, z) of every 16x16x16 chunk section the fill touches.
+    """
+    return [(sx, sy, sz) for sx in range(fill.x1 // CHUNK_SIZE, fill.x2 // CHUNK_SIZE + 1)
+                         for sy in range(fill.y1 // CHUNK_SIZE, fill.y2 // CHUNK_SIZE + 1)
+                         for sz in range(fill.z1 // CHUNK_SIZE, fill.z2 // CHUNK_SIZE + 1)]
+
+def region_of(fill: Fill, region_size: int) -> Tuple[int, int]:
+    """
+    The region_size x region_size chunk region containing the fill's center.
+    """
+    cx = (fill.x1 + fill.x2) // 2 // CHUNK_SIZE
+    cz = (fill.z1 + fill.z2) // 2 // CHUNK_SIZE
+    return cx // region_size, cz // region_size
+
+def commutes(a: Fill, b: Fill) -> bool:
+    """
+    Whether two fills give the same result in either order: each sets blocks to the same block or leaves them be
+    (only hollow also clears the inside to air).
+    """
+    return a.block == b.block and a.mode != "hollow" and b.mode != "hollow"
+
+def fill_dependencies(fills: List[Fill]) -> Tuple[List[List[int]], List[int]]:
+    """
+    Dependency DAG of a sequence of fills, as (successors, indegree): fill j depends on an earlier fill i
+    if their cuboids overlap and they do not commute. Any order respecting it builds the same world.
+    """
+    n = len(fills)
+    successors = [[] for _ in range(n)]
+    indegree = [0] * n
+    touching = defaultdict(list) # section -> (fill, index) of the fills touching it so far
+    for j, fill in enumerate(fills):
+        x1, y1, z1, x2, y2, z2 = fill[:6]
+        predecessors = set()
+        for section in sections_of(fill):
+            entries = touching[section]
+            overlapping = [(other, i) for other, i in entries
+                           if other.x1 <= x2 and other.x2 >= x1 and other.y1 <= y2 and other.y2 >= y1 and other.z1 <= z2 and other.z2 >= z1]
+            # Fills inside one that overwrites its whole box no longer show: ordering them before it (even where not needed)
+            # lets later fills be ordered against this one only, which keeps the lists short where fills pile up
+            covered = {i for other, i in overlapping if fill.mode in OVERWRITING_MODES
+                       and x1 <= other.x1 and other.x2 <= x2 and y1 <= other.y1 and other.y2 <= y2 and z1 <= other.z1 and other.z2 <= z2}
+            predecessors.update(i for other, i in overlapping if i in covered or not commutes(other, fill))
+            if covered:
+                entries[:] = [(other, i) for other, i in entries if i not in covered]
+            entries.append((fill, j))
+        for i in predecessors:
+            successors[i].append(j)
+        indegree[j] = len(predecessors)
+    return successors, indegree
+
+def command_dependencies(commands: List[str]) -> Tuple[List[List[int]], List[int]]:
+    """
+    Dependency DAG of a sequence of commands, as (successors, indegree), from fill_dependencies.
+    Commands other than plain fills are barriers: they come after everything before them and before everything after.
+    """
+    n = len(commands)
+    successors = [[] for _ in range(n)]
+    indegree = [0] * n
+    barrier = None
+    segment = [] # (position, fill) since the last barrier
+
+    def flush():
+        fill_successors, fill_indegree = fill_dependencies([fill for _, fill in segment])
+        for (p, _), after, degree in zip(segment, fill_successors, fill_indegree):
+            successors[p].extend(segment[k][0] for k in after)
+            indegree[p] += degree
+        segment.clear()
+
+    for p, cmd in enumerate(commands):
+        fill = Fill.parse(cmd)
+        if barrier is not None:
+            successors[barrier].append(p)
+            indegree[p] += 1
+        if fill is not None:
+            segment.append((p, fill))
+            continue
+        for q, _ in segment:
+            successors[q].append(p)
+            indegree[p] += 1
+        flush()
+        barrier = p
+    flush()
+    return successors, indegree
+
+def schedule_fills(fills: List[Fill], region_size: int = 4) -> List[List[int]]:
+    """
+    Reorders fills region by region, returning the visits as lists of indices into fills.
+    Fills depending on each other (fill_dependencies) keep their relative order, so the result is the same as in the original order.
+    Each visit runs every fill of its region that is ready, including those unblocked during the visit,
+    then moves on to the nearest region with ready fills.
+    """
+    n = len(fills)
+    successors, indegree = fill_dependencies(fills)
+
+    regions = [region_of(fill, region_size) for fill in fills]
+    ready = defaultdict(list) # region -> heap of ready fills, in original order
+    for j in range(n):
+        if indegree[j] == 0:
+            ready[regions[j]].append(j)
+
+    visits = []
+    current = regions[0] if n else None
+    while ready:
+        if current not in ready:
+            current = min(ready, key=lambda r: (abs(r[0] - current[0]) + abs(r[1] - current[1]), -len(ready[r]), r))
+        heap = ready[current]
+        heapq.heapify(heap)
+        visit = []
+        while heap:
+            j = heapq.heappop(heap)
+            visit.append(j)
+            for k in successors[j]:
+                indegree[k] -= 1
+                if indegree[k] == 0:
+                    heapq.heappush(ready[regions[k]], k)
+        del ready[current]
+        visits.append(visit)
+    return visits
+
+def chunk_rectangles(chunks: Set[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    """
+    Covers a set of chunks with disjoint rectangles (cx1, cz1, cx2, cz2) of at most MAX_FORCELOAD_CHUNKS chunks each.
+    """
+    if not chunks:
+        return []
+    xs, zs = zip(*chunks)
+    x0, z0 = min(xs), min(zs)
+    mask = np.zeros((max(xs) - x0 + 1, 1, max(zs) - z0 + 1), dtype=bool)
+    mask[np.array(xs) - x0, 0, np.array(zs) - z0] = True
+    return [(x0 + xa, z0 + za, x0 + xb, z0 + zb) for xa, _, za, xb, _, zb in greedy_boxes(mask, max_volume=MAX_FORCELOAD_CHUNKS)]
+
+def forceload_commands(action: str, chunks: Set[Tuple[int, int]]) -> List[str]:
+    return [f"forceload {action} {cx1 * CHUNK_SIZE} {cz1 * CHUNK_SIZE} {cx2 * CHUNK_SIZE + CHUNK_SIZE - 1} {cz2 * CHUNK_SIZE + CHUNK_SIZE - 1}"
+            for cx1, cz1, cx2, cz2 in chunk_rectangles(chunks)]
+
+def schedule_commands(commands: Iterable[Tuple[str, str]], region_size: int = 4, chunk_loading: str = "forceload",
+                      max_loaded: int = MAX_LOADED_CHUNKS) -> List[Tuple[str, str]]:
+    """
+    Reorders (label, command) pairs for spatial locality with schedule_fills and makes sure every fill targets
+    loaded terrain. With "forceload", each visit force-loads the chunks its fills touch; once more than max_loaded
+    chunks are held, the least recently used ones that the visit does not need are released (all are at the end).
+    With "tp", the player is teleported above the middle of each visit instead, relying on the view distance to load it.
+    Commands other than plain fills are kept in place, as barriers that fills are not moved across.
+    """
+    if chunk_loading not in CHUNK_LOADING:
+        raise ValueError(f"Invalid chunk_loading value: {chunk_loading}")
+
+    scheduled = []
+    loaded = {} # chunk -> visit that last needed it
+    visits = 0
+
+    def flush(segment: List[Tuple[str, Fill, str]]):
+        nonlocal visits
+        for visit in schedule_fills([fill for _, fill, _ in segment], region_size=region_size):
+            fills = [segment[j][1] for j in visit]
+            visits += 1
+            if chunk_loading == "forceload":
+                needed = {chunk for fill in fills for chunk in chunks_of(fill)}
+                stale = sorted((v, chunk) for chunk, v in loaded.items() if chunk not in needed)
+                excess = len(loaded) + len(needed - loaded.keys()) - max_loaded
+                released = {chunk for _, chunk in stale[:max(excess, 0)]}
+                scheduled.extend(("chunk loading (scheduler)", cmd) for cmd in forceload_commands("remove", released))
+                scheduled.extend(("chunk loading (scheduler)", cmd) for cmd in forceload_commands("add", needed - loaded.keys()))
+                for chunk in released:
+                    del loaded[chunk]
+                loaded.update((chunk, visits) for chunk in needed)
+            elif chunk_loading == "tp":
+                x = (min(f.x1 for f in fills) + max(f.x2 for f in fills)) // 2
+                z = (min(f.z1 for f in fills) + max(f.z2 for f in fills)) // 2
+                scheduled.append(("chunk loading (scheduler)", f"tp @s {x} {max(f.y2 for f in fills) + 2} {z}"))
+            scheduled.extend((segment[j][0], segment[j][2]) for j in visit)
+        segment.clear()
+
+    segment = []
+    for label, cmd in commands:
+        fill = Fill.parse(cmd)
+        if fill is None:
+            flush(segment)
+            scheduled.append((label, cmd))
+        else:
+            segment.append((label, fill, cmd))
+    flush(segment)
+    scheduled.extend(("chunk loading (scheduler)", cmd) for cmd in forceload_commands("remove", set(loaded)))
+    return scheduled
@@ -0,0 +1,306 @@
+import tempfile
+
+import numpy as np
+
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from voxels import AIR, Fill, VoxelGrid
+
+SECTION_SIZE = 16
+SECTION_VOLUME = SECTION_SIZE ** 3
+DENSE_SECTIONS = 4096 # unpacked sections kept for writing, 8 KiB each
+
+def section_bits(palette_size: int) -> int:
+    """
+    Bits per index for a section palette of palette_size blocks: none for a single block, otherwise rounded up to 1, 2, 4, 8 or 16
+    so that indices never span bytes (Minecraft rounds block indices up to at least 4 bits and does not span 64-bit words either).
+    """
+    bits = (palette_size - 1).bit_length()
+    return 1 << (bits - 1).bit_length() if bits else 0
+
+def packed_words(bits: int) -> int:
+    return SECTION_VOLUME * bits // 64
+
+def _squeeze(v: np.ndarray, bits: int) -> np.ndarray:
+    x = v.view(np.uint16) # neighbouring pairs of bits-wide values in one go
+    return (x | (x >> np.uint16(8 - bits))).astype(np.uint8)
+
+def _spread(v: np.ndarray, bits: int) -> np.ndarray:
+    x = v.astype(np.uint16)
+    return ((x & np.uint16((1 << bits) - 1)) | ((x >> np.uint16(bits)) << np.uint16(8))).view(np.uint8)
+
+def pack(indices: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Packs a section's SECTION_VOLUME indices into packed_words(bits) words, index k at bits k*bits of the little-endian stream.
+    """
+    if bits == 16:
+        return np.ascontiguousarray(indices, dtype=np.uint16).ravel().view(np.uint64)
+    v = np.ascontiguousarray(indices, dtype=np.uint8).ravel()
+    if bits == 1:
+        return np.packbits(v, bitorder="little").view(np.uint64)
+    while bits < 8:
+        v, bits = _squeeze(v, bits), 2 * bits
+    return v.view(np.uint64)
+
+def unpack(words: np.ndarray, bits: int) -> np.ndarray:
+    if bits == 16:
+        return words.view(np.uint16)
+    v = words.view(np.uint8)
+    if bits == 1:
+        return np.unpackbits(v, bitorder="little")
+    width = 8
+    while width > bits:
+        width //= 2
+        v = _spread(v, width)
+    return v
+
+
+class WordArena:
+    """
+    Growable pool of 64-bit words, in memory or (with memmap_dir) in a memory-mapped temporary file there,
+    handed out in slots that are recycled per slot size.
+    """
+
+    def __init__(self, memmap_dir: Optional[str] = None, capacity: int = 1 << 16):
+        self.file = tempfile.TemporaryFile(dir=memmap_dir) if memmap_dir else None
+        self.words = self._allocate(capacity)
+        self.used = 0
+        self.free: Dict[int, List[int]] = {}
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.file is None:
+            return np.zeros(capacity, dtype=np.uint64)
+        self.file.truncate(capacity * 8)
+        return np.memmap(self.file, dtype=np.uint64, mode="r+", shape=(capacity,))
+
+    def alloc(self, n: int) -> int:
+        if self.free.get(n):
+            return self.free[n].pop()
+        if self.used + n > len(self.words):
+            capacity = max(2 * len(self.words), self.used + n)
+            if self.file is None:
+                words = self._allocate(capacity)
+                words[:self.used] = self.words[:self.used]
+                self.words = words
+            else:
+                self.words.flush()
+                self.words = self._allocate(capacity) # the file keeps the words written so far
+        offset = self.used
+        self.used += n
+        return offset
+
+    def release(self, offset: int, n: int):
+        self.free.setdefault(n, []).append(offset)
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * (self.used - sum(n * len(slots) for n, slots in self.free.items()))
+
+    def close(self):
+        self.words = None
+        if self.file is not None:
+            self.file.close()
+
+
+class Section(NamedTuple):
+    """
+    A stored section: the global ids of the blocks it holds, how many cells hold each,
+    and its cells as bits-wide indices into palette at offset in the arena (bits 0 and no words for a single-block section).
+    """
+    palette: np.ndarray
+    counts: np.ndarray
+    bits: int = 0
+    offset: int = -1
+
+
+class SectionStore:
+    """
+    Sparse voxel store of the result of a sequence of /fill commands, kept like Minecraft keeps chunks:
+    16x16x16 sections, each with a palette of the blocks it holds and its cells as bit-packed indices into it.
+    Sections no command touched are not stored and single-block sections store no indices, so memory follows
+    how varied the build is rather than its volume. Recently written sections are kept unpacked (up to dense_sections),
+    and the packed indices live in a WordArena, memory-mapped from a file in memmap_dir if given.
+    Like VoxelGrid, global id 0 means the cell was never touched by any command.
+    """
+
+    def __init__(self, memmap_dir: Optional[str] = None, dense_sections: int = DENSE_SECTIONS):
+        self.arena = WordArena(memmap_dir)
+        self.sections: Dict[Tuple[int, int, int], Section] = {}
+        self.dense: "OrderedDict[Tuple[int, int, int], np.ndarray]" = OrderedDict()
+        self.dense_sections = dense_sections
+        self.palette: List[Optional[str]] = [None]
+        self._index = {}
+
+    def __enter__(self) -> "SectionStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.dense.clear()
+        self.sections.clear()
+        self.arena.close()
+
+    block_index = VoxelGrid.block_index # the same global palette ids as VoxelGrid
+
+    def _unpacked(self, key: Tuple[int, int, int]) -> np.ndarray:
+        """
+        The section's cells as global ids, unpacked into the write cache (evicting and packing the least recently used).
+        """
+        cells = self.dense.get(key)
+        if cells is not None:
+            self.dense.move_to_end(key)
+            return cells
+        section = self.sections.get(key)
+        if section is None:
+            cells = np.zeros((SECTION_SIZE,) * 3, dtype=np.uint16)
+        elif section.bits == 0:
+            cells = np.full((SECTION_SIZE,) * 3, section.palette[0], dtype=np.uint16)
+        else:
+            words = self.arena.words[section.offset:section.offset + packed_words(section.bits)]
+            cells = section.palette.take(unpack(words, section.bits)).reshape((SECTION_SIZE,) * 3)
+        self.dense[key] = cells
+        while len(self.dense) > self.dense_sections:
+            self._pack(*self.dense.popitem(last=False))
+        return cells
+
+    def _store(self, key: Tuple[int, int, int], section: Optional[Section]):
+        old = self.sections.pop(key, None)
+        if old is not None and old.bits:
+            self.arena.release(old.offset, packed_words(old.bits))
+        if section is not None:
+            self.sections[key] = section
+
+    def _pack(self, key: Tuple[int, int, int], cells: np.ndarray):
+        counts = np.bincount(cells.ravel(), minlength=len(self.palette)) # cheaper than sorting the cells with np.unique
+        palette = np.flatnonzero(counts).astype(np.uint16)
+        counts = counts[palette]
+        bits = section_bits(len(palette))
+        if not bits:
+            self._store(key, Section(palette, counts) if palette[0] else None)
+            return
+        lut = np.zeros(len(self.palette), dtype=np.uint16)
+        lut[palette] = np.arange(len(palette))
+        offset = self.arena.alloc(packed_words(bits))
+        self.arena.words[offset:offset + packed_words(bits)] = pack(lut.take(cells), bits)
+        self._store(key, Section(palette, counts, bits, offset))
+
+    def _fill_section(self, key: Tuple[int, int, int], v: int):
+        self.dense.pop(key, None)
+        self._store(key, Section(np.array([v], dtype=np.uint16), np.array([SECTION_VOLUME])))
+
+    def flush(self):
+        """
+        Packs every unpacked section, so that sections holds the whole store.
+        """
+        while self.dense:
+            self._pack(*self.dense.popitem(last=False))
+
+    def apply(self, fill: Fill):
+        """
+        Applies one /fill with Minecraft's semantics, treating untouched cells as air, section by section.
+        A section the fill covers entirely, or that is inside a hollow fill's interior, is set without unpacking it.
+        """
+        v = self.block_index(fill.block)
+        air = self.block_index(AIR)
+        shelled = fill.mode in ("outline", "hollow")
+        axes = [] # per axis and section: (section, slice of the overlap, covers the section, clear of the fill's faces, face cells)
+        for l, h in zip(fill[:3], fill[3:6]):
+            spans = []
+            for s in range(l // SECTION_SIZE, h // SECTION_SIZE + 1):
+                base = s * SECTION_SIZE
+                p, q = max(l, base), min(h, base + SECTION_SIZE - 1)
+                g = np.arange(p, q + 1)
+                spans.append((s, slice(p - base, q - base + 1), q - p + 1 == SECTION_SIZE, l < p and q < h, (g == l) | (g == h)))
+            axes.append(spans)
+        for sx, ix, wx, cx, fx in axes[0]:
+            for sy, iy, wy, cy, fy in axes[1]:
+                for sz, iz, wz, cz, fz in axes[2]:
+                    key = (sx, sy, sz)
+                    whole = wx and wy and wz
+                    if shelled and cx and cy and cz:
+                        if fill.mode == "outline":
+                            continue
+                        if whole:
+                            self._fill_section(key, air)
+                            continue
+                    elif whole and fill.mode in ("replace", "destroy"):
+                        self._fill_section(key, v)
+                        continue
+                    region = self._unpacked(key)[ix, iy, iz]
+                    if fill.mode == "keep":
+                        region[(region == 0) | (region == air)] = v
+                    elif shelled:
+                        face = fx[:, None, None] | fy[None, :, None] | fz[None, None, :]
+                        if fill.mode == "hollow":
+                            region[~face] = air
+                        region[face] = v
+                    else:
+                        region[...] = v
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int, int], Section]]:
+        self.flush()
+        return iter(self.sections.items())
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of cells holding each block (air included), from the per-section counts.
+        """
+        counts = np.zeros(len(self.palette), dtype=np.int64)
+        for _, section in self.items():
+            np.add.at(counts, section.palette, section.counts)
+        return {block: int(n) for block, n in zip(self.palette, counts) if block is not None and n}
+
+    def bounds(self) -> Optional[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]:
+        """
+        Inclusive bounding box (lo, hi) of the cells holding a block other than air, None if there are none.
+        Sections that could widen the box are only unpacked if they are partly empty.
+        """
+        air = self._index.get(AIR, 0)
+        empty = {0, air}
+        solid, partial = [], []
+        for key, section in self.items():
+            ids = section.palette.tolist()
+            if not all(i in empty for i in ids):
+                (partial if any(i in empty for i in ids) else solid).append(key)
+        if not solid and not partial:
+            return None
+        lo, hi = [np.inf] * 3, [-np.inf] * 3
+        if solid:
+            bases = np.array(solid) * SECTION_SIZE
+            lo, hi = list(bases.min(axis=0)), list(bases.max(axis=0) + SECTION_SIZE - 1)
+
+        extents = {} # partial section -> world (lo, hi) of its non-empty cells
+
+        def extent(key: Tuple[int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+            if key not in extents:
+                section = self.sections[key]
+                words = self.arena.words[section.offset:section.offset + packed_words(section.bits)]
+                cells = section.palette.take(unpack(words, section.bits)).reshape((SECTION_SIZE,) * 3)
+                filled = (cells != 0) & (cells != air)
+                along = [filled.any(axis=(1, 2)), filled.any(axis=(0, 2)), filled.any(axis=(0, 1))]
+                base = np.array(key) * SECTION_SIZE
+                extents[key] = (base + [a.argmax() for a in along], base + [SECTION_SIZE - 1 - a[::-1].argmax() for a in along])
+            return extents[key]
+
+        # per direction, visit the partial sections outermost first, until none can push the box further out
+        keys = np.array(partial, dtype=np.int64).reshape(-1, 3)
+        for axis in range(3):
+            for k in np.argsort(keys[:, axis], kind="stable"):
+                if keys[k, axis] * SECTION_SIZE >= lo[axis]:
+                    break
+                lo[axis] = min(lo[axis], extent(tuple(keys[k]))[0][axis])
+            for k in np.argsort(-keys[:, axis], kind="stable"):
+                if keys[k, axis] * SECTION_SIZE + SECTION_SIZE - 1 <= hi[axis]:
+                    break
+                hi[axis] = max(hi[axis], extent(tuple(keys[k]))[1][axis])
+        return tuple(int(c) for c in lo), tuple(int(c) for c in hi)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the packed indices and the section palettes and counts (excluding Python object overhead).
+        """
+        return self.arena.nbytes + sum(s.palette.nbytes + s.counts.nbytes for s in self.sections.values())
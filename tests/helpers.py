@@ -0,0 +1,59 @@
+import json
+import random
+
+from typing import Dict, Iterable, List, Tuple
+
+from tools import BeamSpec, ConeSpec, EllipsoidSpec, FillSpec, PlaneSpec, SphereSpec
+from voxels import AIR, VoxelGrid
+
+def world(cmds: Iterable[str]) -> Dict[Tuple[int, int, int], str]:
+    """
+    The blocks /fill commands leave on an empty site, by position: air and untouched cells are left out.
+    """
+    grid = VoxelGrid.from_commands(cmds)
+    air = grid._index.get(AIR, 0)
+    return {tuple(int(c) + l for c, l in zip(cell, grid.lo)): grid.palette[grid.cells[tuple(cell)]]
+            for cell in zip(*((grid.cells != 0) & (grid.cells != air)).nonzero())}
+
+def fill_spec(start: List[int], end: List[int], block: str = "minecraft:stone", mode: str = "replace") -> FillSpec:
+    return FillSpec(start_coordinates=start, end_coordinates=end, block=block, mode=mode, reason="test", explanation="test")
+
+def beam_spec(start: List[int], end: List[int], thickness: int = 1, shape: str = "square", fill: str = "filled", direction: str = "Y",
+              block: str = "minecraft:oak_log") -> BeamSpec:
+    return BeamSpec(start_coordinates=start, end_coordinates=end, thickness=thickness, shape=shape, fill=fill, direction=direction,
+                    block=block, mode="replace", reason="test", explanation="test")
+
+def plane_spec(start: List[int], end: List[int], perpendicular_to: str, block: str = "minecraft:bricks") -> PlaneSpec:
+    return PlaneSpec(start_coordinates=start, end_coordinates=end, perpendicular_to=perpendicular_to, block=block,
+                     mode="replace", reason="test", explanation="test")
+
+def sphere_spec(center: List[int], radius: int, fill: str = "filled", part: str = "full", block: str = "minecraft:glass") -> SphereSpec:
+    return SphereSpec(center_coordinates=center, radius=radius, part=part, block=block, mode="replace", fill=fill, reason="test", explanation="test")
+
+def ellipsoid_spec(center: List[int], radii: List[int], fill: str = "filled", part: str = "full", block: str = "minecraft:oak_planks") -> EllipsoidSpec:
+    return EllipsoidSpec(center_coordinates=center, radii=radii, part=part, block=block, mode="replace", fill=fill, reason="test", explanation="test")
+
+def cone_spec(base: List[int], radius: int, height: int, direction: str = "Y", fill: str = "filled", block: str = "minecraft:spruce_planks") -> ConeSpec:
+    return ConeSpec(base_coordinates=base, radius=radius, height=height, direction=direction, block=block, mode="replace", fill=fill,
+                    reason="test", explanation="test")
+
+def random_specs(seed: int, n: int = 60, size: int = 30) -> List[Tuple[str, FillSpec]]:
+    """
+    n random fills of a few blocks, modes and air carvings, as a blueprint's (tool name, spec) pairs.
+    """
+    rng = random.Random(seed)
+    specs = []
+    for _ in range(n):
+        start = [rng.randint(0, size) for _ in range(3)]
+        end = [c + rng.randint(0, 8) for c in start]
+        block = rng.choice(["minecraft:stone", "minecraft:glass", "minecraft:oak_planks", "minecraft:air"])
+        specs.append(("FillSpec", fill_spec(start, end, block, rng.choice(["replace", "replace", "keep", "outline"]))))
+    return specs
+
+def write_blueprint(path: str, specs: Iterable[Tuple[str, FillSpec]]) -> str:
+    """
+    Writes (tool name, spec) pairs as a blueprint JSON, the way design.py saves them, and returns its path.
+    """
+    with open(path, "w") as f:
+        json.dump({"refined_prompt": "test", "tool_calls": [{"name": name, "args": spec.model_dump(), "type": "tool_call"} for name, spec in specs]}, f)
+    return str(path)
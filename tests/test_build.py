@@ -0,0 +1,60 @@
+import pytest
+
+from build import cost_report, print_cost_report
+from compiler import compile_commands, generate_commands, map_tools_to_wrappers, prune_commands, short_command
+from helpers import beam_spec, fill_spec, plane_spec, random_specs
+from transports import KeyboardTransport
+
+ORIGIN = [10, -60, -20]
+
+@pytest.fixture
+def specs():
+    return [
+        ("FillSpec", fill_spec([0, 0, 0], [11, 0, 11])),
+        ("BeamSpec", beam_spec([0, 1, 0], [30, 20, 12], thickness=2)), # oblique: many commands
+        ("PlaneSpec", plane_spec([0, 1, 11], [11, 6, 11], "XY")),
+        ("FillSpec", fill_spec([1, 1, 1], [10, 5, 10], block="minecraft:air")),
+    ] + random_specs(0, n=20, size=10)
+
+def characters(cmds):
+    return sum(len(cmd) for cmd in cmds)
+
+def test_cost_report_counts_the_commands_generated(specs):
+    transport = KeyboardTransport(counter_max=0)
+    report = cost_report(specs, origin=ORIGIN, transport=transport, flag_threshold=20)
+    cmds = [cmd for _, cmd in generate_commands(specs, origin=ORIGIN)]
+    assert (report["commands"], report["characters"], report["characters_saved"]) == (len(cmds), characters(cmds), 0)
+    assert not report["compiled"] and not report["pruned"]
+    assert tuple(report["seconds"].values()) == transport.estimate_seconds(cmds)
+
+    per_call = [map_tools_to_wrappers[tool](spec, origin=ORIGIN) for tool, spec in specs]
+    assert [(call["commands"], call["characters"]) for call in report["tool_calls"]] == [(len(c), characters(c)) for c in per_call]
+    assert sum(e["commands"] for e in report["explanations"]) == len(cmds) and sum(e["tool_calls"] for e in report["explanations"]) == len(specs)
+    assert [call["index"] for call in report["flagged"]] == [k for k, c in enumerate(per_call) if len(c) >= 20]
+    assert report["flagged"][0]["tool"] == "BeamSpec" and "oblique" in report["flagged"][0]["flag"]
+
+def test_cost_report_counts_the_commands_entered(specs):
+    cmds = list(generate_commands(specs, origin=ORIGIN))
+    compiled = cost_report(specs, origin=ORIGIN, compile=True)
+    assert compiled["compiled"] and compiled["commands"] == len(compile_commands(specs, origin=ORIGIN)) < len(cmds)
+    pruned = cost_report(specs, origin=ORIGIN, prune=True)
+    assert pruned["pruned"] and (pruned["commands"], pruned["characters"]) == (len(prune_commands(cmds)), characters(cmd for _, cmd in prune_commands(cmds)))
+    assert not cost_report(specs, origin=ORIGIN, compile=True, prune=True)["pruned"]
+    for report in (compiled, pruned): # the breakdown is still per tool call as written
+        assert sum(call["commands"] for call in report["tool_calls"]) == len(cmds)
+
+@pytest.mark.parametrize("short, relative", [(True, False), (False, True)])
+def test_cost_report_counts_short_commands(specs, short, relative):
+    report = cost_report(specs, origin=ORIGIN, short=short, relative=relative)
+    cmds = [cmd for _, cmd in generate_commands(specs, origin=ORIGIN)]
+    spelled = [short_command(cmd, ORIGIN if relative else None) for cmd in cmds] + (["tp @s 10 -60 -20"] if relative else [])
+    assert (report["commands"], report["characters"]) == (len(spelled), characters(spelled))
+    assert report["characters_saved"] == characters(cmds) - characters(spelled) > 0
+
+def test_print_cost_report(specs, capsys):
+    report = cost_report(specs, origin=ORIGIN, flag_threshold=20, short=True)
+    print_cost_report(report, top=3)
+    out = capsys.readouterr().out
+    assert f"Commands: {report['commands']:,}\n" in out and f"Characters to type: {report['characters']:,}\n" in out
+    assert "Characters saved by shortening" in out and f"Flagged {len(report['flagged'])} tool call(s)" in out
+    assert len(out.split("Top 3 tool calls by characters:\n")[1].split("\n\n")[0].splitlines()) == 3
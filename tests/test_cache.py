@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import compiler
+
+from compiler import compile_blueprint, load_commands
+from helpers import beam_spec, fill_spec, plane_spec, random_specs, write_blueprint
+
+@pytest.fixture
+def blueprint(tmp_path):
+    specs = random_specs(0, n=30) + [("BeamSpec", beam_spec([0, 0, 0], [30, 7, 12], thickness=2, shape="circular")),
+                                     ("PlaneSpec", plane_spec([0, 5, 0], [20, 9, 40], "YZ"))]
+    return write_blueprint(tmp_path / "blueprint.json", specs)
+
+@pytest.mark.parametrize("compile, prune", [(False, False), (False, True), (True, False)])
+@pytest.mark.parametrize("origin", [[0, -60, 0], [1000, 64, -2345]])
+def test_compiled_blueprint_is_origin_independent(blueprint, compile, prune, origin):
+    compiled = compile_blueprint(blueprint, compile=compile, prune=prune)
+    expected = list(load_commands(blueprint, origin=origin, compile=compile, prune=prune))
+    assert [(label, cmd) for _, label, cmd in compiled.commands(origin)] == expected
+    assert [cmd for _, _, cmd in compiled.commands(origin, start=7, chunk=5)] == [cmd for _, cmd in expected[7:]]
+
+def test_cache_hit_memory_maps_without_recompiling(blueprint, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = list(compile_blueprint(blueprint, cache_dir=cache_dir).commands([5, 6, 7]))
+
+    def recompile(*args, **kwargs):
+        raise AssertionError("recompiled on a cache hit")
+    monkeypatch.setattr(compiler, "load_commands", recompile)
+    cached = compile_blueprint(blueprint, cache_dir=cache_dir)
+    assert isinstance(cached.boxes, np.memmap)
+    assert list(cached.commands([5, 6, 7])) == first
+
+def test_cache_misses_on_new_contents_options_or_compiler(blueprint, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    compile_blueprint(blueprint, cache_dir=cache_dir)
+    misses = []
+    load = compiler.load_commands
+    monkeypatch.setattr(compiler, "load_commands", lambda *args, **kwargs: misses.append(1) or load(*args, **kwargs))
+
+    compile_blueprint(blueprint, cache_dir=cache_dir, prune=True)
+    monkeypatch.setattr(compiler, "COMPILER_VERSION", compiler.COMPILER_VERSION + 1)
+    compile_blueprint(blueprint, cache_dir=cache_dir)
+    edited = write_blueprint(blueprint, [("FillSpec", fill_spec([0, 0, 0], [3, 3, 3]))])
+    assert [cmd for _, _, cmd in compile_blueprint(edited, cache_dir=cache_dir).commands([0, 0, 0])] == ["fill 0 0 0 3 3 3 minecraft:stone replace"]
+    assert len(misses) == 3
@@ -0,0 +1,245 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pydantic import ValidationError
+from typing import Iterable, List
+
+from build import enter_commands
+from compiler import beam, compile_commands, compile_diff, cone, diff_commands, ellipsoid, generate_commands, plane, prune_commands, short_command, sphere
+from helpers import beam_spec, cone_spec, ellipsoid_spec, fill_spec, plane_spec, random_specs, sphere_spec, world, write_blueprint
+from tools import MAX_SHAPE_RADIUS
+from voxels import MAX_FILL_VOLUME
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def house():
+    """
+    A hollowed stone box with a door and glass windows, the way a model usually builds it.
+    """
+    return [
+        ("FillSpec", fill_spec([0, 0, 0], [12, 8, 10], "minecraft:stone")),
+        ("FillSpec", fill_spec([1, 1, 1], [11, 7, 9], "minecraft:air")),
+        ("FillSpec", fill_spec([5, 1, 0], [6, 3, 0], "minecraft:air")),
+        *[("FillSpec", fill_spec([x, 3, z], [x + 1, 5, z], "minecraft:glass")) for x in (2, 9) for z in (0, 10)],
+        *[("FillSpec", fill_spec([x, 3, 4], [x, 5, 6], "minecraft:glass")) for x in (0, 12)],
+    ]
+
+def connected(cells) -> bool:
+    """
+    Whether the cells form one face-connected piece.
+    """
+    cells = set(cells)
+    todo = [next(iter(cells))]
+    seen = set(todo)
+    while todo:
+        x, y, z = todo.pop()
+        for n in ((x + 1, y, z), (x - 1, y, z), (x, y + 1, z), (x, y - 1, z), (x, y, z + 1), (x, y, z - 1)):
+            if n in cells and n not in seen:
+                seen.add(n)
+                todo.append(n)
+    return len(seen) == len(cells)
+
+@pytest.mark.parametrize("shape", ["square", "circular"])
+@pytest.mark.parametrize("end, direction", [([100, 5, 0], "Y"), ([3, 40, 7], "X"), ([20, 20, 20], "Z")])
+def test_oblique_beam_is_connected(shape, end, direction):
+    placed = world(beam(beam_spec([0, 0, 0], end, thickness=1, shape=shape, direction=direction), origin=[0, 0, 0]))
+    assert (0, 0, 0) in placed and tuple(end) in placed
+    assert connected(placed)
+
+def volume(cmd: str) -> int:
+    x1, y1, z1, x2, y2, z2 = map(int, cmd.split()[1:7])
+    return (abs(x2 - x1) + 1) * (abs(y2 - y1) + 1) * (abs(z2 - z1) + 1)
+
+def stepped_roof(start: List[int], end: List[int]) -> set:
+    """
+    The cells of a plane perpendicular to YZ built the unmerged way, one row along X per step along Z.
+    """
+    (x1, y1, z1), (x2, y2, z2) = start, end
+    cells = set()
+    for i in range(abs(z2 - z1) + 1):
+        t = i / max(abs(z2 - z1), 1)
+        cells |= {(x, round(y1 + t * (y2 - y1)), round(z1 + t * (z2 - z1))) for x in range(min(x1, x2), max(x1, x2) + 1)}
+    return cells
+
+@pytest.mark.parametrize("start, end, fills", [
+    ([0, 10, 0], [63, 20, 100], 11), # gentle roof: one fill per course instead of one per row
+    ([0, 0, 0], [40, 40, 40], 41), # 45 degrees: nothing to merge
+    ([0, 30, 0], [400, 33, 700], 10), # hull plate whose merged courses go through the 32,768-block tiling
+])
+def test_plane_merges_steps_into_courses(start, end, fills):
+    cmds = plane(plane_spec(start, end, "YZ"), origin=[0, 0, 0])
+    assert set(world(cmds)) == stepped_roof(start, end)
+    assert len(cmds) == fills <= abs(end[2] - start[2]) + 1
+    assert all(volume(cmd) <= MAX_FILL_VOLUME for cmd in cmds)
+
+@pytest.mark.parametrize("specs", [house(), *(random_specs(seed) for seed in range(5))])
+def test_compile_builds_the_same_and_never_adds_commands(specs):
+    raw = [cmd for _, cmd in generate_commands(specs, origin=[0, 0, 0])]
+    compiled = [cmd for _, cmd in compile_commands(specs, origin=[0, 0, 0])]
+    assert world(compiled) == world(raw)
+    assert len(compiled) <= len([cmd for _, cmd in prune_commands((c, c) for c in raw)])
+
+def test_compile_carves_air_after_overwriting_fills():
+    compiled = [cmd for _, cmd in compile_commands(house(), origin=[0, 0, 0])]
+    assert any("minecraft:air" in cmd for cmd in compiled)
+    assert len(compiled) < len(house())
+
+def as_typed(cmds: Iterable[str], player: List[int] = [0, 0, 0]) -> List[str]:
+    """
+    The full /fill commands Minecraft runs for typed ones: ~ coordinates resolved against the player's position
+    (moved by /tp), the default namespace and "replace" mode filled in.
+    """
+    full = []
+    for cmd in cmds:
+        name, *args = cmd.split()
+        if name == "tp":
+            player = [int(c) for c in args[1:4]]
+            continue
+        coords = [p + int(c[1:] or 0) if c.startswith("~") else int(c) for c, p in zip(args[:6], player * 2)]
+        block, mode = args[6], args[7] if len(args) > 7 else "replace"
+        full.append(f"fill {' '.join(map(str, coords))} {block if ':' in block.partition('[')[0] else 'minecraft:' + block} {mode}")
+    return full
+
+def mixed_specs() -> list:
+    return random_specs(7) + [
+        ("BeamSpec", beam_spec([0, 0, 0], [40, 9, 13], thickness=2, shape="circular", fill="hollow")),
+        ("BeamSpec", beam_spec([3, 0, 3], [3, 20, 3], block="minecraft:oak_log").model_copy(update={"block_states": {"axis": "y"}})),
+        ("PlaneSpec", plane_spec([-5, 2, 0], [20, 12, 30], "YZ")),
+        ("FillSpec", fill_spec([0, 0, 0], [10, 4, 10], mode="outline")),
+    ]
+
+@pytest.mark.parametrize("relative_to", [None, [0, -60, 0], [123, 64, -77]])
+def test_short_commands_build_the_same(relative_to):
+    full = [cmd for _, cmd in generate_commands(mixed_specs(), origin=[100, -60, 50])]
+    short = [short_command(cmd, relative_to) for cmd in full]
+    assert sum(map(len, short)) < sum(map(len, full))
+    assert world(as_typed(short, relative_to or [0, 0, 0])) == world(full)
+
+class Typed:
+    def __init__(self):
+        self.typed = []
+
+    def run(self, commands):
+        for i, _, cmd in commands:
+            self.typed.append(cmd)
+            yield i, cmd, None
+
+@pytest.mark.parametrize("short, relative", [(True, False), (False, True)])
+def test_entered_short_and_relative_commands_build_the_same(tmp_path, short, relative):
+    blueprint = write_blueprint(tmp_path / "blueprint.json", mixed_specs())
+    full, spelled = Typed(), Typed()
+    enter_commands(blueprint, transport=full, origin=[-40, 70, 900])
+    enter_commands(blueprint, transport=spelled, origin=[-40, 70, 900], short=short, relative=relative)
+    assert relative == spelled.typed[0].startswith("tp @s")
+    assert world(as_typed(spelled.typed)) == world(full.typed)
+
+def ellipsoid_cells(center: List[int], radii: List[int], part: str = "full") -> set:
+    """
+    The cells (u/rx)^2 + (v/ry)^2 + (w/rz)^2 <= 1 around center, cut to the upper or lower half with part.
+    """
+    (cx, cy, cz), (rx, ry, rz) = center, radii
+    return {(cx + u, cy + v, cz + w) for u in range(-rx, rx + 1) for v in range(-ry, ry + 1) for w in range(-rz, rz + 1)
+            if (u / max(rx, 0.5)) ** 2 + (v / max(ry, 0.5)) ** 2 + (w / max(rz, 0.5)) ** 2 <= 1 + 1e-9
+            and {"full": True, "upper": v >= 0, "lower": v <= 0}[part]}
+
+def surface(cells: set) -> set:
+    """
+    The cells with at least one of their 6 neighbours outside the set.
+    """
+    return {(x, y, z) for x, y, z in cells
+            if not {(x + 1, y, z), (x - 1, y, z), (x, y + 1, z), (x, y - 1, z), (x, y, z + 1), (x, y, z - 1)} <= cells}
+
+@pytest.mark.parametrize("radius", [0, 1, 5, 12])
+@pytest.mark.parametrize("part", ["full", "upper", "lower"])
+def test_sphere_places_its_cells(radius, part):
+    placed = world(sphere(sphere_spec([20, 30, 40], radius, part=part), origin=[1, -60, 2]))
+    assert set(placed) == {(x + 1, y - 60, z + 2) for x, y, z in ellipsoid_cells([20, 30, 40], [radius] * 3, part)}
+    assert set(placed.values()) == {"minecraft:glass"}
+
+@pytest.mark.parametrize("radii", [[10, 4, 7], [0, 3, 5], [6, 6, 1]])
+@pytest.mark.parametrize("part", ["full", "upper", "lower"])
+def test_hollow_shapes_hold_only_shell_cells(radii, part):
+    solid = ellipsoid_cells([0, 0, 0], radii)
+    expected = {c for c in surface(solid) if c in ellipsoid_cells([0, 0, 0], radii, part)} # a hollow half is open at the cut
+    assert set(world(ellipsoid(ellipsoid_spec([0, 0, 0], radii, fill="hollow", part=part), origin=[0, 0, 0]))) == expected
+    filled = set(world(ellipsoid(ellipsoid_spec([0, 0, 0], radii, part=part), origin=[0, 0, 0])))
+    assert filled == ellipsoid_cells([0, 0, 0], radii, part)
+
+def cone_cells(base: List[int], radius: int, height: int, axis: int) -> set:
+    cells = set()
+    for k in range(abs(height) + 1):
+        r = radius * (abs(height) - k) / abs(height) if height else radius
+        for u in range(-radius, radius + 1):
+            for w in range(-radius, radius + 1):
+                if u * u + w * w <= r * r + 1e-9:
+                    offset = [u, 0, w] if axis == 1 else [0, u, w] if axis == 0 else [u, w, 0]
+                    offset[axis] = k if height >= 0 else -k
+                    cells.add(tuple(b + o for b, o in zip(base, offset)))
+    return cells
+
+@pytest.mark.parametrize("direction", ["X", "Y", "Z"])
+@pytest.mark.parametrize("height", [9, -9, 0])
+@pytest.mark.parametrize("fill", ["filled", "hollow"])
+def test_cone_points_along_its_axis(direction, height, fill):
+    axis = "XYZ".index(direction)
+    placed = set(world(cone(cone_spec([10, 20, 30], 4, height, direction=direction, fill=fill), origin=[0, 0, 0])))
+    expected = cone_cells([10, 20, 30], 4, height, axis)
+    assert placed == (surface(expected) if fill == "hollow" else expected)
+    tip = [10, 20, 30]
+    tip[axis] += height
+    assert tuple(tip) in placed
+
+@pytest.mark.parametrize("spec, blocks_per_command", [
+    (("SphereSpec", sphere_spec([0, 0, 0], 20)), 20),
+    (("EllipsoidSpec", ellipsoid_spec([0, 0, 0], [30, 8, 15], part="lower")), 20),
+    (("ConeSpec", cone_spec([0, 0, 0], 12, 40)), 20),
+    (("SphereSpec", sphere_spec([0, 0, 0], 20, fill="hollow", part="upper")), 3), # a thin shell has few long runs
+    (("ConeSpec", cone_spec([0, 0, 0], 12, -40, direction="Z", fill="hollow")), 3),
+])
+def test_shapes_take_far_fewer_commands_than_voxels(spec, blocks_per_command):
+    cmds = [cmd for _, cmd in generate_commands([spec], origin=[0, 0, 0])]
+    assert len(cmds) * blocks_per_command < len(world(cmds))
+
+def test_shape_radius_is_bounded():
+    with pytest.raises(ValidationError):
+        sphere_spec([0, 0, 0], MAX_SHAPE_RADIUS + 1)
+    with pytest.raises(ValidationError):
+        ellipsoid_spec([0, 0, 0], [1, 1, 10 ** 6])
+    with pytest.raises(ValidationError):
+        cone_spec([0, 0, 0], 10 ** 6, 5)
+
+def edited(seed: int) -> tuple:
+    """
+    A blueprint and an edit of it: some tool calls dropped, some blocks changed and some tool calls added.
+    """
+    old = random_specs(seed, n=40)
+    new = [(name, spec.model_copy(update={"block": "minecraft:bricks"}) if k % 7 == 0 else spec) for k, (name, spec) in enumerate(old) if k % 5]
+    return old, new + random_specs(seed + 1000, n=10) + [("BeamSpec", beam_spec([0, 0, 0], [25, 12, 9], thickness=2, shape="circular"))]
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("origin", [[0, -60, 0], [137, 5, -999]])
+def test_diff_turns_the_old_build_into_the_new(tmp_path, seed, origin):
+    old, new = edited(seed)
+    old_path, new_path = write_blueprint(tmp_path / "old.json", old), write_blueprint(tmp_path / "new.json", new)
+    diff = [cmd for _, cmd in diff_commands(old_path, new_path, origin=origin)]
+    built = [cmd for _, cmd in generate_commands(old, origin=origin)]
+    assert world(built + diff) == world([cmd for _, cmd in generate_commands(new, origin=origin)])
+    assert diff_commands(new_path, new_path, origin=origin) == []
+
+    cache_dir = str(tmp_path / "cache")
+    for compiled in (compile_diff(old_path, new_path), compile_diff(old_path, new_path, cache_dir=cache_dir), compile_diff(old_path, new_path, cache_dir=cache_dir)):
+        assert [cmd for _, _, cmd in compiled.commands(origin)] == diff
+
+@pytest.mark.parametrize("fmt", ["structure", "schem"])
+def test_diff_is_only_exported_as_a_datapack(tmp_path, fmt):
+    old_path = write_blueprint(tmp_path / "old.json", random_specs(0, n=5))
+    new_path = write_blueprint(tmp_path / "new.json", random_specs(1, n=5))
+    cli = subprocess.run([sys.executable, "build.py", "--diff", old_path, new_path, "--origin", "0", "0", "0", "--no_cache", "--emit", fmt, str(tmp_path / "out")],
+                         cwd=REPO, capture_output=True, text=True)
+    assert cli.returncode == 2 and "--diff can only be exported as a datapack" in cli.stderr
+    datapack = subprocess.run([sys.executable, "build.py", "--diff", old_path, new_path, "--origin", "0", "0", "0", "--no_cache", "--emit", "datapack", str(tmp_path / "pack")],
+                              cwd=REPO, capture_output=True, text=True)
+    assert datapack.returncode == 0, datapack.stderr
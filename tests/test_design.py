@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from typing import Tuple
+
+from langchain_core.messages import HumanMessage
+
+from compiler import generate_commands, load_specs
+from design import design_batch, generate_sections, load_jobs, make_blueprint, stream_build
+from fake_llm import FakeChatModel
+from llm_cache import ResponseCache
+from plan import split_plan
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_fake_plan_splits_into_its_steps():
+    llm = FakeChatModel(plan_steps=5, calls_per_step=2)
+    plan = llm.invoke([HumanMessage(content="a lighthouse")]).content
+    preamble, steps = split_plan(plan)
+    assert preamble == "" and len(steps) == 5
+    assert len(llm.bind_tools([]).invoke([HumanMessage(content=plan)]).tool_calls) == 5 * 2
+    assert len(llm.bind_tools([]).invoke([HumanMessage(content=plan + "\nBuild only step 3.")]).tool_calls) == 2
+
+def test_importing_design_does_not_load_langchain():
+    loaded = subprocess.run([sys.executable, "-c", "import sys, design, llm_cache, plan; print('langchain_core' in sys.modules)"],
+                            cwd=REPO, check=True, capture_output=True, text=True).stdout
+    assert loaded.strip() == "False"
+
+class Entered:
+    """
+    Transport confirming every command at once, checking the blueprint already holds the tool call behind it,
+    and failing after `fail_after` commands if given.
+    """
+
+    def __init__(self, blueprint_path=None, fail_after=None):
+        self.blueprint_path = blueprint_path
+        self.fail_after = fail_after
+        self.commands = []
+
+    def run(self, commands):
+        for i, label, cmd in commands:
+            if len(self.commands) == self.fail_after:
+                raise RuntimeError("transport failed")
+            if self.blueprint_path:
+                with open(self.blueprint_path) as f:
+                    assert label.split(" (")[0] in f.read()
+            self.commands.append(cmd)
+            yield i, cmd, None
+
+def streamed(tmp_path, name: str, llm, transport) -> Tuple[str, dict]:
+    path = str(tmp_path / f"{name}.json")
+    cache = ResponseCache(str(tmp_path / "llm"))
+    messages = [HumanMessage(content="1. A wall.\n2. A tower.\n3. A gate.")]
+    try:
+        stream_build(llm.bind_tools([]), messages, "refined", path, transport, origin=[0, 0, 0], cache=cache, model="fake", model_provider="fake")
+    finally:
+        with open(path) as f:
+            blueprint = json.load(f)
+    return path, blueprint
+
+def test_stream_build_skips_malformed_calls_and_replays_from_cache(tmp_path):
+    transport = Entered(str(tmp_path / "live.json"))
+    path, blueprint = streamed(tmp_path, "live", FakeChatModel(calls_per_step=2, malformed_calls=1), transport)
+    assert len(blueprint["tool_calls"]) == 3 * 2 - 1
+    assert transport.commands == [cmd for _, cmd in generate_commands(load_specs(path), origin=[0, 0, 0])]
+
+    # the same request is answered from the cache, without the (now failing) model
+    replayed = Entered()
+    _, cached = streamed(tmp_path, "replay", FakeChatModel(failure_rate=1.0), replayed)
+    assert cached["tool_calls"] == blueprint["tool_calls"] and replayed.commands == transport.commands
+
+def test_stream_build_completes_the_blueprint_when_the_build_fails(tmp_path):
+    with pytest.raises(RuntimeError):
+        streamed(tmp_path, "failed", FakeChatModel(calls_per_step=2), Entered(fail_after=2))
+    with open(tmp_path / "failed.json") as f:
+        assert json.load(f)["refined_prompt"] == "refined"
+
+def test_job_names_cannot_leave_out_dir(tmp_path):
+    for name in ["../escaped", str(tmp_path / "absolute"), "nested/name", ".."]:
+        with open(tmp_path / "jobs.jsonl", "w") as f:
+            f.write(json.dumps({"prompt": "a hut", "name": name}) + "\n")
+        with pytest.raises(ValueError):
+            load_jobs(str(tmp_path / "jobs.jsonl"), model="fake", model_provider="fake")
+        with pytest.raises(ValueError):
+            asyncio.run(design_batch([{"prompt": "a hut", "name": name, "model": "fake", "provider": "fake"}], str(tmp_path / "out")))
+    assert not os.path.exists(tmp_path / "escaped.json") and not os.path.exists(tmp_path / "out")
+
+def test_batch_retries_skips_existing_and_writes_atomically(tmp_path):
+    random.seed(0)
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "done.json").write_text("existing")
+    jobs = [{"prompt": f"house {k}", "name": f"house_{k}", "model": "fake:0:0.3", "provider": "fake"} for k in range(6)]
+    jobs += [{"prompt": "done", "name": "done", "model": "fake", "provider": "fake"},
+             {"prompt": "broken", "name": "broken", "model": "fake:0:1", "provider": "fake"}]
+    report = asyncio.run(design_batch(jobs, str(out), max_in_flight=3, retries=8, backoff=0))
+
+    status = {entry["name"]: entry["status"] for entry in report["jobs"]}
+    assert status == {**{f"house_{k}": "ok" for k in range(6)}, "done": "skipped", "broken": "failed"}
+    assert (report["ok"], report["skipped"], report["failed"]) == (6, 1, 1)
+    assert (out / "done.json").read_text() == "existing"
+    assert sorted(os.listdir(out)) == sorted(["done.json"] + [f"house_{k}.json" for k in range(6)]) # no temporary files left
+    for k in range(6):
+        assert len(load_specs(str(out / f"house_{k}.json"))) == 8 * 3
+
+def test_batch_cli_writes_report(tmp_path):
+    with open(tmp_path / "jobs.jsonl", "w") as f:
+        f.write(json.dumps("a hut") + "\n" + json.dumps({"prompt": "a tower", "name": "tower"}) + "\n")
+    subprocess.run([sys.executable, "design.py", "--batch", str(tmp_path / "jobs.jsonl"), "--out_dir", str(tmp_path / "out"),
+                    "--provider", "fake", "--model", "fake", "--no_cache"], cwd=REPO, check=True, capture_output=True)
+    with open(tmp_path / "out" / "batch_report.json") as f:
+        report = json.load(f)
+    assert report["ok"] == 2 and {entry["name"] for entry in report["jobs"]} == {"prompt_0001", "tower"}
+    assert os.path.exists(tmp_path / "out" / "tower.json")
+
+class Finishing(FakeChatModel):
+    """
+    Fake model recording which plan step each response was for, in the order they finish.
+    """
+    finished: list = []
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        result = await super()._agenerate(messages, *args, **kwargs)
+        self.finished.append(int(messages[-1].content.split("Build only step ")[1].split()[0]))
+        return result
+
+def test_sections_are_merged_in_plan_order():
+    random.seed(1)
+    llm = Finishing(jitter=0.05, plan_steps=8, calls_per_step=2, finished=[]).bind_tools([])
+    plan = FakeChatModel(plan_steps=8).invoke([HumanMessage(content="a castle")]).content
+    outputs = asyncio.run(generate_sections(llm, "system", plan, concurrency=8))
+    assert llm.finished != sorted(llm.finished) and sorted(llm.finished) == list(range(1, 9))
+
+    sequential = asyncio.run(generate_sections(FakeChatModel(calls_per_step=2).bind_tools([]), "system", plan, concurrency=1))
+    assert make_blueprint(plan, outputs)["tool_calls"] == make_blueprint(plan, sequential)["tool_calls"]
@@ -0,0 +1,72 @@
+import nbt
+
+from export import split_block_state, write_datapack, write_schematic, write_structure
+from voxels import AIR, VoxelGrid
+from helpers import world
+
+# enough distinct blocks that schematic palette indices need two-byte varints
+COMMANDS = [
+    "fill -3 0 2 9 4 7 minecraft:stone replace",
+    "fill -2 1 3 8 3 6 minecraft:air replace",
+    "fill 0 2 2 1 2 2 minecraft:oak_log[axis=x] replace",
+    "fill 2 5 2 6 5 7 minecraft:glass outline",
+    *[f"fill {i % 13 - 3} 6 {i // 13 + 2} {i % 13 - 3} 6 {i // 13 + 2} minecraft:wool_{i}" for i in range(150)],
+]
+
+def state_string(block: str) -> str:
+    name, props = split_block_state(block)
+    return name + "[" + ",".join(f"{k}={v}" for k, v in props.items()) + "]"
+
+def expected_blocks():
+    return {pos: state_string(block) for pos, block in world(COMMANDS).items()}
+
+def read_varints(data):
+    values, value, shift = [], 0, 0
+    for byte in data.tobytes():
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+def palette_state(entry) -> str:
+    return entry["Name"] + "[" + ",".join(f"{k}={v}" for k, v in entry.get("Properties", {}).items()) + "]"
+
+def test_structure_round_trip(tmp_path):
+    grid = VoxelGrid.from_commands(COMMANDS)
+    write_structure(grid, tmp_path / "build.nbt")
+    name, root = nbt.load(tmp_path / "build.nbt")
+    assert list(root["size"]) == list(grid.cells.shape)
+    palette = [palette_state(entry) for entry in root["palette"]]
+    blocks = {tuple(int(c) + l for c, l in zip(b["pos"], grid.lo)): palette[b["state"]] for b in root["blocks"]}
+    assert blocks == expected_blocks()
+
+def test_schematic_round_trip(tmp_path):
+    grid = VoxelGrid.from_commands(COMMANDS)
+    write_schematic(grid, tmp_path / "build.schem")
+    name, root = nbt.load(tmp_path / "build.schem")
+    assert name == "Schematic" and root["Version"] == 2
+    width, height, length = root["Width"], root["Height"], root["Length"]
+    states = {index: state for state, index in root["Palette"].items()}
+    assert root["PaletteMax"] == len(states) > 128
+    data = read_varints(root["BlockData"])
+    assert len(data) == width * height * length
+    blocks = {}
+    for i, index in enumerate(data):
+        x, z, y = i % width, i // width % length, i // (width * length)
+        if states[index] != AIR:
+            blocks[(x + root["Offset"][0], y + root["Offset"][1], z + root["Offset"][2])] = state_string(states[index])
+    assert blocks == expected_blocks()
+
+def test_datapack_keeps_every_command_in_order(tmp_path):
+    paths = write_datapack(COMMANDS, str(tmp_path), "build", commands_per_tick=50)
+    entry, parts = paths[0], paths[1:]
+    assert len(parts) == -(-len(COMMANDS) // 50)
+    with open(entry) as f:
+        assert sum(line.startswith("schedule function vibecraft:build/part_") for line in f) == len(parts)
+    written = []
+    for path in parts:
+        with open(path) as f:
+            written += f.read().splitlines()
+    assert written == COMMANDS
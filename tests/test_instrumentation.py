@@ -0,0 +1,73 @@
+import itertools
+import json
+
+import pytest
+
+from build import enter_commands
+from compiler import compile_blueprint
+from helpers import beam_spec, fill_spec, plane_spec, write_blueprint
+from instrumentation import ChromeTraceSink, JsonlSink, Recorder
+from transports import FakeKeyboard, KeyboardTransport
+
+ORIGIN = [0, -60, 0]
+
+@pytest.fixture
+def blueprint(tmp_path):
+    return write_blueprint(tmp_path / "blueprint.json", [
+        ("FillSpec", fill_spec([0, 0, 0], [9, 0, 9])),
+        ("BeamSpec", beam_spec([0, 1, 0], [7, 6, 3], thickness=2)),
+        ("PlaneSpec", plane_spec([0, 1, 9], [9, 5, 9], "XY")),
+        ("FillSpec", fill_spec([2, 1, 2], [4, 3, 4], block="minecraft:glass")),
+    ])
+
+def test_recorder_reports_every_command_and_tool_call(blueprint, tmp_path):
+    events = []
+    recorder = Recorder([events.append, JsonlSink(str(tmp_path / "metrics.jsonl")), ChromeTraceSink(str(tmp_path / "trace.json"))],
+                        throughput_interval=0.01)
+    transport = KeyboardTransport(delay=0.001, counter_max=0, injection="bulk", keyboard=FakeKeyboard(latency=0.00002))
+    enter_commands(blueprint, transport=transport, origin=ORIGIN, recorder=recorder)
+    recorder.close()
+
+    expected = list(compile_blueprint(blueprint).commands(ORIGIN))
+    commands = [event for event in events if event["event"] == "command"]
+    assert [(e["index"], e["label"], e["characters"]) for e in commands] == [(i, label, len(cmd)) for i, label, cmd in expected]
+
+    tool_calls = [event for event in events if event["event"] == "tool_call"]
+    runs = [(label, list(group)) for label, group in itertools.groupby(expected, key=lambda c: c[1])]
+    assert [(e["label"], e["first_index"], e["commands"], e["characters"]) for e in tool_calls] == \
+           [(label, group[0][0], len(group), sum(len(cmd) for _, _, cmd in group)) for label, group in runs]
+    assert len(tool_calls) == 4
+
+    # each command's time is split into sleeping and typing, adding up to the run's wall time
+    for e in commands:
+        assert e["sleeping_seconds"] >= 0.001 and e["sleeping_seconds"] + e["typing_seconds"] == pytest.approx(e["seconds"])
+    end = events[-1]
+    assert events[0]["event"] == "run_start" and end["event"] == "run_end" and end["commands"] == len(expected)
+    assert sum(e["sleeping_seconds"] + e["typing_seconds"] for e in commands) == pytest.approx(end["seconds"], rel=0.05, abs=0.01)
+    assert end["sleeping_seconds"] == pytest.approx(transport.slept)
+    assert any(event["event"] == "throughput" for event in events)
+
+    with open(tmp_path / "metrics.jsonl") as f:
+        assert [json.loads(line) for line in f] == events
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)
+    slices = [e for e in trace if e["ph"] == "X"]
+    assert len(slices) == len(commands) + len(tool_calls)
+    assert [e["name"] for e in slices if e["tid"] == ChromeTraceSink.TRACKS["tool_call"]] == [label for label, _ in runs]
+
+def test_trace_loads_after_a_failed_run(blueprint, tmp_path):
+    class Failing:
+        def run(self, commands):
+            for i, label, cmd in commands:
+                if i == 3:
+                    raise RuntimeError("connection lost")
+                yield i, cmd, None
+
+    recorder = Recorder([ChromeTraceSink(str(tmp_path / "trace.json"))])
+    with pytest.raises(RuntimeError):
+        enter_commands(blueprint, transport=Failing(), origin=ORIGIN, recorder=recorder)
+    recorder.close()
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)
+    assert [e["name"] for e in trace if e["ph"] == "i"] == ["run_start", "run_end"]
+    assert len([e for e in trace if e["ph"] == "X" and e["tid"] == ChromeTraceSink.TRACKS["command"]]) == 2
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from build import enter_commands
+from helpers import beam_spec, random_specs, world, write_blueprint
+from journal import RECORD_SIZE, Journal
+from nbt import load
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Interrupted(Exception):
+    pass
+
+class RecordingTransport:
+    """
+    Confirms every command at once, and is interrupted after `stop_after` of them if given.
+    """
+
+    def __init__(self, stop_after=None):
+        self.stop_after = stop_after
+        self.entered = []
+
+    def run(self, commands):
+        for i, _, cmd in commands:
+            if len(self.entered) == self.stop_after:
+                raise Interrupted()
+            self.entered.append(cmd)
+            yield i, cmd, None
+
+@pytest.fixture
+def blueprint(tmp_path):
+    specs = random_specs(1, n=40, size=200) + [("BeamSpec", beam_spec([0, 0, 0], [150, 20, 90], thickness=2))]
+    return write_blueprint(tmp_path / "blueprint.json", specs)
+
+@pytest.mark.parametrize("options", [{}, {"compile": True}, {"schedule": True, "region_size": 1}, {"short": True}])
+@pytest.mark.parametrize("cached", [False, True])
+def test_resume_enters_exactly_the_rest(blueprint, tmp_path, options, cached):
+    kwargs = dict(origin=[100, 0, -50], journal_path=str(tmp_path / "blueprint.journal"), cache_dir=str(tmp_path / "cache") if cached else None, **options)
+    full = RecordingTransport()
+    enter_commands(blueprint, transport=full, **kwargs)
+
+    interrupted = RecordingTransport(stop_after=17)
+    with pytest.raises(Interrupted):
+        enter_commands(blueprint, transport=interrupted, **kwargs)
+    resumed = RecordingTransport()
+    enter_commands(blueprint, transport=resumed, resume=True, **kwargs)
+    assert interrupted.entered + resumed.entered == full.entered
+
+    # a finished journal leaves nothing to do; a fresh run starts over
+    nothing = RecordingTransport()
+    enter_commands(blueprint, transport=nothing, resume=True, **kwargs)
+    assert nothing.entered == []
+    again = RecordingTransport()
+    enter_commands(blueprint, transport=again, **kwargs)
+    assert again.entered == full.entered
+
+def test_resume_refuses_a_journal_of_another_build(blueprint, tmp_path):
+    journal_path = str(tmp_path / "blueprint.journal")
+    with pytest.raises(Interrupted):
+        enter_commands(blueprint, transport=RecordingTransport(stop_after=5), origin=[0, 0, 0], journal_path=journal_path)
+    with pytest.raises(ValueError):
+        enter_commands(blueprint, transport=RecordingTransport(), origin=[1, 0, 0], journal_path=journal_path, resume=True)
+
+def test_torn_record_is_ignored_and_truncated(tmp_path):
+    path = str(tmp_path / "journal")
+    with Journal(path) as journal:
+        journal.append(1, "fill 0 0 0 1 1 1 minecraft:stone replace")
+        journal.append(2, "fill 2 0 0 3 1 1 minecraft:stone replace")
+    with open(path, "ab") as f:
+        f.write(b"000000000003 ab")
+    assert Journal(path).last()[0] == 2
+    with Journal(path) as journal:
+        journal.append(3, "fill 4 0 0 5 1 1 minecraft:stone replace")
+    assert os.path.getsize(path) == 3 * RECORD_SIZE
+    assert Journal(path).last()[0] == 3
+
+def test_records_are_fsynced_in_batches(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd))
+    path = str(tmp_path / "journal")
+    with Journal(path, sync_every=64, sync_interval=3600) as journal:
+        for i in range(1, 201):
+            journal.append(i, f"setblock {i} 0 0 minecraft:stone")
+            assert Journal(path).last()[0] == i # flushed as it is written, for a process crash
+        assert len(synced) == 3
+    assert len(synced) == 4 # the rest on exit
+
+    synced.clear()
+    with Journal(path, sync_interval=0) as journal:
+        for i in range(201, 211):
+            journal.append(i, f"setblock {i} 0 0 minecraft:stone")
+    assert len(synced) == 10 and Journal(path).last()[0] == 210
+
+def test_emit_does_not_take_journal_options(blueprint, tmp_path):
+    out = str(tmp_path / "blueprint.nbt")
+    subprocess.run([sys.executable, "build.py", "--blueprint_path", blueprint, "--origin", "0", "0", "0", "--no_cache", "--resume", "--emit", "structure", out],
+                   cwd=REPO, check=True, capture_output=True)
+    entered = RecordingTransport()
+    enter_commands(blueprint, transport=entered, origin=[0, 0, 0])
+    _, root = load(out)
+    air = [i for i, entry in enumerate(root["palette"]) if entry["Name"] == "minecraft:air"]
+    assert len([b for b in root["blocks"] if b["state"] not in air]) == len(world(entered.entered))
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from design import TOOLS, init_model, invoke, toolcall_key
+from fake_llm import FakeChatModel
+from llm_cache import ResponseCache
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for k, key in enumerate("abc"):
+        cache.put(key, AIMessage(content=f"response {key}"))
+        os.utime(cache._path(key), (1000 * (k + 1), 1000 * (k + 1)))
+    assert cache.get("a").content == "response a" # a hit makes "a" the most recently used
+
+    cache.max_bytes = 3 * os.path.getsize(cache._path("a"))
+    cache.put("d", AIMessage(content="response d"))
+    assert sorted(entry.name for entry in os.scandir(tmp_path)) == ["a.json", "c.json", "d.json"]
+    assert cache.get("b") is None
+
+    cache.max_bytes = 0
+    cache.put("e", AIMessage(content="response e"))
+    assert os.listdir(tmp_path) == []
+
+def test_cache_hit_returns_the_same_response(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    messages = [HumanMessage(content="1. A wall.\n2. A tower.")]
+    key = toolcall_key("fake", "fake")
+    fresh = invoke(FakeChatModel().bind_tools(TOOLS), messages, cache, **key)
+    cached = invoke(FakeChatModel(failure_rate=1.0).bind_tools(TOOLS), messages, cache, **key) # would raise if queried
+    assert (cached.content, cached.tool_calls) == (fresh.content, fresh.tool_calls) and len(cached.tool_calls) == 2 * 3
+    assert invoke(FakeChatModel(calls_per_step=1).bind_tools(TOOLS), messages, cache, **toolcall_key("other", "fake")).tool_calls != fresh.tool_calls
+
+def test_no_cache_bypasses_the_cache(tmp_path):
+    def design(name, *options):
+        subprocess.run([sys.executable, "design.py", "--prompt", "a hut", "--provider", "fake", "--model", "fake", "--llm_cache_dir", str(tmp_path / "llm"),
+                        "--blueprint_path", str(tmp_path / name), *options], cwd=REPO, check=True, capture_output=True)
+    design("uncached.json", "--no_cache")
+    assert not os.path.exists(tmp_path / "llm") and os.path.exists(tmp_path / "uncached.json")
+    design("cached.json")
+    assert len(os.listdir(tmp_path / "llm")) == 2 # refined prompt and tool calls
+
+def test_init_model_shares_clients():
+    assert init_model("fake", "fake") is init_model("fake", "fake")
+    assert init_model("fake:0.5", "fake") is not init_model("fake", "fake")
+    assert init_model("fake:0.5", "fake").latency == 0.5
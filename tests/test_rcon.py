@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from build import enter_commands
+from helpers import fill_spec, write_blueprint
+from journal import Journal
+from rcon import FakeRconServer, RconClient, RconCommandError
+from transports import RconTransport
+
+def pipeline(server: FakeRconServer, commands, **kwargs):
+    with RconClient(server.host, server.port) as client:
+        return list(client.pipeline(enumerate(commands, 1), backoff=0.0, **kwargs))
+
+def test_confirmed_responses_are_yielded():
+    with FakeRconServer(handler=lambda cmd: "Successfully filled 8 block(s)") as server:
+        assert pipeline(server, ["fill 0 0 0 1 1 1 minecraft:stone"]) == [(1, "fill 0 0 0 1 1 1 minecraft:stone", "Successfully filled 8 block(s)")]
+
+def test_unloaded_position_raises_after_retries():
+    with FakeRconServer(handler=lambda cmd: "That position is not loaded") as server:
+        with pytest.raises(RconCommandError) as e:
+            pipeline(server, ["fill 0 0 0 1 1 1 minecraft:stone"], retries=2)
+        assert e.value.key == 1
+        assert len(server.commands) == 3
+
+@pytest.mark.parametrize("response", ["Unknown block type 'minecraft:stonee'", "Too many blocks in the specified area (maximum 32768, specified 40000)"])
+def test_error_response_raises(response):
+    with FakeRconServer(handler=lambda cmd: response if "bad" in cmd else "") as server:
+        with pytest.raises(RconCommandError) as e:
+            pipeline(server, ["setblock 0 0 0 minecraft:stone", "setblock 0 0 0 bad", "setblock 1 0 0 minecraft:stone"])
+        assert (e.value.key, e.value.response) == (2, response)
+
+def test_already_filled_is_confirmed():
+    with FakeRconServer(handler=lambda cmd: "No blocks were filled") as server:
+        assert len(pipeline(server, ["fill 0 0 0 1 1 1 minecraft:stone"])) == 1
+
+def test_failed_command_is_not_journaled(tmp_path):
+    blueprint = write_blueprint(tmp_path / "blueprint.json", [("FillSpec", fill_spec([0, 0, 0], [1, 1, 1])),
+                                                              ("FillSpec", fill_spec([5, 0, 0], [6, 1, 1])),
+                                                              ("FillSpec", fill_spec([9, 0, 0], [9, 1, 1]))])
+    journal_path = str(tmp_path / "blueprint.journal")
+    loaded = lambda cmd: "That position is not loaded" if cmd.startswith("fill 5") else ""
+    with FakeRconServer(handler=loaded) as server:
+        transport = RconTransport(server.host, server.port, retries=1)
+        with pytest.raises(RconCommandError):
+            enter_commands(blueprint, transport=transport, journal_path=journal_path)
+    assert Journal(journal_path).last()[0] == 1
+
+    # resuming retries the failed command rather than skipping it
+    with FakeRconServer() as server:
+        enter_commands(blueprint, transport=RconTransport(server.host, server.port), journal_path=journal_path, resume=True)
+        assert [cmd.split()[1] for cmd in server.commands] == ["5", "9"]
+
+def test_teleport_chunk_loading_is_refused(tmp_path):
+    blueprint = write_blueprint(tmp_path / "blueprint.json", [("FillSpec", fill_spec([0, 0, 0], [1, 1, 1]))])
+    with FakeRconServer() as server:
+        with pytest.raises(ValueError):
+            enter_commands(blueprint, transport=RconTransport(server.host, server.port), schedule=True, chunk_loading="tp")
+        assert server.commands == []
+    cli = subprocess.run([sys.executable, "build.py", "--blueprint_path", blueprint, "--origin", "0", "0", "0", "--transport", "rcon", "--schedule", "--chunk_loading", "tp"],
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True)
+    assert cli.returncode == 2 and "--chunk_loading tp" in cli.stderr
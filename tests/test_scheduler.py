@@ -0,0 +1,55 @@
+import pytest
+
+from compiler import generate_commands
+from helpers import beam_spec, random_specs, world
+from scheduler import CHUNK_SIZE, chunks_of, schedule_commands
+from voxels import Fill
+
+def commands(seed: int):
+    """
+    Fills spread over a few hundred blocks (and a long oblique beam), with a non-fill command halfway.
+    """
+    specs = random_specs(seed, n=150, size=300) + [("BeamSpec", beam_spec([0, 5, 0], [290, 20, 150], thickness=2))]
+    cmds = list(generate_commands(specs, origin=[-100, -60, 40]))
+    return cmds[:len(cmds) // 2] + [("barrier", "say halfway")] + cmds[len(cmds) // 2:]
+
+def replay(scheduled):
+    """
+    Follows the force-loaded chunks through a schedule, checking every fill targets loaded chunks.
+    Returns the chunks left loaded and how many were released before the end.
+    """
+    loaded, released = set(), 0
+    for _, cmd in scheduled:
+        parts = cmd.split()
+        if parts[0] == "forceload":
+            x1, z1, x2, z2 = (int(p) // CHUNK_SIZE for p in parts[2:6])
+            chunks = {(cx, cz) for cx in range(x1, x2 + 1) for cz in range(z1, z2 + 1)}
+            if parts[1] == "add":
+                assert not chunks & loaded
+                loaded |= chunks
+            else:
+                assert chunks <= loaded
+                loaded -= chunks
+                released += len(chunks)
+            continue
+        fill = Fill.parse(cmd)
+        if fill is not None:
+            assert set(chunks_of(fill)) <= loaded, f"{cmd} targets unloaded chunks"
+            final = len(loaded)
+    return loaded, released - final
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("region_size, max_loaded", [(1, 4), (2, 8), (4, 64)])
+def test_schedule_builds_the_same_on_loaded_terrain(seed, region_size, max_loaded):
+    cmds = commands(seed)
+    scheduled = schedule_commands(cmds, region_size=region_size, max_loaded=max_loaded)
+    entered = [cmd for label, cmd in scheduled if label != "chunk loading (scheduler)"]
+    assert sorted(entered) == sorted(cmd for _, cmd in cmds)
+    assert entered.index("say halfway") == [cmd for _, cmd in cmds].index("say halfway") # fills are not moved across other commands
+    assert world(entered) == world(cmd for _, cmd in cmds)
+
+    loaded, released = replay(scheduled)
+    assert loaded == set() # everything is released at the end
+    touched = {chunk for _, cmd in cmds if Fill.parse(cmd) for chunk in chunks_of(Fill.parse(cmd))}
+    if len(touched) > max_loaded:
+        assert released > 0 # least recently used chunks were released along the way
@@ -0,0 +1,38 @@
+import pytest
+
+from build import analysis_report
+from compiler import generate_commands
+from helpers import beam_spec, fill_spec, plane_spec, random_specs
+from sections import SectionStore
+from voxels import Fill, VoxelGrid
+
+@pytest.mark.parametrize("seed", range(3))
+def test_store_counts_match_voxel_grid(seed):
+    cmds = [cmd for _, cmd in generate_commands(random_specs(seed, size=60), origin=[-20, -60, 7])]
+    grid = VoxelGrid.from_commands(cmds)
+    with SectionStore(dense_sections=2) as store: # evicts, so most sections are packed and unpacked again
+        for f in map(Fill.parse, cmds):
+            store.apply(f)
+        assert store.counts() == {grid.palette[i]: int(n) for i, n in enumerate(grid.counts()) if i and n}
+
+def test_analysis_reports_every_tiled_tool_call():
+    specs = [
+        ("BeamSpec", beam_spec([0, 12, 12], [100, 12, 12], thickness=12, direction="X")), # 101x25x25, about 63k blocks
+        ("FillSpec", fill_spec([0, 0, 0], [99, 99, 99], mode="outline")),
+        ("PlaneSpec", plane_spec([0, 0, 0], [400, 3, 700], "XY")),
+        ("BeamSpec", beam_spec([0, 30, 0], [30, 30, 40], thickness=3, shape="circular")),
+        ("FillSpec", fill_spec([0, 0, 0], [10, 10, 10])),
+    ]
+    report = analysis_report(specs, origin=[0, 0, 0])
+    overflows = {o["index"]: o for o in report["overflows"]}
+    assert sorted(overflows) == [0, 1, 2]
+    assert overflows[0]["volume"] == 101 * 25 * 25 and overflows[0]["split"]
+    assert overflows[1]["volume"] == 100 ** 3 and overflows[1]["commands"] == 6
+    assert all(o["split"] for o in report["overflows"])
+
+def test_air_is_not_below_the_origin():
+    # carving air below the origin places no blocks there, unlike a foundation
+    specs = [("FillSpec", fill_spec([0, -3, 0], [4, 2, 4], "minecraft:air")),
+             ("FillSpec", fill_spec([0, -2, 0], [1, 0, 1]))]
+    report = analysis_report(specs, origin=[0, 0, 0])
+    assert report["negative"] == [{"index": 1, "tool": "FillSpec", "explanation": "test", "blocks": 8}]
@@ -0,0 +1,44 @@
+import pytest
+
+from build import enter_commands
+from helpers import beam_spec, random_specs, world, write_blueprint
+from rcon import FakeRconServer
+from transports import AdaptivePacer, FakeKeyboard, KeyboardTransport, ParallelRconTransport, RconTransport
+
+def test_pacer_never_goes_below_delay():
+    pacer = AdaptivePacer(delay=0.1)
+    assert all(pacer.update(0.0001) == 0.1 for _ in range(50))
+
+def test_pacer_backs_off_when_injection_slows_down():
+    pacer = AdaptivePacer(delay=0.1, factor=2.0, smoothing=0.5)
+    delays = [pacer.update(0.3) for _ in range(10)]
+    assert delays == sorted(delays) and 0.1 < delays[0] and abs(delays[-1] - 0.6) < 1e-3
+    assert AdaptivePacer(delay=0.1).update(100.0) == 1.0 # capped at max_delay
+
+def test_adaptive_keyboard_keeps_delay_as_floor():
+    commands = [(i, "test", f"setblock {i} 0 0 minecraft:stone") for i in range(1, 11)]
+    transport = KeyboardTransport(delay=0.002, counter_max=0, injection="bulk", adaptive=True, keyboard=FakeKeyboard())
+    assert [i for i, _, _ in transport.run(commands)] == list(range(1, 11))
+    assert transport.slept >= 2 * 0.002 * len(commands)
+
+def test_adaptive_delay_paces_typing_character_by_character():
+    commands = [(i, "test", f"setblock {i} 0 0 minecraft:stone") for i in range(1, 6)]
+    paced = KeyboardTransport(min_typing_speed=0, delay=0.001, counter_max=0, adaptive=True, keyboard=FakeKeyboard(latency=0.002))
+    assert [i for i, _, _ in paced.run(commands)] == list(range(1, 6))
+    assert paced.slept >= 2 * 0.01 * len(commands) - 1e-9 # slow keystrokes back off to max_delay (10 * delay)
+    randomized = KeyboardTransport(min_typing_speed=0, delay=0.001, counter_max=0, keyboard=FakeKeyboard(latency=0.002))
+    list(randomized.run(commands))
+    assert randomized.slept <= 2 * 2 * 0.001 * len(commands)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_parallel_rcon_builds_the_same_world(seed, tmp_path):
+    specs = random_specs(seed, n=80, size=12) + [("BeamSpec", beam_spec([0, 0, 0], [14, 9, 5], thickness=2, shape="circular"))]
+    blueprint = write_blueprint(tmp_path / "blueprint.json", specs)
+    sent = {}
+    for name, make in (("sequential", lambda s: RconTransport(s.host, s.port)),
+                       ("parallel", lambda s: ParallelRconTransport(s.host, s.port, connections=6))):
+        with FakeRconServer(latency=0.0005) as server: # commands are recorded in the order the server runs them
+            enter_commands(blueprint, transport=make(server), origin=[0, 0, 0], journal_path=str(tmp_path / f"{name}.journal"))
+            sent[name] = list(server.commands)
+    assert sorted(sent["parallel"]) == sorted(sent["sequential"])
+    assert world(sent["parallel"]) == world(sent["sequential"])
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+import compiler
+
+from compiler import beam, fill, generate_commands, plane
+from helpers import beam_spec, fill_spec, plane_spec, random_specs, world
+from voxels import MAX_FILL_VOLUME, prune_occluded, shell_slabs, tile_box
+
+def random_box(rng: random.Random, size: int):
+    lo = tuple(rng.randint(-size, size) for _ in range(3))
+    return lo, tuple(l + rng.randint(0, size) for l in lo)
+
+def cells(boxes):
+    """
+    Every cell of the boxes, counted with multiplicity.
+    """
+    out = []
+    for x1, y1, z1, x2, y2, z2 in boxes:
+        out += [(x, y, z) for x in range(x1, x2 + 1) for y in range(y1, y2 + 1) for z in range(z1, z2 + 1)]
+    return out
+
+@pytest.mark.parametrize("seed", range(40))
+def test_tiles_cover_the_box_exactly(seed):
+    rng = random.Random(seed)
+    lo, hi = random_box(rng, 40)
+    max_volume = rng.choice([1, 7, 64, 1000, MAX_FILL_VOLUME])
+    tiles = tile_box(lo, hi, max_volume)
+    covered = cells(tiles)
+    assert len(covered) == len(set(covered)) # no overlap
+    assert set(covered) == set(cells([(*lo, *hi)]))
+    assert all((x2 - x1 + 1) * (y2 - y1 + 1) * (z2 - z1 + 1) <= max_volume for x1, y1, z1, x2, y2, z2 in tiles)
+    assert all(x1 <= x2 and y1 <= y2 and z1 <= z2 for x1, y1, z1, x2, y2, z2 in tiles)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_shell_slabs_are_the_outline(seed):
+    lo, hi = random_box(random.Random(seed), 12)
+    covered = cells(shell_slabs(lo, hi))
+    shell = {c for c in cells([(*lo, *hi)]) if any(v in (l, h) for v, l, h in zip(c, lo, hi))}
+    assert len(covered) == len(set(covered))
+    assert set(covered) == shell
+
+@pytest.mark.parametrize("mode", ["replace", "outline", "hollow", "keep", "destroy"])
+@pytest.mark.parametrize("size", [(40, 30, 50), (100, 5, 80), (2000, 3, 9), (33, 33, 33)])
+def test_tiled_fill_builds_the_same_as_untiled(mode, size):
+    hi = [s - 1 for s in size]
+    site = [f"fill {x} {y} {z} {x + 4} {y + 2} {z + 3} minecraft:glass replace" for x, y, z in ((0, 0, 0), (10, 1, 12), (hi[0] - 2, hi[1], hi[2] - 1))]
+    untiled = f"fill 0 0 0 {hi[0]} {hi[1]} {hi[2]} minecraft:stone {mode}"
+    spec = fill_spec([0, 0, 0], hi) # hollow and destroy are valid /fill modes that FillSpec does not offer
+    tiled = fill(spec.model_copy(update={"mode": mode}), origin=[0, 0, 0])
+    assert len(tiled) > 1
+    assert all((x2 - x1 + 1) * (y2 - y1 + 1) * (z2 - z1 + 1) <= MAX_FILL_VOLUME
+               for x1, y1, z1, x2, y2, z2 in (map(int, cmd.split()[1:7]) for cmd in tiled))
+    assert world(site + tiled) == world(site + [untiled])
+
+@pytest.mark.parametrize("build", [
+    lambda: beam(beam_spec([0, 0, 0], [200, 0, 0], thickness=20, fill="hollow", direction="X"), origin=[0, 0, 0]),
+    lambda: beam(beam_spec([0, 0, 0], [200, 0, 0], thickness=20, shape="circular", fill="hollow", direction="X"), origin=[0, 0, 0]),
+    lambda: beam(beam_spec([0, 0, 0], [0, 150, 0], thickness=15).model_copy(update={"mode": "outline"}), origin=[0, 0, 0]),
+    lambda: plane(plane_spec([0, 0, 0], [300, 2, 400], "XY"), origin=[0, 0, 0]),
+])
+def test_tiled_tool_output_builds_the_same_as_untiled(build, monkeypatch):
+    tiled = build()
+    monkeypatch.setattr(compiler, "MAX_FILL_VOLUME", 10 ** 9)
+    untiled = build()
+    assert len(tiled) > len(untiled)
+    assert world(tiled) == world(untiled)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pruning_builds_the_same(seed):
+    cmds = [cmd for _, cmd in generate_commands(random_specs(seed, n=80, size=15), origin=[0, 0, 0])]
+    pruned = prune_occluded(cmds)
+    assert len(pruned) == len(cmds) and None in pruned
+    assert world(cmd for cmd in pruned if cmd is not None) == world(cmds)
+
+def test_fully_covered_fill_is_dropped():
+    cmds = ["fill 1 1 1 2 2 2 minecraft:stone replace", "say hi", "fill 0 0 0 5 5 5 minecraft:glass replace"]
+    assert prune_occluded(cmds) == [None, "say hi", cmds[2]]
+
+@pytest.mark.parametrize("mode", ["replace", "keep"])
+def test_partly_covered_fill_is_shrunk(mode):
+    cmds = [f"fill 0 0 0 9 3 3 minecraft:stone {mode}", "fill 5 0 0 9 3 3 minecraft:glass replace", "fill 0 2 0 4 3 3 minecraft:glass replace"]
+    assert prune_occluded(cmds) == [f"fill 0 0 0 4 1 3 minecraft:stone {mode}", cmds[1], cmds[2]]
+
+def test_keep_fills_hide_nothing():
+    cmds = ["fill 0 0 0 3 3 3 minecraft:stone replace", "fill 0 0 0 3 3 3 minecraft:glass keep"]
+    assert prune_occluded(cmds) == cmds
+    assert set(world(cmds).values()) == {"minecraft:stone"}
+
+def test_outline_fills_hide_only_their_shell():
+    inside = "fill 1 1 1 3 3 3 minecraft:stone replace"
+    on_shell = "fill 0 0 0 4 0 4 minecraft:stone replace"
+    outline = "fill 0 0 0 4 4 4 minecraft:glass outline"
+    assert prune_occluded([inside, on_shell, outline]) == [inside, None, outline]
+    assert prune_occluded([outline, "fill 0 0 0 4 4 4 minecraft:glass replace"]) == [None, "fill 0 0 0 4 4 4 minecraft:glass replace"]
+    # a solid fill under an outline keeps its inside
+    cmds = ["fill 0 0 0 4 4 4 minecraft:stone replace", outline]
+    assert prune_occluded(cmds) == [inside, outline]
+    assert world(prune_occluded(cmds)) == world(cmds)
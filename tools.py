@@ -1,5 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal, List, Dict, Union
+from typing import Annotated, Optional, Literal, List, Dict, Union
+
+MAX_SHAPE_RADIUS = 128 # shapes are rasterized as dense (2r+1)^3 masks, so their size is bounded
+MAX_SHAPE_HEIGHT = 384 # the height of the world
 
 class FillSpec(BaseModel):
     """
@@ -133,4 +136,146 @@ class PlaneSpec(BaseModel):
     reason: str = Field(
         ...,
         description="Short reasoning about why this plane is being placed."
+    )
+
+
+
+
+class SphereSpec(BaseModel):
+    """
+    Draws a sphere, or its upper or lower half (a dome or a bowl), around a center point.
+    """
+    center_coordinates: List[int] = Field(
+        ...,
+        description="3D center point of the sphere. Must be non-negative integers."
+    )
+    radius: int = Field(
+        ...,
+        le=MAX_SHAPE_RADIUS,
+        description=f"Radius of the sphere in blocks, at most {MAX_SHAPE_RADIUS}."
+    )
+    part: Literal["full", "upper", "lower"] = Field(
+        default="full",
+        description="Whole sphere, only the half above the center (dome) or only the half below it (bowl)."
+    )
+    block: str = Field(
+        ...,
+        description='Block to use for the sphere, e.g. "minecraft:glass".'
+    )
+    block_states: Optional[Union[Dict[str, str], str]] = Field(
+        default=None,
+        description="Optional block state properties."
+    )
+    mode: Literal["replace", "keep"] = Field(
+        ...,
+        description="replace = replace all blocks, keep = only fill air blocks."
+    )
+    fill: Literal["filled", "hollow"] = Field(
+        ...,
+        description="Whether the sphere is solid or only a 1-block-thick surface, leaving the inside untouched."
+    )
+    explanation: str = Field(
+        ...,
+        description="Brief explanation of the operation."
+    )
+    reason: str = Field(
+        ...,
+        description="Short reasoning about why this sphere is being placed."
+    )
+
+
+
+
+class EllipsoidSpec(BaseModel):
+    """
+    Draws an axis-aligned ellipsoid (stretched sphere), or its upper or lower half, around a center point.
+    Useful for hulls, domes and canopies that are wider than they are tall, or vice versa.
+    """
+    center_coordinates: List[int] = Field(
+        ...,
+        description="3D center point of the ellipsoid. Must be non-negative integers."
+    )
+    radii: List[Annotated[int, Field(le=MAX_SHAPE_RADIUS)]] = Field(
+        ...,
+        description=f"List of the 3 radii of the ellipsoid along X, Y and Z in blocks, each at most {MAX_SHAPE_RADIUS}."
+    )
+    part: Literal["full", "upper", "lower"] = Field(
+        default="full",
+        description="Whole ellipsoid, only the half above the center or only the half below it (e.g. a ship's hull)."
+    )
+    block: str = Field(
+        ...,
+        description='Block to use for the ellipsoid, e.g. "minecraft:oak_planks".'
+    )
+    block_states: Optional[Union[Dict[str, str], str]] = Field(
+        default=None,
+        description="Optional block state properties."
+    )
+    mode: Literal["replace", "keep"] = Field(
+        ...,
+        description="replace = replace all blocks, keep = only fill air blocks."
+    )
+    fill: Literal["filled", "hollow"] = Field(
+        ...,
+        description="Whether the ellipsoid is solid or only a 1-block-thick surface, leaving the inside untouched."
+    )
+    explanation: str = Field(
+        ...,
+        description="Brief explanation of the operation."
+    )
+    reason: str = Field(
+        ...,
+        description="Short reasoning about why this ellipsoid is being placed."
+    )
+
+
+
+
+class ConeSpec(BaseModel):
+    """
+    Draws a cone with a circular base, narrowing to a single-block tip, along one axis.
+    Useful for spires, roofs of round towers and trees.
+    """
+    base_coordinates: List[int] = Field(
+        ...,
+        description="3D center point of the cone's base. Must be non-negative integers."
+    )
+    radius: int = Field(
+        ...,
+        le=MAX_SHAPE_RADIUS,
+        description=f"Radius of the base in blocks, at most {MAX_SHAPE_RADIUS}."
+    )
+    height: int = Field(
+        ...,
+        ge=-MAX_SHAPE_HEIGHT,
+        le=MAX_SHAPE_HEIGHT,
+        description="Distance from the base to the tip in blocks; negative to point towards decreasing coordinates (e.g. downwards)."
+    )
+    direction: Literal["X", "Y", "Z"] = Field(
+        default="Y",
+        description="Axis the cone points along, Y for upright spires."
+    )
+    block: str = Field(
+        ...,
+        description='Block to use for the cone, e.g. "minecraft:dark_oak_planks".'
+    )
+    block_states: Optional[Union[Dict[str, str], str]] = Field(
+        default=None,
+        description="Optional block state properties."
+    )
+    mode: Literal["replace", "keep"] = Field(
+        ...,
+        description="replace = replace all blocks, keep = only fill air blocks."
+    )
+    fill: Literal["filled", "hollow"] = Field(
+        ...,
+        description="Whether the cone is solid or only a 1-block-thick surface, leaving the inside untouched."
+    )
+    explanation: str = Field(
+        ...,
+        description="Brief explanation of the operation."
+    )
+    reason: str = Field(
+        ...,
+        description="Short reasoning about why this cone is being placed."
     )
\ No newline at end of file
@@ -0,0 +1,327 @@
+import sys
+import time
+import queue
+import random
+import argparse
+import threading
+import contextlib
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+from rcon import RconClient
+
+def default_keyboard():
+    """
+    pynput's keyboard Controller, imported on first use: it needs a display, which headless runs (compile, export, RCON) lack.
+    """
+    from pynput.keyboard import Controller
+    return Controller()
+
+class FakeKeyboard:
+    """
+    Keyboard sink with pynput's Controller interface that only counts keystrokes, optionally spending
+    latency seconds per key, for benchmarking and testing KeyboardTransport without a display.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.keys = 0
+
+    def press(self, key):
+        self.keys += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def release(self, key):
+        pass
+
+    def type(self, text):
+        self.keys += len(text)
+        if self.latency:
+            time.sleep(self.latency * len(text))
+
+    @contextlib.contextmanager
+    def pressed(self, *keys):
+        yield
+
+class AdaptivePacer:
+    """
+    Inter-command delay that backs off when keystroke injection slows down: an exponential moving average
+    of how long each command's keystrokes took to inject, scaled by factor and clamped to [delay, max_delay].
+    Minecraft gives no feedback on typed commands, so this only measures the local keyboard.type() time;
+    delay is kept as the floor and the pacer only ever lengthens the pause.
+    """
+
+    def __init__(self, delay=0.2, max_delay=None, factor=2.0, smoothing=0.2):
+        self.floor = delay
+        self.delay = delay
+        self.max_delay = max_delay if max_delay is not None else 10 * delay
+        self.factor = factor
+        self.smoothing = smoothing
+        self.average = None
+
+    def update(self, seconds: float) -> float:
+        self.average = seconds if self.average is None else (1 - self.smoothing) * self.average + self.smoothing * seconds
+        self.delay = min(max(self.factor * self.average, self.floor), self.max_delay)
+        return self.delay
+
+class KeyboardTransport:
+    """
+    Types each command into the Minecraft chat by simulating keyboard input.
+    Minecraft must be the active window, with the console open and blank.
+
+    injection="char" types one character at a time with randomized sleeps and echoes every character;
+    "bulk" types each command in one call and "paste" pastes it from the clipboard (needs pyperclip),
+    both with throttled echo. In every mode, adaptive replaces the randomized inter-command delays with an AdaptivePacer, which never goes below delay.
+    """
+
+    def __init__(self, min_typing_speed=0.001, delay=0.2, counter_max=10, injection="char", adaptive=False, echo_interval=0.1, keyboard=None, clipboard=None):
+        self.min_typing_speed = min_typing_speed
+        self.delay = delay
+        self.counter_max = counter_max
+        self.injection = injection
+        self.adaptive = adaptive
+        self.echo_interval = echo_interval
+        self.keyboard = keyboard
+        self.clipboard = clipboard
+        self.slept = 0.0 # total seconds spent in deliberate sleeps, for instrumentation
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds)
+        self.slept += seconds
+
+    def run(self, commands: Iterable[Tuple[int, str, str]]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        Types (index, label, command) triples in order, yielding (index, command, None) once each is entered.
+        """
+        if self.injection != "char":
+            yield from self._run_fast(commands)
+            return
+
+        min_typing_speed, delay = self.min_typing_speed, self.delay
+
+        self._countdown()
+        keyboard = self.keyboard or default_keyboard()
+        pacer = AdaptivePacer(delay) if self.adaptive else None
+
+        for i, label, cmd in commands:
+            print(f"[{i}] {label}: ", end="", flush=True)
+            injected = 0.0 # seconds spent in keyboard calls, without the deliberate sleeps
+
+            t = time.perf_counter()
+            keyboard.press('/')
+            injected += time.perf_counter() - t
+            self._sleep(min_typing_speed*(1+random.random()))
+            keyboard.release('/')
+
+            # type command
+            for char in cmd:
+                t = time.perf_counter()
+                keyboard.type(char)
+                injected += time.perf_counter() - t
+                print(char, end="", flush=True)
+                self._sleep(min_typing_speed*(1+random.random())) # just in case there is some kind of captcha
+            
+            # enter
+            print()
+            t = time.perf_counter()
+            keyboard.type('\n')
+            injected += time.perf_counter() - t
+            self._sleep(min_typing_speed*(1+random.random()))
+
+            pause = pacer.update(injected) if pacer else None
+            self._sleep(pause if pacer else delay*(1+random.random()))
+
+            # open chat
+            keyboard.press('t')
+            self._sleep(min_typing_speed*(1+random.random()))
+            keyboard.release('t')
+
+            self._sleep(pause if pacer else delay*(1+random.random()))
+
+            yield i, cmd, None
+
+    def _countdown(self):
+        print("Please make Minecraft the active window, with the console active and blank.")
+        for i in range(self.counter_max):
+            print(f"Countdown: {self.counter_max-i} s", end=" \r")
+            self._sleep(1)
+
+    def _run_fast(self, commands: Iterable[Tuple[int, str, str]]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        self._countdown()
+        keyboard = self.keyboard or default_keyboard()
+        pacer = AdaptivePacer(self.delay) if self.adaptive else None
+
+        clipboard = self.clipboard
+        if self.injection == "paste" and clipboard is None:
+            import pyperclip
+            clipboard = pyperclip.copy
+        if self.injection == "paste":
+            paste_modifier = "cmd" if sys.platform == "darwin" else "ctrl"
+            if self.keyboard is None:
+                from pynput.keyboard import Key
+                paste_modifier = getattr(Key, paste_modifier)
+
+        last_echo = 0.0
+        for i, label, cmd in commands:
+            t = time.perf_counter()
+            if self.injection == "paste":
+                clipboard("/" + cmd)
+                with keyboard.pressed(paste_modifier):
+                    keyboard.press('v')
+                    keyboard.release('v')
+                keyboard.type('\n')
+            else:
+                keyboard.type("/" + cmd + "\n")
+            injected = time.perf_counter() - t
+
+            if t - last_echo >= self.echo_interval:
+                print(f"[{i}] {label}: {cmd}", flush=True)
+                last_echo = t
+
+            pause = pacer.update(injected) if pacer else self.delay*(1+random.random())
+            self._sleep(pause)
+
+            # open chat
+            keyboard.press('t')
+            keyboard.release('t')
+
+            self._sleep(pause)
+
+            yield i, cmd, None
+
+    def estimate_seconds(self, commands: Iterable[str]) -> Tuple[float, float, float]:
+        """
+        (best, expected, worst) wall-clock time for run() to type commands, from its randomized sleeps:
+        min_typing_speed*(1+random()) per character plus three control keys (char injection only),
+        and delay*(1+random()) twice per command. Python and OS overhead per keystroke is not included.
+        """
+        n_commands = n_chars = 0
+        for cmd in commands:
+            n_commands += 1
+            n_chars += len(cmd)
+        base = 2 * self.delay * n_commands
+        if self.injection == "char":
+            base += self.min_typing_speed * (n_chars + 3 * n_commands)
+        return self.counter_max + base, self.counter_max + 1.5 * base, self.counter_max + 2 * base
+
+class RconTransport:
+    """
+    Sends commands over one persistent RCON connection (enable-rcon in server.properties), no window focus needed.
+    """
+
+    def __init__(self, host="localhost", port=25575, password="", window=1, retries=3):
+        self.client = RconClient(host, port, password)
+        self.window = window
+        self.retries = retries
+
+    def run(self, commands: Iterable[Tuple[int, str, str]]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        Pipelines (index, label, command) triples, yielding (index, command, response) as the server confirms them.
+        """
+        labels = {}
+
+        def keyed():
+            for i, label, cmd in commands:
+                labels[i] = label
+                yield i, cmd
+
+        with self.client:
+            for i, cmd, response in self.client.pipeline(keyed(), window=self.window, retries=self.retries):
+                print(f"[{i}] {labels.pop(i)}: {cmd}" + (f" -> {response}" if response else ""), flush=True)
+                yield i, cmd, response
+
+class ParallelRconTransport:
+    """
+    Sends commands over several RCON connections at once, each stop-and-wait (safe on vanilla servers).
+    Only commands whose dependencies (scheduler.command_dependencies: overlapping fills that do not commute, and every
+    non-fill command) are confirmed get dispatched, so the world ends up the same as with one connection.
+    Confirmed commands are yielded in index order, so the progress journal stays a prefix of the run.
+    """
+
+    def __init__(self, host="localhost", port=25575, password="", connections=4, retries=3):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.connections = connections
+        self.retries = retries
+
+    def run(self, commands: Iterable[Tuple[int, str, str]]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        Dispatches (index, label, command) triples, yielding (index, command, response) in index order as the server confirms them.
+        The whole sequence is read up front to build the dependency DAG.
+        """
+        from scheduler import command_dependencies
+
+        commands = list(commands)
+        successors, indegree = command_dependencies([cmd for _, _, cmd in commands])
+        ready, confirmed = queue.Queue(), queue.Queue()
+
+        def send():
+            try:
+                with RconClient(self.host, self.port, self.password) as client:
+                    for k in iter(ready.get, None):
+                        for _, _, response in client.pipeline([(k, commands[k][2])], retries=self.retries):
+                            confirmed.put((k, response))
+            except BaseException as e:
+                confirmed.put((None, e))
+
+        for k, degree in enumerate(indegree):
+            if degree == 0:
+                ready.put(k)
+        senders = [threading.Thread(target=send, daemon=True) for _ in range(min(self.connections, len(commands)))]
+        for sender in senders:
+            sender.start()
+
+        responses = {} # confirmed but not yielded yet
+        next_k = 0
+        try:
+            while next_k < len(commands):
+                k, response = confirmed.get()
+                if k is None:
+                    raise response
+                for after in successors[k]:
+                    indegree[after] -= 1
+                    if indegree[after] == 0:
+                        ready.put(after)
+                responses[k] = response
+                while next_k in responses:
+                    i, label, cmd = commands[next_k]
+                    response = responses.pop(next_k)
+                    print(f"[{i}] {label}: {cmd}" + (f" -> {response}" if response else ""), flush=True)
+                    yield i, cmd, response
+                    next_k += 1
+        finally:
+            for _ in senders:
+                ready.put(None)
+
+def add_transport_arguments(parser: argparse.ArgumentParser):
+    """
+    Command line options selecting and configuring the transport (see make_transport).
+    """
+    parser.add_argument("--min_typing_speed", type=float, default=0.0005,
+                        help="Minimum typing speed (seconds per character).")
+    parser.add_argument("--delay", type=float, default=0.1,
+                        help="Delay between commands (seconds).")
+    parser.add_argument("--counter_max", type=int, default=20,
+                        help="Number of seconds to count down before starting, to allow for switching to Minecraft window.")
+    parser.add_argument("--injection", choices=["char", "bulk", "paste"], default="char",
+                        help="Keyboard transport: type character by character (slowest, most robust), whole commands at once, or paste each command from the clipboard (needs pyperclip).")
+    parser.add_argument("--adaptive_delay", action="store_true",
+                        help="Keyboard transport: lengthen the delay between commands when keystroke injection slows down. --delay stays the minimum, since Minecraft itself gives no feedback.")
+    parser.add_argument("--transport", choices=["keyboard", "rcon"], default="keyboard",
+                        help="How to enter commands: simulated typing into the focused Minecraft window, or a direct RCON connection to a server.")
+    parser.add_argument("--host", type=str, default="localhost", help="RCON host.")
+    parser.add_argument("--port", type=int, default=25575, help="RCON port.")
+    parser.add_argument("--password", type=str, default="", help="RCON password.")
+    parser.add_argument("--rcon_window", type=int, default=1,
+                        help="Maximum number of RCON commands in flight. Vanilla servers drop the connection on pipelined packets, so only raise this for servers that support it.")
+    parser.add_argument("--rcon_connections", type=int, default=1,
+                        help="Number of RCON connections to send independent commands over concurrently (commands whose cuboids overlap keep their order).")
+
+def make_transport(args: argparse.Namespace):
+    if args.transport == "rcon" and args.rcon_connections > 1:
+        return ParallelRconTransport(host=args.host, port=args.port, password=args.password, connections=args.rcon_connections)
+    if args.transport == "rcon":
+        return RconTransport(host=args.host, port=args.port, password=args.password, window=args.rcon_window)
+    return KeyboardTransport(min_typing_speed=args.min_typing_speed, delay=args.delay, counter_max=args.counter_max, injection=args.injection, adaptive=args.adaptive_delay)
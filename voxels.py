@@ -0,0 +1,350 @@
+import numpy as np
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+MAX_FILL_VOLUME = 32768 # Minecraft's default commandModificationBlockLimit
+AIR = "minecraft:air"
+FILL_MODES = ("replace", "keep", "outline", "hollow", "destroy")
+
+def is_air(block: str) -> bool:
+    return block.partition("[")[0] in (AIR, "air") # beam trims carry the beam's block states
+
+class Fill(NamedTuple):
+    """
+    A parsed /fill command, with corners sorted so that (x1, y1, z1) <= (x2, y2, z2).
+    """
+    x1: int
+    y1: int
+    z1: int
+    x2: int
+    y2: int
+    z2: int
+    block: str
+    mode: str = "replace"
+
+    @classmethod
+    def parse(cls, cmd: str) -> Optional["Fill"]:
+        """
+        Parses a command produced by the wrappers in build.py, returns None if it is not a plain /fill.
+        """
+        parts = cmd.split()
+        if len(parts) < 8 or parts[0].lstrip("/") != "fill":
+            return None
+        try:
+            x1, y1, z1, x2, y2, z2 = (int(p) for p in parts[1:7])
+        except ValueError: # relative (~) or local (^) coordinates
+            return None
+        if len(parts) > 8 and parts[-1] in FILL_MODES:
+            block, mode = " ".join(parts[7:-1]), parts[-1]
+        else:
+            block, mode = " ".join(parts[7:]), "replace"
+        return cls(min(x1, x2), min(y1, y2), min(z1, z2), max(x1, x2), max(y1, y2), max(z1, z2), block, mode)
+
+    def command(self) -> str:
+        return f"fill {self.x1} {self.y1} {self.z1} {self.x2} {self.y2} {self.z2} {self.block} {self.mode}"
+
+    @property
+    def volume(self) -> int:
+        return (self.x2 - self.x1 + 1) * (self.y2 - self.y1 + 1) * (self.z2 - self.z1 + 1)
+
+
+def greedy_boxes(mask: np.ndarray, max_volume: int = MAX_FILL_VOLUME, allowed: Optional[np.ndarray] = None) -> Iterator[Tuple[int, int, int, int, int, int]]:
+    """
+    Greedy-meshes a boolean 3D mask into disjoint cuboids (x1, y1, z1, x2, y2, z2), inclusive and in mask coordinates,
+    each no larger than max_volume. Runs are grown along z first, then y, then x.
+    With allowed (a superset of mask), cuboids may also run through allowed cells, e.g. cells a later fill overwrites,
+    so they may overlap each other; each is then shrunk to the mask cells it covers.
+    """
+    mask = mask.copy()
+    grow = mask if allowed is None else allowed
+    X, Y, Z = mask.shape
+    for x, y in np.argwhere(mask.any(axis=2)):
+        x, y = int(x), int(y)
+        z = 0
+        while True:
+            rest = mask[x, y, z:]
+            if not rest.any(): # row exhausted, possibly by earlier cuboids
+                break
+            z += int(np.argmax(rest))
+
+            row = grow[x, y, z:z + max_volume]
+            l = len(row) if row.all() else int(np.argmin(row))
+            rows = grow[x, y:y + max_volume // l, z:z + l].all(axis=1)
+            h = len(rows) if rows.all() else int(np.argmin(rows))
+            slabs = grow[x:x + max_volume // (h * l), y:y + h, z:z + l].all(axis=(1, 2))
+            w = len(slabs) if slabs.all() else int(np.argmin(slabs))
+
+            box = (x, y, z, x + w - 1, y + h - 1, z + l - 1)
+            if allowed is not None:
+                covered = mask[x:x + w, y:y + h, z:z + l]
+                xs = np.flatnonzero(covered.any(axis=(1, 2)))
+                ys = np.flatnonzero(covered.any(axis=(0, 2)))
+                zs = np.flatnonzero(covered.any(axis=(0, 1)))
+                box = (x + int(xs[0]), y + int(ys[0]), z + int(zs[0]), x + int(xs[-1]), y + int(ys[-1]), z + int(zs[-1]))
+            mask[x:x + w, y:y + h, z:z + l] = False
+            yield box
+            z += l
+
+
+def _axis_splits(d: int) -> Iterator[Tuple[int, int]]:
+    """
+    (n, s) for every distinct largest part size s = ceil(d / n) of a length-d axis cut into n parts, with the smallest such n.
+    """
+    n = 1
+    while n <= d:
+        s = -(-d // n)
+        yield n, s
+        n = -(-d // (s - 1)) if s > 1 else d + 1
+
+def _axis_parts(a: int, d: int, n: int) -> List[Tuple[int, int]]:
+    return [(a + k * d // n, a + (k + 1) * d // n - 1) for k in range(n)]
+
+def tile_box(lo: Tuple[int, int, int], hi: Tuple[int, int, int], max_volume: int = MAX_FILL_VOLUME) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    Splits the inclusive box lo..hi into as few cuboids (x1, y1, z1, x2, y2, z2) of at most max_volume blocks as
+    any nx * ny * nz grid allows: every distinct way of cutting x and y is tried, with z then cut as coarsely as the
+    limit permits, and each axis is cut into nearly equal parts. The tiles cover the box exactly, without overlap.
+    """
+    d = [h - l + 1 for l, h in zip(lo, hi)]
+    best = None
+    for nx, sx in _axis_splits(d[0]):
+        if best is not None and nx >= best[0]:
+            break
+        for ny, sy in _axis_splits(d[1]):
+            if sx * sy > max_volume:
+                continue
+            if best is not None and nx * ny >= best[0]:
+                break
+            nz = -(-d[2] // min(d[2], max_volume // (sx * sy)))
+            if best is None or nx * ny * nz < best[0]:
+                best = (nx * ny * nz, nx, ny, nz)
+    if best is None:
+        raise ValueError(f"max_volume must be positive, got {max_volume}")
+    _, nx, ny, nz = best
+    return [(xa, ya, za, xb, yb, zb)
+            for xa, xb in _axis_parts(lo[0], d[0], nx)
+            for ya, yb in _axis_parts(lo[1], d[1], ny)
+            for za, zb in _axis_parts(lo[2], d[2], nz)]
+
+def tile_groups(fills: Iterable[Fill]) -> Iterator[Tuple[Fill, int]]:
+    """
+    Regroups consecutive fills of the same block and mode that together cover a box exactly, the way fill() tiles
+    a box over the limit and greedy_boxes caps its cuboids: yields (the box they cover, number of fills).
+    """
+    group = None
+    for f in fills:
+        if group is not None and (f.block, f.mode) == (box.block, box.mode):
+            merged = Fill(min(box.x1, f.x1), min(box.y1, f.y1), min(box.z1, f.z1), max(box.x2, f.x2), max(box.y2, f.y2), max(box.z2, f.z2), f.block, f.mode)
+            if merged.volume == volume + f.volume:
+                box, volume, group = merged, merged.volume, group + 1
+                continue
+        if group is not None:
+            yield box, group
+        box, volume, group = f, f.volume, 1
+    if group is not None:
+        yield box, group
+
+def shell_slabs(lo: Tuple[int, int, int], hi: Tuple[int, int, int]) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    The blocks an outline fill of the inclusive box lo..hi changes, as disjoint slabs: bottom and top layers,
+    then the two x faces between them, then the two z faces between those. A box without interior is its own shell.
+    """
+    (x1, y1, z1), (x2, y2, z2) = lo, hi
+    if x2 - x1 < 2 or y2 - y1 < 2 or z2 - z1 < 2:
+        return [(x1, y1, z1, x2, y2, z2)]
+    return [
+        (x1, y1, z1, x2, y1, z2), (x1, y2, z1, x2, y2, z2),
+        (x1, y1 + 1, z1, x1, y2 - 1, z2), (x2, y1 + 1, z1, x2, y2 - 1, z2),
+        (x1 + 1, y1 + 1, z1, x2 - 1, y2 - 1, z1), (x1 + 1, y1 + 1, z2, x2 - 1, y2 - 1, z2),
+    ]
+
+
+def box_slices(fill: Fill, lo: Tuple[int, int, int]) -> Tuple[slice, slice, slice]:
+    """
+    Index of fill's cuboid in an array whose [0, 0, 0] is at world position lo.
+    """
+    lx, ly, lz = lo
+    return np.s_[fill.x1 - lx:fill.x2 - lx + 1, fill.y1 - ly:fill.y2 - ly + 1, fill.z1 - lz:fill.z2 - lz + 1]
+
+
+class VoxelGrid:
+    """
+    Dense voxel rasterization of a sequence of /fill commands.
+    Each cell holds an index into `palette`; index 0 means the cell was never touched by any command.
+    """
+
+    def __init__(self, lo: Tuple[int, int, int], hi: Tuple[int, int, int]):
+        self.lo = tuple(lo)
+        self.hi = tuple(hi)
+        self.cells = np.zeros([b - a + 1 for a, b in zip(lo, hi)], dtype=np.uint16)
+        self.palette: List[Optional[str]] = [None]
+        self._index = {}
+
+    @classmethod
+    def from_commands(cls, cmds: Iterable[str]) -> "VoxelGrid":
+        fills = [f for f in (Fill.parse(cmd) for cmd in cmds) if f is not None]
+        if not fills:
+            return cls((0, 0, 0), (-1, -1, -1))
+        lo = (min(f.x1 for f in fills), min(f.y1 for f in fills), min(f.z1 for f in fills))
+        hi = (max(f.x2 for f in fills), max(f.y2 for f in fills), max(f.z2 for f in fills))
+        grid = cls(lo, hi)
+        for f in fills:
+            grid.apply(f)
+        return grid
+
+    def block_index(self, block: str) -> int:
+        if is_air(block):
+            block = AIR
+        if block not in self._index:
+            self._index[block] = len(self.palette)
+            self.palette.append(block)
+        return self._index[block]
+
+    def counts(self, slab: int = 16) -> np.ndarray:
+        """
+        Number of cells holding each palette index, counted a slab of x-layers at a time.
+        """
+        counts = np.zeros(len(self.palette), dtype=np.int64)
+        for x0 in range(0, self.cells.shape[0], slab):
+            counts += np.bincount(self.cells[x0:x0 + slab].ravel(), minlength=len(self.palette))
+        return counts
+
+    def region(self, fill: Fill) -> np.ndarray:
+        return self.cells[box_slices(fill, self.lo)]
+
+    def apply(self, fill: Fill):
+        """
+        Applies one /fill with Minecraft's semantics, treating untouched cells as air.
+        """
+        region = self.region(fill)
+        v = self.block_index(fill.block)
+        if fill.mode == "keep":
+            empty = region == 0
+            if AIR in self._index:
+                empty |= region == self._index[AIR]
+            region[empty] = v
+        elif fill.mode in ("outline", "hollow"):
+            inner = region[1:-1, 1:-1, 1:-1]
+            if fill.mode == "hollow":
+                inner[...] = self.block_index(AIR)
+            saved = inner.copy()
+            region[...] = v
+            inner[...] = saved
+        else:
+            region[...] = v
+
+    def cuboids(self, include_air: bool = False) -> Iterator[Fill]:
+        """
+        Yields greedy-meshed "replace" fills rebuilding the final result on an empty build site, in overwrite order:
+        blocks are placed in the order the commands first used them, and the cuboids of each may run through the cells
+        of blocks placed after it and through air the commands carved out, both of which get overwritten later.
+        Air comes last, only where an earlier cuboid ran through it (every carved cell if include_air, for sites that are not empty).
+        Cells no command touched are never filled.
+        """
+        lx, ly, lz = self.lo
+        air = self._index.get(AIR)
+        carved = self.cells == air if air is not None else np.zeros(self.cells.shape, dtype=bool)
+        remaining = (self.cells != 0) & ~carved # cells of the blocks not placed yet
+        spilled = carved.copy() if include_air else np.zeros(self.cells.shape, dtype=bool)
+        for v, block in enumerate(self.palette):
+            if block is None or v == air:
+                continue
+            cells = self.cells == v
+            for x1, y1, z1, x2, y2, z2 in greedy_boxes(cells, allowed=remaining | carved):
+                spilled[x1:x2 + 1, y1:y2 + 1, z1:z2 + 1] |= carved[x1:x2 + 1, y1:y2 + 1, z1:z2 + 1]
+                yield Fill(x1 + lx, y1 + ly, z1 + lz, x2 + lx, y2 + ly, z2 + lz, block, "replace")
+            remaining &= ~cells
+        if spilled.any():
+            empty = carved if include_air else carved | (self.cells == 0) # untouched cells are only air on an empty site
+            for x1, y1, z1, x2, y2, z2 in greedy_boxes(spilled, allowed=empty):
+                yield Fill(x1 + lx, y1 + ly, z1 + lz, x2 + lx, y2 + ly, z2 + lz, AIR, "replace")
+
+
+def diff_cuboids(old: VoxelGrid, new: VoxelGrid) -> Iterator[Fill]:
+    """
+    Greedy-meshed "replace" fills turning the result of old into the result of new: for each block, the cells that
+    change to it, then air for the cells new leaves empty. Untouched cells count as air in both.
+    """
+    grids = [g for g in (old, new) if g.cells.size]
+    if not grids:
+        return
+    lo = tuple(min(g.lo[a] for g in grids) for a in range(3))
+    hi = tuple(max(g.hi[a] for g in grids) for a in range(3))
+    ids = {AIR: 0}
+    for g in grids:
+        for b in g.palette[1:]:
+            ids.setdefault(b, len(ids))
+
+    def embed(g: VoxelGrid) -> np.ndarray:
+        cells = np.zeros([b - a + 1 for a, b in zip(lo, hi)], dtype=np.int32) # all air
+        if g.cells.size:
+            lut = np.array([0 if b is None else ids[b] for b in g.palette], dtype=np.int32)
+            cells[box_slices(Fill(*g.lo, *g.hi, AIR), lo)] = lut[g.cells]
+        return cells
+
+    before, after = embed(old), embed(new)
+    changed = before != after
+    if not changed.any():
+        return
+    # only mesh the bounding box of the change, so the work follows the size of the edit rather than of the build
+    where = np.argwhere(changed)
+    (x1, y1, z1), (x2, y2, z2) = where.min(axis=0), where.max(axis=0)
+    window = np.s_[x1:x2 + 1, y1:y2 + 1, z1:z2 + 1]
+    changed, after = changed[window], after[window]
+    ox, oy, oz = lo[0] + int(x1), lo[1] + int(y1), lo[2] + int(z1)
+    for block, v in [*list(ids.items())[1:], (AIR, 0)]:
+        for xa, ya, za, xb, yb, zb in greedy_boxes(changed & (after == v)):
+            yield Fill(xa + ox, ya + oy, za + oz, xb + ox, yb + oy, zb + oz, block, "replace")
+
+def _shell(shape: Tuple[int, ...]) -> np.ndarray:
+    shell = np.ones(shape, dtype=bool)
+    shell[1:-1, 1:-1, 1:-1] = False
+    return shell
+
+def prune_occluded(cmds: List[str]) -> List[Optional[str]]:
+    """
+    Dead-command elimination: walks the commands backwards, tracking cells that later commands definitively overwrite
+    (the box of replace/hollow/destroy fills, the shell of outline fills; keep fills overwrite nothing for sure).
+    Returns a list aligned with cmds holding None for commands whose effect is fully hidden, a shrunk /fill for
+    replace/keep fills that are only partly hidden, and the original command otherwise. The final voxel result is unchanged.
+    """
+    fills = [Fill.parse(cmd) for cmd in cmds]
+    boxes = [f for f in fills if f is not None]
+    if not boxes:
+        return list(cmds)
+    lo = (min(f.x1 for f in boxes), min(f.y1 for f in boxes), min(f.z1 for f in boxes))
+    hi = (max(f.x2 for f in boxes), max(f.y2 for f in boxes), max(f.z2 for f in boxes))
+    covered = np.zeros([b - a + 1 for a, b in zip(lo, hi)], dtype=bool)
+
+    out = list(cmds)
+    for i in range(len(cmds) - 1, -1, -1):
+        f = fills[i]
+        if f is None: # not a plain /fill, leave it alone
+            continue
+        region = covered[box_slices(f, lo)]
+
+        if f.mode == "outline":
+            shell = _shell(region.shape)
+            if region[shell].all():
+                out[i] = None
+            region[shell] = True
+            continue
+
+        if region.all():
+            out[i] = None
+            continue
+        if f.mode in ("replace", "keep", "destroy"):
+            free = ~region
+            xs = np.flatnonzero(free.any(axis=(1, 2)))
+            ys = np.flatnonzero(free.any(axis=(0, 2)))
+            zs = np.flatnonzero(free.any(axis=(0, 1)))
+            shrunk = f._replace(
+                x1=f.x1 + int(xs[0]), x2=f.x1 + int(xs[-1]),
+                y1=f.y1 + int(ys[0]), y2=f.y1 + int(ys[-1]),
+                z1=f.z1 + int(zs[0]), z2=f.z1 + int(zs[-1]),
+            )
+            if shrunk != f:
+                out[i] = shrunk.command()
+        if f.mode != "keep":
+            region[...] = True
+    return out